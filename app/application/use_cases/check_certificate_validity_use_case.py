@@ -0,0 +1,35 @@
+from datetime import date
+from typing import Dict, List, Optional
+from app.domain.repositories.ca_repository_interface import CARepositoryInterface
+from app.domain.entities.certificate_validity import CertificateValidity
+import logging
+
+logger = logging.getLogger(__name__)
+class CheckCertificateValidityUseCase:
+    """Caso de uso para verificar a validade de certificados em uma data de referência"""
+    
+    def __init__(self, ca_repository: CARepositoryInterface):
+        self.ca_repository = ca_repository
+    
+    async def execute(
+        self, registros_ca: List[str], reference_date: Optional[date] = None
+    ) -> Dict[str, Optional[CertificateValidity]]:
+        """
+        Verifica a validade de certificados por registro CA
+        
+        Args:
+            registros_ca: Lista de números de registro CA
+            reference_date: Data de referência (padrão: hoje)
+            
+        Returns:
+            Dicionário registro CA -> CertificateValidity (ou None se não encontrado),
+            na ordem em que os registros foram informados
+        """
+        registros_clean = [registro.strip() for registro in registros_ca if registro and registro.strip()]
+        if not registros_clean:
+            logger.warning("Lista de registros CA vazia fornecida")
+            return {}
+        
+        reference_date = reference_date or date.today()
+        logger.info(f"Verificando validade de {len(registros_clean)} certificados em {reference_date.isoformat()}")
+        return await self.ca_repository.get_validity(registros_clean, reference_date)
@@ -0,0 +1,32 @@
+from typing import Dict, Optional
+from app.domain.repositories.ca_repository_interface import CARepositoryInterface
+from app.domain.entities.certificate_export import CertificateExport
+import logging
+
+logger = logging.getLogger(__name__)
+class ExportCertificatesUseCase:
+    """Caso de uso para exportação em massa de certificados filtrados"""
+    
+    def __init__(self, ca_repository: CARepositoryInterface, batch_size: int = 5000):
+        self.ca_repository = ca_repository
+        self.batch_size = batch_size
+    
+    async def execute(
+        self, filters: Dict[str, str], after: Optional[str] = None, limit: Optional[int] = None
+    ) -> CertificateExport:
+        """
+        Exporta os certificados que atendem aos filtros, em ordem de registro CA
+        
+        Args:
+            filters: Campo -> valor (mesmos filtros da busca); sem filtros,
+                exporta toda a base
+            after: Último registro CA da página anterior (paginação por chave)
+            limit: Quantidade máxima de certificados exportados (None = todos)
+            
+        Returns:
+            CertificateExport com os lotes de certificados e o cursor da próxima página
+        """
+        filters_clean = {field: value.strip() for field, value in filters.items() if value and value.strip()}
+        
+        logger.info(f"Iniciando exportação: filtros={filters_clean}, after={after}, limit={limit}")
+        return await self.ca_repository.export_certificates(filters_clean, after, limit, self.batch_size)
@@ -0,0 +1,33 @@
+from typing import Optional
+from app.domain.repositories.ca_repository_interface import CARepositoryInterface
+from app.domain.entities.certificate_change import CertificateChangeFeed
+import logging
+
+logger = logging.getLogger(__name__)
+class GetCertificateChangesUseCase:
+    """Caso de uso para sincronização incremental: alterações desde uma versão da base"""
+    
+    def __init__(self, ca_repository: CARepositoryInterface):
+        self.ca_repository = ca_repository
+    
+    async def execute(self, since: str) -> Optional[CertificateChangeFeed]:
+        """
+        Lista as alterações de certificados desde a versão informada
+        
+        Args:
+            since: Versão da base já sincronizada pelo cliente (ETag ou
+                cabeçalho X-Dataset-Version de uma resposta anterior)
+            
+        Returns:
+            CertificateChangeFeed com as alterações por versão, ou None se a
+            versão é desconhecida
+        
+        Raises:
+            ValueError: se a versão não for informada
+        """
+        since = (since or "").strip().strip('"')
+        if not since:
+            raise ValueError("Versão de referência é obrigatória")
+        
+        logger.info(f"Consultando alterações desde a versão {since}")
+        return await self.ca_repository.get_changes(since)
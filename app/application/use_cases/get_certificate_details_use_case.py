@@ -0,0 +1,29 @@
+from typing import Optional
+from app.domain.repositories.ca_repository_interface import CARepositoryInterface
+from app.domain.entities.certificate_details import CertificateDetails
+import logging
+
+logger = logging.getLogger(__name__)
+class GetCertificateDetailsUseCase:
+    """Caso de uso para consulta de todos os dados de um certificado"""
+    
+    def __init__(self, ca_repository: CARepositoryInterface):
+        self.ca_repository = ca_repository
+    
+    async def execute(self, registro_ca: str) -> Optional[CertificateDetails]:
+        """
+        Busca os detalhes de um certificado por registro CA
+        
+        Args:
+            registro_ca: Número do registro CA a ser buscado
+            
+        Returns:
+            CertificateDetails ou None se não encontrado
+        """
+        if not registro_ca or not registro_ca.strip():
+            logger.warning("Registro CA vazio ou inválido fornecido")
+            return None
+        
+        registro_ca_clean = registro_ca.strip()
+        logger.info(f"Iniciando busca de detalhes do certificado: {registro_ca_clean}")
+        return await self.ca_repository.get_certificate_details(registro_ca_clean)
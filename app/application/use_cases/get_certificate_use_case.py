@@ -10,6 +10,13 @@ class GetCertificateUseCase:
     def __init__(self, ca_repository: CARepositoryInterface):
         self.ca_repository = ca_repository
     
+    def might_exist(self, registro_ca: str) -> bool:
+        """
+        Verificação rápida, antes da busca: False garante que o registro CA
+        não existe (vazio, não numérico ou fora do filtro de chaves da base)
+        """
+        return bool(registro_ca) and self.ca_repository.might_exist(registro_ca)
+    
     async def execute(self, registro_ca: str) -> Optional[ApproveCertificate]:
         """
         Busca um certificado por registro CA
@@ -0,0 +1,44 @@
+from typing import Dict, List, Optional
+from app.domain.repositories.ca_repository_interface import CARepositoryInterface
+from app.domain.entities.approve_certificate import ApproveCertificate
+import logging
+
+logger = logging.getLogger(__name__)
+class GetCertificatesBatchUseCase:
+    """Caso de uso para busca de vários certificados em uma única chamada"""
+    
+    def __init__(self, ca_repository: CARepositoryInterface):
+        self.ca_repository = ca_repository
+    
+    async def execute(self, registros_ca: List[str]) -> Dict[str, Optional[ApproveCertificate]]:
+        """
+        Busca vários certificados por registro CA
+        
+        Args:
+            registros_ca: Lista de números de registro CA
+            
+        Returns:
+            Dicionário registro CA -> ApproveCertificate (ou None se não encontrado),
+            na ordem em que os registros foram informados
+        """
+        # Limpar os registros e descartar entradas vazias
+        registros_clean = [registro.strip() for registro in registros_ca if registro and registro.strip()]
+        if not registros_clean:
+            logger.warning("Lista de registros CA vazia fornecida")
+            return {}
+        
+        logger.info(f"Iniciando busca em lote de {len(registros_clean)} certificados")
+        return await self.ca_repository.get_certificates(registros_clean)
+    
+    async def execute_all(self, limit: Optional[int] = None) -> List[ApproveCertificate]:
+        """
+        Lista os certificados da base em ordem de registro CA
+        
+        Args:
+            limit: Quantidade máxima de certificados (None = todos)
+            
+        Returns:
+            Lista de ApproveCertificate
+        """
+        logger.info(f"Listando certificados da base (limite: {limit})")
+        return await self.ca_repository.list_certificates(limit)
@@ -0,0 +1,24 @@
+from typing import Optional
+from app.domain.repositories.ca_repository_interface import CARepositoryInterface
+from app.domain.entities.dataset_version import DatasetVersion
+import logging
+
+logger = logging.getLogger(__name__)
+class GetDatasetVersionUseCase:
+    """Caso de uso para consultar a versão vigente da base de certificados"""
+    
+    def __init__(self, ca_repository: CARepositoryInterface):
+        self.ca_repository = ca_repository
+    
+    async def execute(self) -> Optional[DatasetVersion]:
+        """
+        Retorna a versão dos dados servidos, usada na validação de cache HTTP
+        
+        Returns:
+            DatasetVersion ou None se a base ainda não está disponível
+        """
+        try:
+            return await self.ca_repository.get_dataset_version()
+        except Exception as e:
+            logger.warning(f"Versão da base indisponível: {e}")
+            return None
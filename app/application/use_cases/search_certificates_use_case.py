@@ -0,0 +1,56 @@
+from typing import Dict, List, Tuple
+from app.domain.repositories.ca_repository_interface import CARepositoryInterface
+from app.domain.entities.approve_certificate import ApproveCertificate
+from app.domain.entities.certificate_search_result import CertificateSearchResult
+import logging
+
+logger = logging.getLogger(__name__)
+class SearchCertificatesUseCase:
+    """Caso de uso para busca de certificados por múltiplos filtros"""
+    
+    def __init__(self, ca_repository: CARepositoryInterface):
+        self.ca_repository = ca_repository
+    
+    async def execute(
+        self, filters: Dict[str, str], offset: int = 0, limit: int = 100
+    ) -> Tuple[int, List[ApproveCertificate]]:
+        """
+        Busca certificados que atendem a todos os filtros informados
+        
+        Args:
+            filters: Campo -> valor (situacao, natureza, cor, cnpj, razao_social,
+                marca_ca, nome_equipamento); valores vazios são ignorados
+            offset: Quantidade de resultados a pular
+            limit: Quantidade máxima de resultados retornados
+            
+        Returns:
+            Tupla (total de resultados, certificados da página)
+        """
+        filters_clean = {field: value.strip() for field, value in filters.items() if value and value.strip()}
+        if not filters_clean:
+            logger.warning("Busca por filtros sem nenhum filtro informado")
+            return 0, []
+        
+        logger.info(f"Iniciando busca por filtros: {filters_clean}")
+        return await self.ca_repository.search_certificates_by_filters(filters_clean, offset, limit)
+    
+    async def execute_text(
+        self, query: str, offset: int = 0, limit: int = 20
+    ) -> Tuple[int, List[CertificateSearchResult]]:
+        """
+        Busca textual por nome e descrição do equipamento
+        
+        Args:
+            query: Termos da busca (ex: "luva nitrilica")
+            offset: Quantidade de resultados a pular
+            limit: Quantidade máxima de resultados retornados
+            
+        Returns:
+            Tupla (total de resultados, resultados da página por relevância)
+        """
+        if not query or not query.strip():
+            logger.warning("Busca textual sem termos")
+            return 0, []
+        
+        logger.info(f"Iniciando busca textual: {query.strip()}")
+        return await self.ca_repository.search_certificates(query.strip(), offset, limit)
@@ -29,12 +29,35 @@ class Settings(BaseSettings):
     log_to_file: bool = Field(True, alias="LOG_TO_FILE")
     log_file_path: str = Field('logs/app.log', alias="LOG_FILE_PATH")
 
+    # --- Configurações de Métricas ---
+    enable_metrics: bool = Field(True, alias="ENABLE_METRICS")
+    metrics_flush_interval: float = Field(1.0, alias="METRICS_FLUSH_INTERVAL")
+
     # --- Configurações de Cache ---
     cache_timeout: int = Field(3600, alias="CACHE_TIMEOUT")
     cache_dir: str = Field('cache', alias="CACHE_DIR")
     parquet_file_name: str = Field('ca_certificates.parquet', alias="PARQUET_FILE_NAME")
     enable_parquet_cache: bool = Field(True, alias="ENABLE_PARQUET_CACHE")
     parquet_compression: str = Field('snappy', alias="PARQUET_COMPRESSION")
+    parquet_row_group_size: int = Field(5000, alias="PARQUET_ROW_GROUP_SIZE")
+    cache_format: str = Field('parquet', alias="CACHE_FORMAT")
+    ingest_chunk_size_mb: int = Field(16, alias="INGEST_CHUNK_SIZE_MB")
+    shared_dataset_poll_interval: float = Field(2.0, alias="SHARED_DATASET_POLL_INTERVAL")
+    dataset_storage_mode: str = Field('tiered', alias="DATASET_STORAGE_MODE")
+
+    # --- Configurações de Atualização ---
+    refresh_enabled: bool = Field(True, alias="REFRESH_ENABLED")
+    refresh_interval: int = Field(3600, alias="REFRESH_INTERVAL")
+    refresh_io_workers: int = Field(2, alias="REFRESH_IO_WORKERS")
+    parse_in_subprocess: bool = Field(True, alias="PARSE_IN_SUBPROCESS")
+    refresh_lock_poll_interval: float = Field(0.5, alias="REFRESH_LOCK_POLL_INTERVAL")
+
+    # --- Configurações de Consulta ---
+    batch_max_size: int = Field(50000, alias="BATCH_MAX_SIZE")
+    export_batch_size: int = Field(5000, alias="EXPORT_BATCH_SIZE")
+    http_cache_max_age: int = Field(300, alias="HTTP_CACHE_MAX_AGE")
+    response_cache_size: int = Field(100000, alias="RESPONSE_CACHE_SIZE")
+    response_cache_warm: bool = Field(True, alias="RESPONSE_CACHE_WARM")
 
     # --- Configurações de CORS ---
     cors_origins: str = Field('*', alias="CORS_ORIGINS")
@@ -0,0 +1,111 @@
+import logging
+from pathlib import Path
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.executors import shutdown_executors
+from app.infrastructure.cache.response_cache import ResponseCache
+from app.infrastructure.datasources.caepi_data_source import CAEPIDataSource
+from app.infrastructure.datasources.dataset_holder import DatasetHolder
+from app.infrastructure.datasources.certificate_refresher import CertificateRefresher
+from app.infrastructure.repositories.pandas_ca_repository import PandasCARepository
+from app.application.use_cases.check_certificate_validity_use_case import CheckCertificateValidityUseCase
+from app.application.use_cases.get_certificate_changes_use_case import GetCertificateChangesUseCase
+from app.application.use_cases.get_certificate_use_case import GetCertificateUseCase
+from app.application.use_cases.get_certificate_details_use_case import GetCertificateDetailsUseCase
+from app.application.use_cases.get_dataset_version_use_case import GetDatasetVersionUseCase
+from app.application.use_cases.get_certificates_batch_use_case import GetCertificatesBatchUseCase
+from app.application.use_cases.export_certificates_use_case import ExportCertificatesUseCase
+from app.application.use_cases.search_certificates_use_case import SearchCertificatesUseCase
+from app.application.use_cases.update_certificates_use_case import UpdateCertificatesUseCase
+from app.interface.controllers.certificate_controller import CertificateController
+from app.interface.controllers.system_controller import SystemController
+from app.interface.presenters.certificate_presenter import CertificatePresenter
+
+logger = logging.getLogger(__name__)
+
+
+class ApplicationContainer:
+    """
+    Container de dependências com escopo de aplicação.
+
+    É criado uma única vez no lifespan do FastAPI, de modo que o dataset em
+    memória e seus índices sobrevivem entre as requisições.
+    """
+
+    def __init__(self):
+        self.data_source = CAEPIDataSource()
+        self.dataset_holder = DatasetHolder(self.data_source)
+        self.refresher = CertificateRefresher(self.dataset_holder)
+        self.repository = PandasCARepository(self.dataset_holder)
+        self.presenter = CertificatePresenter()
+        self.response_cache = ResponseCache(
+            get_settings().response_cache_size, self.dataset_holder.changed_keys
+        )
+
+        self.get_certificate_use_case = GetCertificateUseCase(self.repository)
+        self.update_certificates_use_case = UpdateCertificatesUseCase(self.repository)
+        self.get_certificates_batch_use_case = GetCertificatesBatchUseCase(self.repository)
+        self.get_certificate_details_use_case = GetCertificateDetailsUseCase(self.repository)
+        self.search_certificates_use_case = SearchCertificatesUseCase(self.repository)
+        self.get_dataset_version_use_case = GetDatasetVersionUseCase(self.repository)
+        self.check_certificate_validity_use_case = CheckCertificateValidityUseCase(self.repository)
+        self.get_certificate_changes_use_case = GetCertificateChangesUseCase(self.repository)
+        self.export_certificates_use_case = ExportCertificatesUseCase(
+            self.repository, get_settings().export_batch_size
+        )
+
+        self.certificate_controller = CertificateController(
+            get_certificate_use_case=self.get_certificate_use_case,
+            update_certificates_use_case=self.update_certificates_use_case,
+            presenter=self.presenter,
+            get_certificates_batch_use_case=self.get_certificates_batch_use_case,
+            get_certificate_details_use_case=self.get_certificate_details_use_case,
+            search_certificates_use_case=self.search_certificates_use_case,
+            export_certificates_use_case=self.export_certificates_use_case,
+            get_dataset_version_use_case=self.get_dataset_version_use_case,
+            check_certificate_validity_use_case=self.check_certificate_validity_use_case,
+            get_certificate_changes_use_case=self.get_certificate_changes_use_case,
+            response_cache=self.response_cache
+        )
+        self.system_controller = SystemController(self.dataset_holder, self.data_source, self.response_cache)
+
+    async def startup(self):
+        """Carrega o dataset uma única vez e inicia a atualização em segundo plano"""
+        settings = get_settings()
+        if settings.enable_metrics:
+            metrics.registry.configure(Path(settings.cache_dir) / "metrics", settings.metrics_flush_interval)
+            metrics.registry.add_collector(self.collect_metrics)
+            metrics.registry.start()
+
+        try:
+            await self.dataset_holder.load()
+        except Exception as e:
+            # A API sobe mesmo sem dados; a carga será tentada na primeira consulta
+            logger.error(f"Falha ao carregar dataset na inicialização: {e}", exc_info=True)
+        
+        if get_settings().response_cache_warm and self.dataset_holder.is_loaded():
+            try:
+                count = await self.certificate_controller.warm_response_cache()
+                logger.info(f"Cache de respostas aquecido com {count} certificados")
+            except Exception as e:
+                logger.warning(f"Falha ao aquecer o cache de respostas: {e}")
+        
+        self.refresher.start()
+
+    async def shutdown(self):
+        """Libera recursos mantidos pelo container"""
+        logger.info("Encerrando container da aplicação")
+        await self.refresher.stop()
+        await metrics.registry.stop()
+        shutdown_executors()
+
+    def collect_metrics(self):
+        """Atualiza os gauges de dataset, cache de respostas e memória deste worker"""
+        snapshot = self.dataset_holder.snapshot
+        if snapshot is not None:
+            metrics.DATASET_RECORDS.set(snapshot.records_count)
+            metrics.DATASET_GENERATION.set(snapshot.generation)
+        metrics.RESPONSE_CACHE_LOOKUPS.set_total(self.response_cache.hits, result="hit")
+        metrics.RESPONSE_CACHE_LOOKUPS.set_total(self.response_cache.misses, result="miss")
+        metrics.RESPONSE_CACHE_ENTRIES.set(len(self.response_cache))
+        metrics.PROCESS_MEMORY.set(metrics.process_memory_bytes())
@@ -0,0 +1,91 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_io_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """
+    Retorna o pool de threads usado para I/O bloqueante (FTP, arquivos, cache)
+
+    Returns:
+        ThreadPoolExecutor: Pool compartilhado pelo processo
+    """
+    global _io_executor
+    if _io_executor is None:
+        settings = get_settings()
+        _io_executor = ThreadPoolExecutor(
+            max_workers=settings.refresh_io_workers,
+            thread_name_prefix="caepi-io"
+        )
+    return _io_executor
+
+
+def get_cpu_executor() -> Executor:
+    """
+    Retorna o executor usado para processamento pesado (parse do arquivo CAEPI).
+
+    Usa um pool de processos quando PARSE_IN_SUBPROCESS está habilitado, para
+    que o parse não dispute o GIL com as requisições; caso contrário, reutiliza
+    o pool de threads de I/O.
+
+    Returns:
+        Executor: Executor para tarefas de CPU
+    """
+    global _cpu_executor
+    settings = get_settings()
+    if not settings.parse_in_subprocess:
+        return get_io_executor()
+
+    if _cpu_executor is None:
+        # "spawn" evita herdar threads e locks do worker do servidor via fork
+        _cpu_executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _cpu_executor
+
+
+async def run_io(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Executa uma função bloqueante de I/O fora do event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def run_cpu(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Executa uma função de CPU fora do event loop.
+
+    Com pool de processos, `func` e seus argumentos precisam ser serializáveis
+    (funções de módulo, não métodos de instância).
+    """
+    global _cpu_executor
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_cpu_executor(), functools.partial(func, *args, **kwargs))
+    except BrokenProcessPool:
+        # Descartar o pool quebrado para que a próxima chamada crie um novo
+        logger.error("Pool de processos interrompido, será recriado na próxima execução")
+        _cpu_executor = None
+        raise
+
+
+def shutdown_executors():
+    """Encerra os executores criados pelo processo"""
+    global _io_executor, _cpu_executor
+    if _cpu_executor is not None:
+        _cpu_executor.shutdown(wait=False, cancel_futures=True)
+        _cpu_executor = None
+    if _io_executor is not None:
+        _io_executor.shutdown(wait=False, cancel_futures=True)
+        _io_executor = None
+    logger.info("Executores de atualização encerrados")
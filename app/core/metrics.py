@@ -0,0 +1,444 @@
+import asyncio
+import bisect
+import functools
+import inspect
+import json
+import logging
+import os
+import resource
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - fcntl só existe em sistemas POSIX
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Limites (segundos) dos histogramas de latência: de consultas no índice a parses de minutos
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0
+)
+
+
+class Metric:
+    """Métrica com rótulos; valores mantidos por combinação de rótulos"""
+
+    type = "untyped"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: Sequence[str]):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def export(self) -> List[list]:
+        """Valores serializáveis: [[valores dos rótulos], valor]"""
+        return [[list(key), value] for key, value in self._values.items()]
+
+
+class Counter(Metric):
+    """Contador monotônico (soma entre workers, inclusive os já encerrados)"""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value: float, **labels):
+        """Define o total de um contador mantido por outro componente (ex: acertos do ResponseCache)"""
+        with self.registry.lock:
+            self._values[self._key(labels)] = value
+
+
+class Gauge(Metric):
+    """
+    Valor instantâneo de cada worker.
+
+    `aggregation` define como os valores dos workers ativos são combinados:
+    "sum", "max" ou "all" (uma série por worker, com o rótulo `pid`).
+    """
+
+    type = "gauge"
+
+    def __init__(self, registry, name, documentation, labelnames, aggregation: str = "max"):
+        super().__init__(registry, name, documentation, labelnames)
+        self.aggregation = aggregation
+
+    def set(self, value: float, **labels):
+        with self.registry.lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Histograma de valores (soma por faixa entre workers, inclusive os já encerrados)"""
+
+    type = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames, buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self.registry.lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # Contagem por faixa (não acumulada, a última é +Inf), soma e total
+                counts = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            counts[0][position] += 1
+            counts[1] += value
+            counts[2] += 1
+
+    def export(self) -> List[list]:
+        return [[list(key), [list(counts[0]), counts[1], counts[2]]] for key, counts in self._values.items()]
+
+
+class MetricsRegistry:
+    """
+    Métricas do processo, agregadas entre os workers no formato texto do Prometheus.
+
+    Cada worker mantém suas métricas em memória e grava periodicamente um
+    retrato delas em `directory/worker-<pid>.json`. Ao atender `/metrics`,
+    o worker combina os próprios valores com os retratos dos demais:
+    contadores e histogramas são somados, inclusive os de workers já
+    encerrados (acumulados em `archived.json`, para que os totais nunca
+    diminuam quando o Gunicorn recria um worker); gauges consideram apenas os
+    workers ativos.
+
+    Sem diretório configurado, as métricas são apenas as do processo.
+    """
+
+    WORKER_PREFIX = "worker-"
+    ARCHIVE_FILE = "archived.json"
+    LOCK_FILE = ".lock"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.directory: Optional[Path] = None
+        self.flush_interval = 1.0
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), aggregation: str = "max") -> Gauge:
+        return self._register(Gauge(self, name, documentation, labelnames, aggregation))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Registra uma função que atualiza gauges a partir do estado atual (antes de cada retrato)"""
+        self._collectors.append(collector)
+
+    def configure(self, directory: Path, flush_interval: float):
+        """Habilita a agregação entre workers pelo diretório compartilhado"""
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Retrato deixado por um processo anterior com o mesmo pid
+        own = self._worker_path(os.getpid())
+        if own.exists():
+            self._archive([own])
+
+    def start(self):
+        """Inicia a gravação periódica do retrato deste worker"""
+        if self.directory is not None and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run(), name="metrics-flush")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.directory is not None:
+            self.flush()
+
+    def flush(self):
+        """Grava o retrato das métricas deste worker"""
+        snapshot = {"pid": os.getpid(), "written_at": time.time(), "metrics": self._export()}
+        path = self._worker_path(os.getpid())
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Erro ao gravar métricas do worker: {e}")
+
+    def render(self) -> str:
+        """Métricas de todos os workers no formato texto do Prometheus (version 0.0.4)"""
+        own = {"pid": os.getpid(), "metrics": self._export()}
+        live, archived = [own], {}
+        if self.directory is not None:
+            others, dead = self._read_workers()
+            live.extend(others)
+            if dead:
+                self._archive(dead)
+            archived = self._read(self.directory / self.ARCHIVE_FILE) or {}
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            if isinstance(metric, Gauge):
+                lines.extend(self._render_gauge(metric, live))
+                continue
+            merged: Dict[Tuple[str, ...], Any] = {}
+            for snapshot in [archived] + live:
+                self._merge(metric, merged, snapshot.get("metrics", {}).get(metric.name, []))
+            for key, value in sorted(merged.items()):
+                if isinstance(metric, Histogram):
+                    lines.extend(self._render_histogram(metric, key, value))
+                else:
+                    lines.append(f"{metric.name}{self._labels(metric.labelnames, key)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica {metric.name} já registrada")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def _export(self) -> Dict[str, List[list]]:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"Erro ao coletar métricas: {e}")
+        with self.lock:
+            return {name: metric.export() for name, metric in self._metrics.items()}
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            # Retrato pequeno gravado no próprio event loop: o pool de I/O pode
+            # estar ocupado por uma atualização da base por vários minutos
+            self.flush()
+
+    def _worker_path(self, pid: int) -> Path:
+        return self.directory / f"{self.WORKER_PREFIX}{pid}.json"
+
+    def _read_workers(self) -> Tuple[List[dict], List[Path]]:
+        """Retratos dos outros workers ativos e arquivos de workers encerrados"""
+        live, dead = [], []
+        for path in self.directory.glob(f"{self.WORKER_PREFIX}*.json"):
+            try:
+                pid = int(path.stem[len(self.WORKER_PREFIX):])
+            except ValueError:
+                continue
+            if pid == os.getpid():
+                continue
+            if not _is_alive(pid):
+                dead.append(path)
+                continue
+            snapshot = self._read(path)
+            if snapshot is not None:
+                live.append(snapshot)
+        return live, dead
+
+    def _archive(self, paths: List[Path]):
+        """Acumula contadores e histogramas de workers encerrados em archived.json"""
+        lock_file = open(self.directory / self.LOCK_FILE, "a+b")
+        with lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            archive_path = self.directory / self.ARCHIVE_FILE
+            archive = self._read(archive_path) or {"metrics": {}}
+            snapshots = [(path, self._read(path)) for path in paths if path.exists()]
+            if not snapshots:
+                return
+            for name, metric in self._metrics.items():
+                if isinstance(metric, Gauge):
+                    continue
+                merged: Dict[Tuple[str, ...], Any] = {}
+                for snapshot in [archive] + [snapshot for _, snapshot in snapshots if snapshot]:
+                    self._merge(metric, merged, snapshot["metrics"].get(name, []))
+                archive["metrics"][name] = [[list(key), value] for key, value in merged.items()]
+
+            tmp_path = archive_path.with_name(f".{archive_path.name}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(archive, f, separators=(",", ":"))
+            os.replace(tmp_path, archive_path)
+            for path, _ in snapshots:
+                path.unlink(missing_ok=True)
+            logger.info(f"Métricas de {len(snapshots)} workers encerrados acumuladas")
+
+    @staticmethod
+    def _merge(metric: Metric, merged: Dict[Tuple[str, ...], Any], values: List[list]):
+        for labels, value in values:
+            key = tuple(labels)
+            if isinstance(metric, Histogram):
+                if len(value[0]) != len(metric.buckets) + 1:
+                    continue  # faixas de outra versão da aplicação
+                current = merged.setdefault(key, [[0] * len(value[0]), 0.0, 0])
+                current[0] = [a + b for a, b in zip(current[0], value[0])]
+                current[1] += value[1]
+                current[2] += value[2]
+            else:
+                merged[key] = merged.get(key, 0) + value
+
+    def _render_gauge(self, metric: Gauge, snapshots: List[dict]) -> List[str]:
+        lines = []
+        if metric.aggregation == "all":
+            labelnames = metric.labelnames + ("pid",)
+            for snapshot in snapshots:
+                for labels, value in snapshot["metrics"].get(metric.name, []):
+                    key = tuple(labels) + (str(snapshot["pid"]),)
+                    lines.append(f"{metric.name}{self._labels(labelnames, key)} {_number(value)}")
+            return lines
+
+        combine = max if metric.aggregation == "max" else sum
+        grouped: Dict[Tuple[str, ...], List[float]] = {}
+        for snapshot in snapshots:
+            for labels, value in snapshot["metrics"].get(metric.name, []):
+                grouped.setdefault(tuple(labels), []).append(value)
+        for key, values in sorted(grouped.items()):
+            lines.append(f"{metric.name}{self._labels(metric.labelnames, key)} {_number(combine(values))}")
+        return lines
+
+    def _render_histogram(self, metric: Histogram, key: Tuple[str, ...], value: list) -> List[str]:
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(metric.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else _number(bound)
+            labels = self._labels(metric.labelnames + ("le",), key + (le,))
+            lines.append(f"{metric.name}_bucket{labels} {cumulative}")
+        labels = self._labels(metric.labelnames, key)
+        lines.append(f"{metric.name}_sum{labels} {_number(total)}")
+        lines.append(f"{metric.name}_count{labels} {count}")
+        return lines
+
+    @staticmethod
+    def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+        if not names:
+            return ""
+        pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+        return "{" + pairs + "}"
+
+    @staticmethod
+    def _read(path: Path) -> Optional[dict]:
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Erro ao ler métricas de {path}: {e}")
+            return None
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return f"{value:.1f}"
+    return repr(value)
+
+
+def process_memory_bytes() -> int:
+    """Memória residente (RSS) do processo atual"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Fora do Linux: pico de memória residente (KB no Linux, bytes no macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# Registro global do processo e métricas da aplicação
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "caepi_http_requests_total", "Requisições HTTP atendidas", ["method", "endpoint", "status"]
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "caepi_http_request_duration_seconds", "Latência das requisições HTTP", ["method", "endpoint"]
+)
+OPERATION_DURATION = registry.histogram(
+    "caepi_operation_duration_seconds", "Duração de operações internas (carga, download, cache, índice)", ["operation"]
+)
+INDEX_LOOKUPS = registry.counter(
+    "caepi_index_lookups_total", "Consultas de CA no índice, por resultado (hit/miss)", ["result"]
+)
+RESPONSE_CACHE_LOOKUPS = registry.counter(
+    "caepi_response_cache_lookups_total", "Consultas ao cache de respostas, por resultado (hit/miss)", ["result"]
+)
+RESPONSE_CACHE_ENTRIES = registry.gauge(
+    "caepi_response_cache_entries", "Respostas mantidas no cache de respostas", aggregation="sum"
+)
+REFRESHES = registry.counter(
+    "caepi_refresh_total", "Atualizações da base, por resultado (success/failure/adopted)", ["result"]
+)
+REFRESH_LAST_SUCCESS = registry.gauge(
+    "caepi_refresh_last_success_timestamp_seconds", "Horário da última atualização bem-sucedida", aggregation="max"
+)
+DATASET_RECORDS = registry.gauge(
+    "caepi_dataset_records", "Registros no snapshot do dataset carregado", aggregation="max"
+)
+DATASET_GENERATION = registry.gauge(
+    "caepi_dataset_generation", "Geração do dataset carregada em cada worker", aggregation="all"
+)
+PROCESS_MEMORY = registry.gauge(
+    "caepi_process_resident_memory_bytes", "Memória residente de cada worker", aggregation="all"
+)
+
+
+def timed(operation: str) -> Callable:
+    """
+    Decorator que registra a duração de uma função (síncrona ou assíncrona)
+    em `caepi_operation_duration_seconds{operation=...}`, inclusive quando ela
+    termina com exceção.
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    OPERATION_DURATION.observe(time.perf_counter() - start, operation=operation)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                OPERATION_DURATION.observe(time.perf_counter() - start, operation=operation)
+        return wrapper
+    return decorator
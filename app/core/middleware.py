@@ -0,0 +1,73 @@
+import logging
+import time
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimingMiddleware:
+    """
+    Mede a duração de cada requisição HTTP.
+
+    Registra a latência em `caepi_http_request_duration_seconds` e a
+    contagem em `caepi_http_requests_total`, e faz um log por requisição com
+    os campos `endpoint`, `method`, `status_code` e `duration` (ms) usados
+    pelo JSONFormatter. O endpoint é o modelo da rota (ex:
+    `/certificates/{registro_ca}`), não o caminho requisitado, para que o
+    número de séries não cresça com os CAs consultados.
+
+    É um middleware ASGI puro: não armazena o corpo das respostas, então
+    respostas em streaming (exportação) são medidas até o último bloco.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            method = scope["method"]
+            endpoint = route_path(scope)
+            HTTP_REQUESTS.inc(method=method, endpoint=endpoint, status=status_code)
+            HTTP_REQUEST_DURATION.observe(duration, method=method, endpoint=endpoint)
+            logger.info(
+                f"{method} {scope['path']} {status_code} {duration * 1000:.2f}ms",
+                extra={
+                    "endpoint": endpoint,
+                    "method": method,
+                    "status_code": status_code,
+                    "duration": round(duration * 1000, 2),
+                }
+            )
+
+
+def route_path(scope: Scope) -> str:
+    """Modelo da rota que atendeu a requisição, ou "unmatched" se nenhuma atendeu"""
+    route = scope.get("route")
+    if route is None:
+        # Versões anteriores do Starlette não registram a rota no scope
+        for candidate in getattr(scope.get("app"), "routes", []):
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", None) or "unmatched"
@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Iterator, List, Optional
+
+
+class CertificateChangeKind(str, Enum):
+
+    INCLUIDO = "incluido"
+    ALTERADO = "alterado"
+    REMOVIDO = "removido"
+
+
+@dataclass
+class CertificateChange:
+
+    version: str
+    registro_ca: str
+    kind: CertificateChangeKind
+    data_validade: Optional[str] = None
+    situacao: Optional[str] = None
+    previous_data_validade: Optional[str] = None
+    previous_situacao: Optional[str] = None
+
+    def to_dict(self):
+        data = {"versao": self.version, "registro_ca": self.registro_ca, "tipo": self.kind.value}
+        if self.kind != CertificateChangeKind.REMOVIDO:
+            data["data_validade"] = self.data_validade
+            data["situacao"] = self.situacao
+        if self.kind == CertificateChangeKind.ALTERADO:
+            data["data_validade_anterior"] = self.previous_data_validade
+            data["situacao_anterior"] = self.previous_situacao
+        return data
+
+
+@dataclass
+class CertificateChangeFeed:
+
+    since: str
+    version: str
+    versions: List[str]
+    batches: Iterator[List[CertificateChange]]
@@ -0,0 +1,28 @@
+from dataclasses import dataclass, fields
+
+
+@dataclass
+class CertificateDetails:
+
+    registro_ca: str
+    data_validade: str
+    situacao: str
+    nr_processo: str = ""
+    cnpj: str = ""
+    razao_social: str = ""
+    natureza: str = ""
+    nome_equipamento: str = ""
+    descricao_equipamento: str = ""
+    marca_ca: str = ""
+    referencia: str = ""
+    cor: str = ""
+    aprovado_para_laudo: str = ""
+    restricao_laudo: str = ""
+    observacao_analise_laudo: str = ""
+    cnpj_laboratorio: str = ""
+    razao_social_laboratorio: str = ""
+    nr_laudo: str = ""
+    norma: str = ""
+
+    def to_dict(self):
+        return {field.name: getattr(self, field.name) for field in fields(self)}
@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+from app.domain.entities.certificate_details import CertificateDetails
+
+
+@dataclass
+class CertificateExport:
+
+    total: int
+    count: int
+    next_after: Optional[str]
+    batches: Iterator[List[CertificateDetails]]
+    version: Optional[str] = None
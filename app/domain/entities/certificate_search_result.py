@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+from app.domain.entities.approve_certificate import ApproveCertificate
+
+
+@dataclass
+class CertificateSearchResult:
+
+    certificate: ApproveCertificate
+    nome_equipamento: str
+    score: float
+
+    def to_dict(self):
+        return {
+            **self.certificate.to_dict(),
+            "nome_equipamento": self.nome_equipamento,
+            "score": self.score
+        }
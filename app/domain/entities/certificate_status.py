@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class CertificateStatus(str, Enum):
+
+    VALIDO = "Válido"
+    VENCIDO = "Vencido"
+    CANCELADO = "Cancelado"
+    EM_ANALISE = "Em análise"
@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+from app.domain.entities.approve_certificate import ApproveCertificate
+
+
+@dataclass
+class CertificateValidity:
+
+    certificate: ApproveCertificate
+    reference_date: date
+    valid: bool
+    expires_in_days: Optional[int]
+
+    def to_dict(self):
+        return {
+            **self.certificate.to_dict(),
+            "data_referencia": self.reference_date.isoformat(),
+            "valido": self.valid,
+            "dias_para_vencer": self.expires_in_days
+        }
@@ -0,0 +1,8 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class DatasetVersion:
+
+    version: str
+    modified_at: float
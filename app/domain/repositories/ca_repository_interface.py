@@ -1,6 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from datetime import date
+from typing import Dict, List, Optional, Tuple
 from app.domain.entities.approve_certificate import ApproveCertificate
+from app.domain.entities.certificate_change import CertificateChangeFeed
+from app.domain.entities.certificate_details import CertificateDetails
+from app.domain.entities.certificate_export import CertificateExport
+from app.domain.entities.certificate_search_result import CertificateSearchResult
+from app.domain.entities.certificate_validity import CertificateValidity
+from app.domain.entities.dataset_version import DatasetVersion
 
 class CARepositoryInterface(ABC):
 
@@ -8,6 +15,58 @@ class CARepositoryInterface(ABC):
     async def get_certificate(self, registro_ca: str) -> Optional[ApproveCertificate]:
         pass
 
+    @abstractmethod
+    def might_exist(self, registro_ca: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def get_certificates(self, registros_ca: List[str]) -> Dict[str, Optional[ApproveCertificate]]:
+        pass
+
+    @abstractmethod
+    async def get_validity(
+        self, registros_ca: List[str], reference_date: date
+    ) -> Dict[str, Optional[CertificateValidity]]:
+        pass
+
+    @abstractmethod
+    async def list_certificates(self, limit: Optional[int] = None) -> List[ApproveCertificate]:
+        pass
+
+    @abstractmethod
+    async def get_certificate_details(self, registro_ca: str) -> Optional[CertificateDetails]:
+        pass
+
+    @abstractmethod
+    async def search_certificates_by_filters(
+        self, filters: Dict[str, str], offset: int = 0, limit: int = 100
+    ) -> Tuple[int, List[ApproveCertificate]]:
+        pass
+
+    @abstractmethod
+    async def search_certificates(
+        self, query: str, offset: int = 0, limit: int = 20
+    ) -> Tuple[int, List[CertificateSearchResult]]:
+        pass
+
+    @abstractmethod
+    async def export_certificates(
+        self,
+        filters: Dict[str, str],
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 5000
+    ) -> CertificateExport:
+        pass
+
+    @abstractmethod
+    async def get_dataset_version(self) -> DatasetVersion:
+        pass
+
+    @abstractmethod
+    async def get_changes(self, since: str) -> Optional[CertificateChangeFeed]:
+        pass
+
     @abstractmethod
     async def update_base_certificate(self) -> bool:
         pass
@@ -3,5 +3,6 @@ Módulo de cache para otimização de performance da API CAEPI.
 """
 
 from .parquet_cache import ParquetCacheManager
+from .response_cache import ResponseCache
 
-__all__ = ['ParquetCacheManager']
\ No newline at end of file
+__all__ = ['ParquetCacheManager', 'ResponseCache']
\ No newline at end of file
@@ -0,0 +1,144 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeLog:
+    """
+    Registro append-only das alterações da base entre versões consecutivas.
+
+    Cada linha do arquivo (`cache_dir/changes.ndjson`) é um JSON com as
+    alterações de uma versão em relação à versão sobre a qual foi publicada:
+
+        {"version": ..., "base_version": ..., "generation": ..., "created_at": ...,
+         "added": [[registro_ca, data_validade, situacao], ...],
+         "removed": [registro_ca, ...],
+         "changed": [[registro_ca, data_validade, situacao,
+                      data_validade_anterior, situacao_anterior], ...]}
+
+    Apenas RegistroCA, DataValidade e Situacao são registrados, então cada
+    linha tem o tamanho das alterações e não o da base. O arquivo nunca é
+    reescrito: as versões ficam encadeadas por `base_version` e o histórico
+    sobrevive às gerações removidas do SharedDatasetStore.
+    """
+
+    FILE_NAME = "changes.ndjson"
+    # Tamanho do bloco lido do fim do arquivo ao procurar versões recentes
+    READ_BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, cache_dir: str):
+        self.path = Path(cache_dir) / self.FILE_NAME
+
+    @staticmethod
+    def entry(changes, base_index, index, version: str, generation: int) -> Dict[str, Any]:
+        """
+        Monta a linha do registro para um DatasetChangeset.
+
+        Args:
+            changes: Alterações da nova geração (DatasetChangeset)
+            base_index: CertificateIndex da geração anterior
+            index: CertificateIndex da nova geração
+            version: Versão (hash do conteúdo) da nova geração
+            generation: Número da nova geração
+        """
+        added = np.searchsorted(index.keys, changes.added)
+        changed = np.searchsorted(index.keys, changes.changed)
+        previous = np.searchsorted(base_index.keys, changes.changed)
+
+        _, added_validade, added_situacao = index.records(added)
+        _, validade, situacao = index.records(changed)
+        _, validade_anterior, situacao_anterior = base_index.records(previous)
+        return {
+            "version": version,
+            "base_version": changes.base_version,
+            "generation": generation,
+            "created_at": time.time(),
+            "added": [list(item) for item in zip(changes.added.tolist(), added_validade, added_situacao)],
+            "removed": changes.removed.tolist(),
+            "changed": [
+                list(item)
+                for item in zip(changes.changed.tolist(), validade, situacao, validade_anterior, situacao_anterior)
+            ],
+        }
+
+    def append(self, entry: Dict[str, Any]):
+        """
+        Acrescenta uma linha ao registro.
+
+        A linha é gravada com uma única escrita em modo append, então
+        processos concorrentes nunca intercalam linhas.
+        """
+        line = (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+        logger.info(
+            f"Alterações da versão {entry['version']} registradas: "
+            f"{len(entry['added'])} incluídos, {len(entry['changed'])} alterados, {len(entry['removed'])} removidos"
+        )
+
+    def entries_between(self, since: str, version: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Linhas que levam da versão `since` até `version`, em ordem cronológica.
+
+        O registro é lido do fim para o início seguindo `base_version` a
+        partir de `version`, então consultas por versões recentes leem apenas
+        o final do arquivo.
+
+        Returns:
+            Lista de linhas (vazia se `since == version`), ou None se `since`
+            não é uma versão anterior conhecida
+        """
+        if since == version:
+            return []
+
+        chain: List[Dict[str, Any]] = []
+        expected = version
+        for line in self._lines_reversed():
+            # Evita decodificar linhas fora da cadeia (o prefixo traz a versão)
+            if f'"version":"{expected}"' not in line[:200]:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning(f"Linha inválida no registro de alterações {self.path}")
+                return None
+            if entry.get("version") != expected:
+                continue
+            chain.append(entry)
+            expected = entry["base_version"]
+            if expected == since:
+                chain.reverse()
+                return chain
+        return None
+
+    def _lines_reversed(self) -> Iterator[str]:
+        """Linhas do arquivo, da última para a primeira, lidas em blocos"""
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            position = f.seek(0, os.SEEK_END)
+            remainder = b""
+            while position > 0:
+                size = min(self.READ_BLOCK_SIZE, position)
+                position -= size
+                f.seek(position)
+                lines = (f.read(size) + remainder).split(b"\n")
+                remainder = lines[0]
+                for line in reversed(lines[1:]):
+                    if line:
+                        yield line.decode("utf-8")
+            if remainder:
+                yield remainder.decode("utf-8")
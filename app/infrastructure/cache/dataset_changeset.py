@@ -0,0 +1,128 @@
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from app.infrastructure.cache.shared_dataset import load_array
+
+logger = logging.getLogger(__name__)
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Hash de 64 bits do conteúdo de cada linha do DataFrame (operação vetorizada).
+
+    Colunas categóricas têm o mesmo hash que os valores equivalentes em
+    `object`, então o resultado não depende de como o DataFrame foi carregado
+    (arquivo do CAEPI ou cache persistente).
+    """
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+def document_map(reuse: np.ndarray, base_size: int) -> np.ndarray:
+    """
+    Inverte `reuse` (documento novo -> documento anterior com o mesmo conteúdo).
+
+    Returns:
+        Para cada documento da geração anterior, o documento correspondente
+        na nova geração, ou -1 se foi alterado ou removido
+    """
+    doc_map = np.full(base_size, -1, dtype=np.int64)
+    kept = np.flatnonzero(reuse >= 0)
+    doc_map[reuse[kept]] = kept
+    return doc_map
+
+
+@dataclass
+class DatasetChangeset:
+    """
+    Diferença entre duas gerações do dataset, por RegistroCA.
+
+    Uma linha é considerada alterada quando o hash do seu conteúdo (todas as
+    colunas) muda. `reuse` indica, para cada posição do novo índice, a
+    posição da geração anterior com o mesmo conteúdo (ou -1), e é o que
+    permite reaproveitar colunas e índices já construídos.
+    """
+
+    base_generation: int
+    base_version: str
+    added: np.ndarray
+    changed: np.ndarray
+    removed: np.ndarray
+    reuse: np.ndarray
+
+    @classmethod
+    def compute(
+        cls,
+        base_generation: int,
+        base_version: str,
+        base_keys: np.ndarray,
+        base_hashes: np.ndarray,
+        keys: np.ndarray,
+        hashes: np.ndarray,
+    ) -> "DatasetChangeset":
+        """
+        Compara as chaves ordenadas e os hashes de duas gerações.
+
+        Args:
+            base_keys, base_hashes: RegistroCA e hash de cada posição da geração anterior
+            keys, hashes: RegistroCA e hash de cada posição da nova geração
+        """
+        positions = np.minimum(np.searchsorted(base_keys, keys), max(len(base_keys) - 1, 0))
+        present = base_keys[positions] == keys if len(base_keys) else np.zeros(len(keys), dtype=bool)
+        same = present & (base_hashes[positions] == hashes) if len(base_keys) else present
+
+        reuse = np.full(len(keys), -1, dtype=np.int64)
+        reuse[same] = positions[same]
+        kept = np.zeros(len(base_keys), dtype=bool)
+        kept[positions[present]] = True
+
+        return cls(
+            base_generation=base_generation,
+            base_version=base_version,
+            added=np.asarray(keys[~present], dtype=np.int64),
+            changed=np.asarray(keys[present & ~same], dtype=np.int64),
+            removed=np.asarray(base_keys[~kept], dtype=np.int64),
+            reuse=reuse,
+        )
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+    @property
+    def churn(self) -> float:
+        """Fração das posições da nova geração que não podem ser reaproveitadas"""
+        return float((self.reuse < 0).mean()) if len(self.reuse) else 0.0
+
+    def keys(self) -> List[str]:
+        """RegistroCA afetados (incluídos, alterados e removidos), como texto"""
+        return np.concatenate((self.added, self.changed, self.removed)).astype(str).tolist()
+
+    def summary(self) -> dict:
+        return {
+            "base_generation": self.base_generation,
+            "base_version": self.base_version,
+            "added": len(self.added),
+            "changed": len(self.changed),
+            "removed": len(self.removed),
+        }
+
+    def save(self, directory: Path):
+        np.save(directory / "changes.added.npy", self.added)
+        np.save(directory / "changes.changed.npy", self.changed)
+        np.save(directory / "changes.removed.npy", self.removed)
+
+    @classmethod
+    def load(cls, directory: Path, summary: dict) -> "DatasetChangeset":
+        """Reabre o changeset gravado com `save` (sem `reuse`, usado só na publicação)"""
+        return cls(
+            base_generation=summary["base_generation"],
+            base_version=summary["base_version"],
+            added=load_array(directory / "changes.added.npy"),
+            changed=load_array(directory / "changes.changed.npy"),
+            removed=load_array(directory / "changes.removed.npy"),
+            reuse=np.array([], dtype=np.int64),
+        )
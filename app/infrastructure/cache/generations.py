@@ -0,0 +1,223 @@
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - fcntl só existe em sistemas POSIX
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def fsync_path(path: Path):
+    """Força a gravação em disco de um arquivo ou diretório"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class GenerationLease:
+    """
+    Trava compartilhada sobre uma geração, mantida enquanto ela está em uso.
+
+    Enquanto algum processo mantém a trava, a geração não é removida pela
+    coleta. A trava é liberada com `release` ou quando o objeto é coletado
+    (o descritor do arquivo é fechado).
+    """
+
+    def __init__(self, generation: int, file=None):
+        self.generation = generation
+        self._file = file
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __del__(self):
+        self.release()
+
+
+class GenerationDirectory:
+    """
+    Diretórios de geração (gen-<n>) publicados de forma atômica.
+
+    Uma geração é gravada inteira em um diretório temporário, gravada em
+    disco (fsync dos arquivos e do diretório), renomeada para gen-<n> e só
+    então publicada pela troca atômica (os.replace) do link simbólico
+    `current`. Um leitor resolve o link uma única vez e lê todos os arquivos
+    da mesma geração, então nunca vê um arquivo parcial nem uma mistura de
+    duas gerações; se o processo cair no meio da gravação, `current`
+    continua apontando para a geração anterior.
+
+    Quem lê uma geração mantém um GenerationLease (flock compartilhado em
+    gen-<n>/.lease). A coleta remove as gerações que não são a vigente e
+    que nenhum processo mantém travadas, além de diretórios temporários
+    abandonados por gravações interrompidas.
+    """
+
+    PREFIX = "gen-"
+    CURRENT_LINK = "current"
+    LEASE_FILE = ".lease"
+    STAGING_PREFIX = ".tmp-"
+    # Idade a partir da qual um diretório temporário é considerado abandonado
+    STALE_STAGING_SECONDS = 3600
+    # Sem fcntl não há como saber se uma geração está em uso: mantém as mais recentes
+    KEEP_WITHOUT_LEASES = 2
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.current_link = self.root / self.CURRENT_LINK
+
+    def current(self) -> Optional[int]:
+        """Número da geração vigente, ou None se nenhuma foi publicada"""
+        try:
+            name = os.readlink(self.current_link)
+        except (FileNotFoundError, OSError):
+            return None
+        return self._parse(os.path.basename(name))
+
+    def path(self, generation: int) -> Path:
+        return self.root / f"{self.PREFIX}{generation}"
+
+    def generations(self) -> List[int]:
+        """Gerações existentes em disco, em ordem crescente"""
+        if not self.root.exists():
+            return []
+        return sorted(
+            generation
+            for generation in (self._parse(path.name) for path in self.root.iterdir())
+            if generation is not None
+        )
+
+    def stage(self) -> Tuple[int, Path]:
+        """
+        Reserva o número da próxima geração e cria seu diretório temporário.
+
+        Returns:
+            Tupla (número da geração, diretório temporário onde gravá-la)
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        generation = max([time.time_ns() // 1_000_000] + [g + 1 for g in self.generations()])
+        staging = self.root / f"{self.STAGING_PREFIX}{os.getpid()}-{generation}"
+        staging.mkdir()
+        return generation, staging
+
+    def publish(self, generation: int, staging: Path):
+        """Grava em disco, renomeia e torna vigente a geração gravada em `staging`"""
+        for path in staging.iterdir():
+            if path.is_file():
+                fsync_path(path)
+        fsync_path(staging)
+
+        target = self.path(generation)
+        os.rename(staging, target)
+        link = self.root / f"{self.CURRENT_LINK}.tmp-{os.getpid()}"
+        if os.path.lexists(link):
+            os.remove(link)
+        os.symlink(target.name, link)
+        os.replace(link, self.current_link)
+        fsync_path(self.root)
+
+    def discard(self, staging: Path):
+        """Descarta uma gravação interrompida"""
+        shutil.rmtree(staging, ignore_errors=True)
+
+    def unpublish(self):
+        """Remove o link `current`: leitores passam a não encontrar geração vigente"""
+        try:
+            os.remove(self.current_link)
+        except FileNotFoundError:
+            pass
+
+    def lease(self, generation: int) -> GenerationLease:
+        """
+        Trava compartilhada que impede a coleta da geração enquanto estiver em uso.
+
+        Raises:
+            FileNotFoundError: se a geração foi (ou está sendo) removida; o
+                leitor deve resolver `current` novamente
+        """
+        if fcntl is None:
+            return GenerationLease(generation)
+        lease_file = open(self.path(generation) / self.LEASE_FILE, "a+b")
+        try:
+            fcntl.flock(lease_file.fileno(), fcntl.LOCK_SH)
+            # A coleta pode ter renomeado o diretório enquanto aguardávamos a trava
+            if not (self.path(generation) / self.LEASE_FILE).exists():
+                raise FileNotFoundError(f"Geração {generation} removida")
+        except OSError:
+            lease_file.close()
+            raise
+        return GenerationLease(generation, lease_file)
+
+    def collect(self, keep: Iterable[int] = ()) -> List[int]:
+        """
+        Remove gerações antigas que nenhum processo mantém em uso.
+
+        Args:
+            keep: Gerações preservadas além da vigente
+
+        Returns:
+            Gerações removidas
+        """
+        keep = set(keep)
+        current = self.current()
+        if current is not None:
+            keep.add(current)
+
+        candidates = [generation for generation in self.generations() if generation not in keep]
+        if fcntl is None:
+            candidates = candidates[:max(len(candidates) - self.KEEP_WITHOUT_LEASES + 1, 0)]
+
+        removed = []
+        for generation in candidates:
+            if self._remove_if_unused(generation):
+                removed.append(generation)
+        if removed:
+            logger.info(f"Gerações removidas de {self.root}: {removed}")
+
+        self._remove_stale_staging()
+        return removed
+
+    def _remove_if_unused(self, generation: int) -> bool:
+        path = self.path(generation)
+        if fcntl is None:
+            shutil.rmtree(path, ignore_errors=True)
+            return True
+        try:
+            lease_file = open(path / self.LEASE_FILE, "a+b")
+        except FileNotFoundError:
+            shutil.rmtree(path, ignore_errors=True)
+            return True
+        with lease_file:
+            try:
+                fcntl.flock(lease_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                logger.debug(f"Geração {generation} em uso; remoção adiada")
+                return False
+            # Renomear antes de apagar: nenhum leitor consegue travá-la a partir daqui
+            trash = self.root / f"{self.STAGING_PREFIX}removed-{generation}"
+            os.rename(path, trash)
+        shutil.rmtree(trash, ignore_errors=True)
+        return True
+
+    def _remove_stale_staging(self):
+        now = time.time()
+        for path in self.root.glob(f"{self.STAGING_PREFIX}*"):
+            try:
+                if now - path.stat().st_mtime > self.STALE_STAGING_SECONDS:
+                    shutil.rmtree(path, ignore_errors=True)
+            except FileNotFoundError:
+                continue
+
+    def _parse(self, name: str) -> Optional[int]:
+        if not name.startswith(self.PREFIX) or not name[len(self.PREFIX):].isdigit():
+            return None
+        return int(name[len(self.PREFIX):])
@@ -1,44 +1,90 @@
 import pandas as pd
+import json
 import os
 import time
 import pickle
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from datetime import datetime
 from app.core.config import get_settings
+from app.core.metrics import timed
+from app.infrastructure.cache.generations import GenerationDirectory, GenerationLease
+from app.infrastructure.datasources.normalization import normalize_certificates, parse_registro, registro_keys, sort_by_registro
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Versão do conteúdo gravado; caches de outra versão são descartados
+# (2: DataValidade em ISO e Situacao canônica; 3: Parquet ordenado por
+# RegistroCA em row groups pequenos)
+SCHEMA_VERSION = 3
+
 class ParquetCacheManager:
     """
     Gerenciador de cache em formato otimizado para melhorar a performance
     de leitura e consulta dos dados de certificados CA.
     
-    Usa Parquet se pyarrow disponível, senão fallback para Pickle.
+    O formato é definido por CACHE_FORMAT: Parquet (padrão), Arrow IPC
+    mapeado em memória ou Pickle. Sem pyarrow, usa Pickle como fallback.
+    
+    O Parquet é gravado ordenado por RegistroCA, em row groups de
+    PARQUET_ROW_GROUP_SIZE linhas com estatísticas de mínimo/máximo: a busca
+    por CA filtra pelo dataset do pyarrow e lê apenas o row group que pode
+    conter a chave, em vez de decodificar o arquivo inteiro.
+    
+    Arquivo e metadados são gravados juntos em uma geração de
+    `cache_dir/persistent` (GenerationDirectory): a gravação ocorre em um
+    diretório temporário e a geração só passa a ser lida depois de gravada
+    em disco e publicada pela troca atômica do link `current`. Outros
+    workers nunca veem um arquivo parcial, ausente ou com metadados de outra
+    versão, e gerações antigas são removidas quando nenhum processo as usa.
     """
     
     def __init__(self):
         self.settings = get_settings()
         self.cache_dir = Path(self.settings.cache_dir)
         
-        # Verificar se pyarrow está disponível
-        try:
-            import pyarrow
-            self.use_parquet = True
-            self.cache_file_path = self.cache_dir / self.settings.parquet_file_name
+        # Formato configurado, com fallback para pickle se pyarrow não estiver disponível
+        self.cache_format = self._resolve_format(self.settings.cache_format)
+        self.use_parquet = self.cache_format == 'parquet'
+        
+        if self.cache_format == 'parquet':
+            self.cache_file_name = self.settings.parquet_file_name
             logger.info("Usando cache Parquet (pyarrow disponível)")
-        except ImportError:
-            logger.warning("PyArrow não disponível, usando cache pickle")
-            self.use_parquet = False
-            self.cache_file_path = self.cache_dir / f"{self.settings.parquet_file_name.replace('.parquet', '.pkl')}"
+        elif self.cache_format == 'arrow':
+            self.cache_file_name = self.settings.parquet_file_name.replace('.parquet', '.arrow')
+            logger.info("Usando cache Arrow IPC mapeado em memória (pyarrow disponível)")
+        else:
+            self.cache_file_name = self.settings.parquet_file_name.replace('.parquet', '.pkl')
         
-        self.metadata_file_path = self.cache_dir / f"{self.cache_file_path.name}.metadata"
-        self.compression = self.settings.parquet_compression if self.use_parquet else 'gzip'
+        self.generations = GenerationDirectory(self.cache_dir / "persistent")
+        # Geração mantida aberta por este processo (Arrow mapeado ou dataset
+        # do pyarrow para buscas pontuais) e a trava que impede sua remoção
+        self._lease: Optional[GenerationLease] = None
+        self._dataset = None
+        self._dataset_generation: Optional[int] = None
+        if self.cache_format == 'parquet':
+            self.compression = self.settings.parquet_compression
+        elif self.cache_format == 'arrow':
+            # Sem compressão: os buffers do arquivo são usados diretamente via mmap
+            self.compression = 'uncompressed'
+        else:
+            self.compression = 'gzip'
         
         # Criar diretório de cache se não existir
         self.cache_dir.mkdir(exist_ok=True)
     
+    @property
+    def cache_file_path(self) -> Path:
+        """Arquivo de dados da geração vigente (inexistente se nenhuma foi publicada)"""
+        return self._paths(self.generations.current())[0]
+    
+    @property
+    def metadata_file_path(self) -> Path:
+        """Metadados da geração vigente"""
+        return self._paths(self.generations.current())[1]
+    
+    @timed("save_to_cache")
     def save_to_cache(self, df: pd.DataFrame) -> bool:
         """
         Salva o DataFrame em formato otimizado (Parquet ou Pickle).
@@ -57,23 +103,30 @@ class ParquetCacheManager:
             # Otimizações antes de salvar
             df_optimized = self._optimize_dataframe(df)
             
-            if self.use_parquet:
-                # Salvar em parquet com compressão
-                df_optimized.to_parquet(
-                    self.cache_file_path,
-                    compression=self.compression,
-                    index=False,
-                    engine='pyarrow'
-                )
-            else:
-                # Salvar em pickle como fallback
-                with open(self.cache_file_path, 'wb') as f:
-                    pickle.dump(df_optimized, f, protocol=pickle.HIGHEST_PROTOCOL)
-            
-            # Salvar metadados
-            self._save_metadata(df_optimized)
+            # Dados e metadados gravados juntos em uma nova geração
+            generation, staging = self.generations.stage()
+            try:
+                data_path = staging / self.cache_file_name
+                if self.cache_format == 'parquet':
+                    self._save_parquet(df_optimized, data_path)
+                elif self.cache_format == 'arrow':
+                    self._save_arrow(df_optimized, data_path)
+                else:
+                    # Salvar em pickle como fallback
+                    with open(data_path, 'wb') as f:
+                        pickle.dump(df_optimized, f, protocol=pickle.HIGHEST_PROTOCOL)
+                
+                self._save_metadata(df_optimized, staging / f"{self.cache_file_name}.metadata")
+                self.generations.publish(generation, staging)
+            except Exception:
+                self.generations.discard(staging)
+                raise
+            if self._dataset is not None:
+                # O dataset de buscas pontuais é reaberto sobre a nova geração
+                self._hold(None)
+            self.generations.collect()
             
-            cache_type = "parquet" if self.use_parquet else "pickle"
+            cache_type = self.cache_format
             logger.info("Cache salvo", extra={"cache_type": cache_type, "cache_path": str(self.cache_file_path)})
             logger.info("Registros salvos", {"count": len(df_optimized), "size_mb": self._get_file_size_mb()})
                     
@@ -83,6 +136,7 @@ class ParquetCacheManager:
             logger.error("Erro ao salvar cache", extra={"error": str(e)})
             return False
     
+    @timed("load_from_cache")
     def load_from_cache(self) -> Optional[pd.DataFrame]:
         """
         Carrega dados do cache se existir e não estiver expirado.
@@ -91,17 +145,29 @@ class ParquetCacheManager:
             DataFrame ou None se não existe ou está expirado
         """
         try:
-            if not self.is_cache_valid():
+            generation = self.generations.current()
+            if generation is None or not self._is_generation_valid(generation):
                 return None
             
-            if self.use_parquet:
-                df = pd.read_parquet(self.cache_file_path, engine='pyarrow')
+            # Arquivo e metadados lidos da mesma geração, travada durante a leitura
+            lease = self.generations.lease(generation)
+            data_path = self._paths(generation)[0]
+            if self.cache_format == 'arrow':
+                df = self._load_arrow(data_path)
+                # As colunas continuam apoiadas no arquivo mapeado
+                self._hold(lease)
             else:
-                with open(self.cache_file_path, 'rb') as f:
-                    df = pickle.load(f)
+                try:
+                    if self.cache_format == 'parquet':
+                        df = pd.read_parquet(data_path, engine='pyarrow')
+                    else:
+                        with open(data_path, 'rb') as f:
+                            df = pickle.load(f)
+                finally:
+                    lease.release()
             
-            cache_type = "parquet" if self.use_parquet else "pickle"
-            logger.info("Cache carregado", extra={"cache_type": cache_type, "cache_path": str(self.cache_file_path)})
+            cache_type = self.cache_format
+            logger.info("Cache carregado", extra={"cache_type": cache_type, "cache_path": str(data_path)})
             return df
             
         except Exception as e:
@@ -115,32 +181,44 @@ class ParquetCacheManager:
         Returns:
             bool: True se válido, False caso contrário
         """
-        if not self.cache_file_path.exists():
+        generation = self.generations.current()
+        return generation is not None and self._is_generation_valid(generation)
+    
+    def _is_generation_valid(self, generation: int) -> bool:
+        data_path, metadata_path = self._paths(generation)
+        try:
+            file_time = os.path.getmtime(data_path)
+        except FileNotFoundError:
             return False
         
         # Verificar se não está expirado
-        file_time = os.path.getmtime(self.cache_file_path)
         current_time = time.time()
         
         if current_time - file_time > self.settings.cache_timeout:
             logger.info("Cache expirado")
             return False
         
+        if self._load_metadata(metadata_path).get("schema_version") != SCHEMA_VERSION:
+            logger.info("Cache gravado em versão anterior do esquema")
+            return False
+        
         return True
     
     def invalidate_cache(self) -> bool:
         """
         Remove o cache.
         
+        A geração vigente deixa de ser publicada (remoção atômica do link
+        `current`); os arquivos são apagados pela coleta quando nenhum
+        processo os estiver lendo.
+        
         Returns:
             bool: True se removeu com sucesso
         """
         try:
-            if self.cache_file_path.exists():
-                os.remove(self.cache_file_path)
-            
-            if self.metadata_file_path.exists():
-                os.remove(self.metadata_file_path)
+            self.generations.unpublish()
+            self._hold(None)
+            self.generations.collect()
             
             logger.info("Cache invalidado")
             return True
@@ -153,6 +231,10 @@ class ParquetCacheManager:
         """
         Busca certificados específicos no cache de forma otimizada.
         
+        No formato Parquet o filtro é aplicado pelo pyarrow sobre as
+        estatísticas dos row groups, então só o row group que pode conter o
+        CA é lido. Nos demais formatos o arquivo é carregado e filtrado.
+        
         Args:
             registro_ca: Número do registro CA para buscar
             
@@ -160,14 +242,20 @@ class ParquetCacheManager:
             DataFrame com os resultados ou None se não encontrar
         """
         try:
-            df = self.load_from_cache()
-            if df is None:
-                return None
-            # se a coluna é numérica:
-            valor = pd.to_numeric(registro_ca, errors='coerce')
-            if pd.isna(valor):
+            valor = parse_registro(registro_ca)
+            if valor is None:
                 return None
-            result = df.query("RegistroCA == @valor")
+            
+            if self.cache_format == 'parquet':
+                generation = self.generations.current()
+                if generation is None or not self._is_generation_valid(generation):
+                    return None
+                result = self._lookup_parquet(generation, valor)
+            else:
+                df = self.load_from_cache()
+                if df is None:
+                    return None
+                result = df[df['RegistroCA'] == valor]
             return result if not result.empty else None
         except Exception as e:
             logger.error("Erro ao buscar no cache | error=%s", str(e))
@@ -221,11 +309,12 @@ class ParquetCacheManager:
             file_time = datetime.fromtimestamp(os.path.getmtime(self.cache_file_path))
             
             # Carregar metadados se existirem
-            metadata = self._load_metadata()
+            metadata = self._load_metadata(self.metadata_file_path)
             
             return {
                 "cache_exists": True,
-                "cache_type": "parquet" if self.use_parquet else "pickle",
+                "cache_type": self.cache_format,
+                "generation": self.generations.current(),
                 "file_path": str(self.cache_file_path),
                 "file_size_mb": file_size_mb,
                 "last_updated": file_time.isoformat(),
@@ -240,6 +329,95 @@ class ParquetCacheManager:
             logger.error("Erro ao obter estatísticas do cache", extra={"error": str(e)})
             return {"cache_exists": False, "error": str(e)}
     
+    def _resolve_format(self, cache_format: str) -> str:
+        """Valida o formato configurado (parquet, arrow ou pickle)"""
+        cache_format = (cache_format or 'parquet').lower()
+        if cache_format not in ('parquet', 'arrow', 'pickle'):
+            logger.warning(f"Formato de cache desconhecido '{cache_format}', usando parquet")
+            cache_format = 'parquet'
+        
+        if cache_format in ('parquet', 'arrow'):
+            try:
+                import pyarrow
+            except ImportError:
+                logger.warning("PyArrow não disponível, usando cache pickle")
+                return 'pickle'
+        return cache_format
+    
+    def _paths(self, generation: Optional[int]) -> Tuple[Path, Path]:
+        """Arquivo de dados e de metadados de uma geração"""
+        directory = self.generations.path(generation) if generation is not None else self.generations.current_link
+        return directory / self.cache_file_name, directory / f"{self.cache_file_name}.metadata"
+    
+    def _hold(self, lease: Optional[GenerationLease]):
+        """Passa a manter aberta a geração de `lease`, liberando a anterior"""
+        previous, self._lease = self._lease, lease
+        if previous is not None and previous is not lease:
+            previous.release()
+        if lease is None:
+            self._dataset = None
+            self._dataset_generation = None
+    
+    def _save_parquet(self, df: pd.DataFrame, path: Path):
+        """
+        Grava o Parquet ordenado por RegistroCA, em row groups pequenos com estatísticas.
+        
+        Como as chaves estão ordenadas, as faixas (mínimo/máximo) dos row
+        groups não se sobrepõem e uma busca por CA descarta todos menos um.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        table = pa.Table.from_pandas(sort_by_registro(df), preserve_index=False)
+        pq.write_table(
+            table,
+            str(path),
+            compression=self.compression,
+            row_group_size=self.settings.parquet_row_group_size,
+            write_statistics=True
+        )
+    
+    def _lookup_parquet(self, generation: int, valor) -> pd.DataFrame:
+        """Linhas do Parquet com o RegistroCA informado (filtro aplicado pelo pyarrow)"""
+        import pyarrow.dataset as ds
+        
+        # O rodapé do arquivo (esquema e estatísticas) é lido uma vez por geração
+        if self._dataset is None or self._dataset_generation != generation:
+            lease = self.generations.lease(generation)
+            self._hold(lease)
+            self._dataset = ds.dataset(str(self._paths(generation)[0]), format='parquet')
+            self._dataset_generation = generation
+        return self._dataset.to_table(filter=ds.field('RegistroCA') == valor).to_pandas()
+    
+    def _save_arrow(self, df: pd.DataFrame, path: Path):
+        """Grava o DataFrame como arquivo Arrow IPC sem compressão"""
+        import pyarrow as pa
+        
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(str(path), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    
+    def _load_arrow(self, path: Path) -> pd.DataFrame:
+        """
+        Abre o arquivo Arrow IPC mapeado em memória.
+        
+        As colunas de texto continuam apoiadas nos buffers do arquivo
+        (pd.ArrowDtype), então só as páginas efetivamente lidas são carregadas.
+        """
+        import pyarrow as pa
+        
+        # O mapeamento permanece aberto enquanto houver buffers referenciando-o
+        source = pa.memory_map(str(path), 'r')
+        table = pa.ipc.open_file(source).read_all()
+        
+        def types_mapper(arrow_type):
+            if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+                return pd.ArrowDtype(arrow_type)
+            return None
+        
+        return table.to_pandas(types_mapper=types_mapper)
+    
     def _optimize_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Otimiza o DataFrame para melhor performance e compressão.
@@ -256,47 +434,41 @@ class ParquetCacheManager:
             if col in df_opt.columns:
                 df_opt[col] = df_opt[col].astype('category')
         
-        # Converter RegistroCA para int se possível (mais eficiente)
+        # RegistroCA como inteiro (mais eficiente); inválidos ficam nulos
         if 'RegistroCA' in df_opt.columns:
-            try:
-                df_opt['RegistroCA'] = pd.to_numeric(df_opt['RegistroCA'], errors='coerce')
-            except:
-                pass
+            keys, valid = registro_keys(df_opt['RegistroCA'])
+            df_opt['RegistroCA'] = keys if valid.all() else pd.arrays.IntegerArray(keys, ~valid)
         
-        # Converter datas se existirem
-        if 'DataValidade' in df_opt.columns:
-            try:
-                df_opt['DataValidade'] = pd.to_datetime(df_opt['DataValidade'], errors='coerce')
-            except:
-                pass
+        # Datas em ISO e situação canônica (idempotente para dados já normalizados)
+        normalize_certificates(df_opt)
         
         return df_opt
     
-    def _save_metadata(self, df: pd.DataFrame):
-        """Salva metadados do cache"""
-        try:
-            metadata = {
-                "total_records": len(df),
-                "columns": df.columns.tolist(),
-                "dtypes": df.dtypes.astype(str).to_dict(),
-                "created_at": datetime.now().isoformat(),
-                "compression": self.compression,
-                "cache_type": "parquet" if self.use_parquet else "pickle"
-            }
-            
-            import json
-            with open(self.metadata_file_path, 'w') as f:
-                json.dump(metadata, f, indent=2)
-                
-        except Exception as e:
-            logger.warning("Erro ao salvar metadados", extra={"error": str(e)})
+    def _save_metadata(self, df: pd.DataFrame, path: Path):
+        """
+        Salva metadados do cache.
+        
+        Os metadados fazem parte da geração: uma falha aqui interrompe a
+        gravação em vez de publicar dados sem metadados.
+        """
+        metadata = {
+            "schema_version": SCHEMA_VERSION,
+            "total_records": len(df),
+            "columns": df.columns.tolist(),
+            "dtypes": df.dtypes.astype(str).to_dict(),
+            "created_at": datetime.now().isoformat(),
+            "compression": self.compression,
+            "cache_type": self.cache_format
+        }
+        
+        with open(path, 'w') as f:
+            json.dump(metadata, f, indent=2)
 
-    def _load_metadata(self) -> dict:
+    def _load_metadata(self, path: Path) -> dict:
         """Carrega metadados do cache"""
         try:
-            if self.metadata_file_path.exists():
-                import json
-                with open(self.metadata_file_path, 'r') as f:
+            if path.exists():
+                with open(path, 'r') as f:
                     return json.load(f)
         except Exception as e:
             logger.warning("Erro ao carregar metadados", extra={"error": str(e)})
@@ -0,0 +1,114 @@
+import logging
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Cache LRU de respostas já serializadas (bytes JSON), por chave e versão da base.
+
+    Todas as entradas pertencem a uma única versão do dataset. Ao receber uma
+    versão diferente (base atualizada neste ou em outro worker), apenas as
+    chaves alteradas são descartadas quando `changed_keys` conhece as
+    alterações entre as duas versões; caso contrário o cache é esvaziado por
+    inteiro. Assim uma resposta nunca sobrevive à alteração do seu certificado.
+    O tamanho é limitado por `max_size` entradas; as menos usadas saem primeiro.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        changed_keys: Optional[Callable[[str, str], Optional[Iterable[str]]]] = None
+    ):
+        self.max_size = max_size
+        self.changed_keys = changed_keys
+        self.version: Optional[str] = None
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, version: str, key: str) -> Optional[bytes]:
+        self._check_version(version)
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, version: str, key: str, body: bytes):
+        """
+        Armazena uma resposta da versão informada.
+
+        Só `get` avança a versão do cache: uma resposta de outra versão (ex:
+        calculada antes de uma troca de versão que terminou durante a
+        consulta) é descartada, em vez de esvaziar o cache já atualizado.
+        """
+        if not self.enabled:
+            return
+        if version != self.version:
+            if self.version is not None:
+                return
+            self._check_version(version)
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def put_many(self, version: str, items: Iterable[Tuple[str, bytes]]) -> int:
+        """Carrega várias respostas de uma vez (aquecimento após a carga da base)"""
+        count = 0
+        for key, body in items:
+            self.put(version, key, body)
+            count += 1
+        return count
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(body) for body in self._entries.values())
+
+    def stats(self) -> dict:
+        """Tamanho, ocupação e taxa de acerto do cache (para monitoramento)"""
+        return {
+            "enabled": self.enabled,
+            "version": self.version,
+            "max_size": self.max_size,
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+        }
+
+    def _check_version(self, version: str):
+        if version == self.version:
+            return
+        keys = None
+        if self._entries and self.changed_keys is not None and self.version is not None:
+            keys = self.changed_keys(self.version, version)
+        if keys is not None:
+            evicted = sum(1 for key in keys if self._entries.pop(key, None) is not None)
+            logger.info(f"Cache de respostas atualizado: versão {self.version} -> {version}, {evicted} respostas descartadas")
+        else:
+            if self._entries:
+                logger.info(f"Cache de respostas invalidado: versão {self.version} -> {version}")
+            self._entries.clear()
+        self.version = version
@@ -0,0 +1,522 @@
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.infrastructure.cache.change_log import ChangeLog
+from app.infrastructure.cache.generations import GenerationDirectory, GenerationLease
+
+logger = logging.getLogger(__name__)
+
+# Versão do layout em disco; gerações com outra versão são ignoradas
+FORMAT_VERSION = 8
+
+
+def load_array(path: Path, mmap: bool = True) -> np.ndarray:
+    """
+    Carrega um array .npy, mapeado em memória quando possível.
+
+    Arquivos mapeados são compartilhados pelo cache de páginas do sistema
+    operacional: todos os processos que abrem a mesma geração usam as mesmas
+    páginas físicas.
+    """
+    if not mmap:
+        return np.load(path, allow_pickle=False)
+    try:
+        return np.load(path, mmap_mode='r', allow_pickle=False)
+    except ValueError:
+        # Arrays vazios não podem ser mapeados
+        return np.load(path, allow_pickle=False)
+
+
+def prefault(array: np.ndarray):
+    """Lê uma posição por página de um array mapeado, trazendo-o para o cache de páginas"""
+    if isinstance(array, np.memmap) and array.size:
+        step = max(1, 4096 // array.itemsize)
+        array.reshape(-1)[::step].sum()
+
+
+def to_text(values: Iterable) -> List[str]:
+    """Converte valores de uma coluna para texto (nulos viram string vazia)"""
+    text = []
+    for value in values:
+        if value is None or value is pd.NA or value is pd.NaT or (isinstance(value, float) and np.isnan(value)):
+            text.append('')
+        elif isinstance(value, float) and value.is_integer():
+            text.append(str(int(value)))
+        elif isinstance(value, pd.Timestamp):
+            text.append(value.strftime('%Y-%m-%d'))
+        else:
+            text.append(str(value).strip())
+    return text
+
+
+class StringColumn:
+    """
+    Coluna de texto em layout colunar: bytes UTF-8 concatenados e offsets.
+
+    Ao contrário de um array `object` do pandas, os dois arrays podem ser
+    gravados em disco e mapeados em memória, de modo que vários processos
+    compartilham a mesma cópia. Os valores só são decodificados quando lidos.
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_values(cls, values: Iterable) -> "StringColumn":
+        encoded = [value.encode('utf-8') for value in to_text(values)]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(data, offsets)
+
+    @classmethod
+    def from_base(cls, base: "StringColumn", reuse: np.ndarray, values: Iterable) -> "StringColumn":
+        """
+        Monta uma coluna reaproveitando os valores já codificados de `base`.
+
+        Args:
+            base: Coluna da geração anterior
+            reuse: Para cada posição da nova coluna, a posição de `base` com o
+                mesmo valor, ou -1 para valores novos
+            values: Valores das posições com `reuse` -1, na ordem
+
+        Trechos de posições consecutivas de `base` são copiados de uma vez,
+        então o custo em Python acompanha a quantidade de valores novos e de
+        trechos, não o tamanho da coluna.
+        """
+        reuse = np.asarray(reuse, dtype=np.int64)
+        kept = reuse >= 0
+        fresh = np.flatnonzero(~kept)
+        encoded = [value.encode('utf-8') for value in to_text(values)]
+        if len(encoded) != len(fresh):
+            raise ValueError("Quantidade de valores novos não corresponde às posições sem reaproveitamento")
+
+        lengths = np.zeros(len(reuse), dtype=np.int64)
+        lengths[kept] = base.offsets[reuse[kept] + 1] - base.offsets[reuse[kept]]
+        lengths[fresh] = [len(value) for value in encoded]
+        offsets = np.zeros(len(reuse) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        data = np.empty(int(offsets[-1]), dtype=np.uint8)
+
+        # Trechos [início, fim] de posições consecutivas reaproveitadas
+        follows = np.zeros(len(reuse), dtype=bool)
+        follows[1:] = kept[1:] & kept[:-1] & (reuse[1:] == reuse[:-1] + 1)
+        run_starts = np.flatnonzero(kept & ~follows)
+        run_ends = np.flatnonzero(kept & ~np.append(follows[1:], False))
+        base_offsets = base.offsets
+        for start, end in zip(run_starts.tolist(), run_ends.tolist()):
+            source_start = int(base_offsets[reuse[start]])
+            source_end = int(base_offsets[reuse[end] + 1])
+            data[offsets[start]:offsets[end + 1]] = base.data[source_start:source_end]
+        for position, value in zip(fresh.tolist(), encoded):
+            data[offsets[position]:offsets[position + 1]] = np.frombuffer(value, dtype=np.uint8)
+        return cls(data, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position: int) -> str:
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return bytes(self.data[start:end]).decode('utf-8')
+
+    def take(self, positions: Iterable[int]) -> np.ndarray:
+        """Decodifica apenas as posições informadas"""
+        positions = np.asarray(positions, dtype=np.int64)
+        starts = self.offsets[positions].tolist()
+        ends = self.offsets[positions + 1].tolist()
+        # Fatiar um memoryview evita criar um array numpy por valor
+        data = memoryview(self.data)
+        values = np.empty(len(starts), dtype=object)
+        values[:] = [str(data[start:end], 'utf-8') for start, end in zip(starts, ends)]
+        return values
+
+    def to_numpy(self) -> np.ndarray:
+        return self.take(np.arange(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes + self.offsets.nbytes)
+
+    def save(self, directory: Path, name: str):
+        np.save(directory / f"{name}.data.npy", self.data)
+        np.save(directory / f"{name}.offsets.npy", self.offsets)
+
+    @classmethod
+    def load(cls, directory: Path, name: str, mmap: bool = True) -> "StringColumn":
+        return cls(
+            load_array(directory / f"{name}.data.npy", mmap),
+            load_array(directory / f"{name}.offsets.npy", mmap)
+        )
+
+
+class ColumnarDataset:
+    """
+    Tabela de certificados em colunas de texto (StringColumn).
+
+    É a representação servida pela API: imutável, mapeável em memória e
+    independente do pandas. Quando aberta de forma preguiçosa (`lazy=True`),
+    cada coluna só é mapeada no primeiro acesso e cada valor só é decodificado
+    quando lido, então colunas descritivas largas não ocupam memória residente
+    enquanto nenhuma consulta de detalhes as usar. `to_dataframe` materializa
+    um DataFrame sob demanda, para usos eventuais.
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, StringColumn],
+        column_names: Optional[List[str]] = None,
+        directory: Optional[Path] = None,
+        length: Optional[int] = None,
+        mmap: bool = True,
+    ):
+        self._columns = dict(columns)
+        self._names = list(column_names) if column_names is not None else list(columns)
+        self._directory = directory
+        self._length = length
+        self._mmap = mmap
+
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: pd.DataFrame,
+        base: Optional["ColumnarDataset"] = None,
+        reuse: Optional[np.ndarray] = None,
+    ) -> "ColumnarDataset":
+        """
+        Converte o DataFrame para colunas de texto.
+
+        Com `base` e `reuse` (linha de `base` com o mesmo conteúdo de cada
+        linha do DataFrame, ou -1), apenas as linhas novas ou alteradas são
+        convertidas; as demais são copiadas da geração anterior.
+        """
+        if base is None or reuse is None:
+            return cls({col: StringColumn.from_values(df[col].to_numpy(dtype=object)) for col in df.columns})
+
+        fresh = np.flatnonzero(np.asarray(reuse) < 0)
+        return cls({
+            col: StringColumn.from_base(base.column(col), reuse, df[col].to_numpy(dtype=object)[fresh])
+            for col in df.columns
+        })
+
+    def __len__(self) -> int:
+        if self._length is not None:
+            return self._length
+        if not self._names:
+            return 0
+        return len(self.column(self._names[0]))
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._names)
+
+    @property
+    def columns(self) -> Dict[str, StringColumn]:
+        return {name: self.column(name) for name in self._names}
+
+    @property
+    def loaded_columns(self) -> List[str]:
+        """Colunas já mapeadas/carregadas neste processo"""
+        return [name for name in self._names if name in self._columns]
+
+    def column(self, name: str) -> StringColumn:
+        column = self._columns.get(name)
+        if column is None:
+            if name not in self._names or self._directory is None:
+                raise KeyError(name)
+            column = StringColumn.load(self._directory, self._file_name(name), self._mmap)
+            self._columns[name] = column
+        return column
+
+    def row(self, position: int) -> Dict[str, str]:
+        """Decodifica uma única linha"""
+        return {name: self.column(name)[position] for name in self._names}
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame({name: column.to_numpy() for name, column in self.columns.items()})
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+    def column_nbytes(self) -> Dict[str, int]:
+        """
+        Bytes de cada coluna (dados + offsets).
+
+        Colunas ainda não mapeadas são medidas pelo tamanho dos arquivos, sem
+        mapeá-las: consultar o tamanho não traz colunas frias para a memória.
+        """
+        sizes = {}
+        for name in self._names:
+            column = self._columns.get(name)
+            if column is not None or self._directory is None:
+                sizes[name] = self.column(name).nbytes
+                continue
+            file_name = self._file_name(name)
+            sizes[name] = sum(
+                (self._directory / f"{file_name}.{part}.npy").stat().st_size for part in ("data", "offsets")
+            )
+        return sizes
+
+    def content_hash(self) -> str:
+        """Hash do conteúdo (nomes e bytes das colunas): identifica a versão dos dados"""
+        digest = hashlib.blake2b(digest_size=8)
+        for name, column in self.columns.items():
+            digest.update(name.encode("utf-8"))
+            digest.update(memoryview(column.offsets))
+            digest.update(memoryview(column.data))
+        return digest.hexdigest()
+
+    def save(self, directory: Path):
+        for name, column in self.columns.items():
+            column.save(directory, self._file_name(name))
+
+    @classmethod
+    def load(
+        cls,
+        directory: Path,
+        column_names: List[str],
+        length: Optional[int] = None,
+        lazy: bool = True,
+        mmap: bool = True,
+    ) -> "ColumnarDataset":
+        dataset = cls({}, column_names, directory, length, mmap)
+        if not lazy:
+            for name in column_names:
+                dataset.column(name)
+        return dataset
+
+    def _file_name(self, name: str) -> str:
+        return f"col{self._names.index(name):02d}"
+
+
+@dataclass
+class DatasetGeneration:
+    """
+    Componentes de uma geração aberta: tabela, índices, manifesto e alterações.
+
+    `lease` impede a remoção da geração enquanto ela estiver em uso.
+    """
+
+    table: ColumnarDataset
+    index: Any
+    filters: Any
+    text: Any
+    manifest: Dict[str, Any]
+    hashes: np.ndarray
+    changes: Any = None
+    lease: Optional[GenerationLease] = None
+
+
+class SharedDatasetStore:
+    """
+    Gerações do dataset gravadas em `cache_dir/shared` para compartilhamento
+    entre processos (ex: workers do Gunicorn).
+
+    Cada geração é um diretório imutável com as colunas e o índice em arquivos
+    .npy, publicado pelo GenerationDirectory (gravação em disco e troca
+    atômica do link `current`): um worker publica e os demais apenas mapeiam
+    os arquivos, sem reprocessar o CAEPI. Cada geração aberta mantém uma
+    trava compartilhada, e gerações antigas só são removidas quando nenhum
+    processo as mantém abertas.
+
+    Cada geração guarda também o hash do conteúdo de cada linha. Ao publicar
+    sobre uma geração anterior, as linhas são comparadas por RegistroCA e
+    hash: as alterações são gravadas junto da nova geração e, se forem
+    poucas, colunas e índices das linhas inalteradas são copiados da geração
+    anterior em vez de reconstruídos. O resumo das alterações de cada versão
+    (RegistroCA incluídos, removidos e transições de situação/validade) é
+    acrescentado ao ChangeLog, que não é afetado pela remoção de gerações.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+    HASHES_FILE = "table.hashes.npy"
+    # Acima desta fração de linhas alteradas a geração é reconstruída por inteiro
+    MAX_INCREMENTAL_CHURN = 0.25
+
+    def __init__(self, cache_dir: str):
+        self.root = Path(cache_dir) / "shared"
+        self.generations = GenerationDirectory(self.root)
+        self.change_log = ChangeLog(cache_dir)
+
+    def current_generation(self) -> Optional[int]:
+        """Lê o número da geração vigente, ou None se nenhuma foi publicada"""
+        return self.generations.current()
+
+    def generation_path(self, generation: int) -> Path:
+        return self.generations.path(generation)
+
+    def collect(self):
+        """Remove as gerações antigas que nenhum processo mantém abertas"""
+        self.generations.collect()
+
+    def component_sizes(self, generation: int) -> Dict[str, int]:
+        """
+        Bytes em disco dos índices de uma geração, por componente.
+
+        Returns:
+            Dicionário com `index` (CertificateIndex e filtro de chaves),
+            `filter` (CertificateFilterIndex), `text` (CertificateTextIndex)
+            e `hashes` (hash por linha usado na comparação entre gerações)
+        """
+        sizes = {"index": 0, "filter": 0, "text": 0, "hashes": 0}
+        for path in self.generation_path(generation).glob("*.npy"):
+            component = "hashes" if path.name == self.HASHES_FILE else path.name.split(".", 1)[0]
+            if component in sizes:
+                sizes[component] += path.stat().st_size
+        return sizes
+
+    def publish(self, df: pd.DataFrame) -> int:
+        """
+        Grava o DataFrame como uma nova geração e a torna vigente.
+
+        Havendo uma geração vigente compatível, a nova registra as alterações
+        em relação a ela e reaproveita o que não mudou.
+
+        Returns:
+            int: Número da geração publicada (a vigente, se o conteúdo não mudou)
+        """
+        # Imports locais: os índices dependem deste módulo para persistir suas colunas
+        from app.infrastructure.cache.dataset_changeset import DatasetChangeset, document_map, row_hashes
+        from app.infrastructure.indexes.certificate_index import CertificateIndex
+        from app.infrastructure.indexes.filter_index import CertificateFilterIndex
+        from app.infrastructure.indexes.text_index import CertificateTextIndex
+
+        hashes = row_hashes(df)
+        base_generation = self.current_generation()
+        base = self._open_base(base_generation, list(df.columns))
+        if base is not None and np.array_equal(base.hashes, hashes):
+            logger.info(f"Conteúdo igual ao da geração {base_generation}; nada a publicar")
+            return base_generation
+
+        generation, tmp_path = self.generations.stage()
+        try:
+            index = CertificateIndex.from_dataframe(df)
+            changes = None
+            if base is not None:
+                changes = DatasetChangeset.compute(
+                    base_generation, base.manifest["version"],
+                    base.index.keys, base.hashes[base.index.rows],
+                    index.keys, hashes[index.rows],
+                )
+                logger.info(
+                    f"Alterações em relação à geração {base_generation}: {changes.summary()} "
+                    f"({changes.churn:.1%} das chaves)"
+                )
+
+            if changes is not None and changes.churn <= self.MAX_INCREMENTAL_CHURN:
+                doc_map = document_map(changes.reuse, len(base.index))
+                # Linha da tabela anterior com o mesmo conteúdo de cada linha do DataFrame
+                table_reuse = np.full(len(df), -1, dtype=np.int64)
+                kept = changes.reuse >= 0
+                table_reuse[index.rows[kept]] = base.index.rows[changes.reuse[kept]]
+                table = ColumnarDataset.from_dataframe(df, base.table, table_reuse)
+                filters = CertificateFilterIndex.from_dataframe(df, index.rows, base.filters, doc_map)
+                text = CertificateTextIndex.from_dataframe(df, index.rows, base.text, doc_map)
+            else:
+                table = ColumnarDataset.from_dataframe(df)
+                filters = CertificateFilterIndex.from_dataframe(df, index.rows)
+                text = CertificateTextIndex.from_dataframe(df, index.rows)
+
+            table.save(tmp_path)
+            np.save(tmp_path / self.HASHES_FILE, hashes)
+            index.save(tmp_path)
+            filters.save(tmp_path)
+            text.save(tmp_path)
+
+            manifest = {
+                "format_version": FORMAT_VERSION,
+                "generation": generation,
+                "version": table.content_hash(),
+                "created_at": time.time(),
+                "records_count": len(table),
+                "index_size": len(index),
+                "columns": table.column_names,
+            }
+            if changes is not None:
+                changes.save(tmp_path)
+                manifest["changes"] = changes.summary()
+            with open(tmp_path / self.MANIFEST_FILE, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+
+            self.generations.publish(generation, tmp_path)
+        except Exception:
+            self.generations.discard(tmp_path)
+            raise
+
+        logger.info(f"Geração {generation} publicada em {self.root} ({len(table)} registros)")
+        if changes is not None:
+            try:
+                self.change_log.append(ChangeLog.entry(changes, base.index, index, manifest["version"], generation))
+            except Exception as e:
+                logger.warning(f"Não foi possível registrar as alterações da geração {generation}: {e}")
+        self.collect()
+        return generation
+
+    def open(self, generation: int, storage_mode: str = "tiered") -> DatasetGeneration:
+        """
+        Mapeia em memória os arquivos de uma geração.
+
+        No modo "tiered" o índice (RegistroCA, DataValidade, Situacao) é
+        mapeado e pré-carregado, pois atende todas as consultas, e as demais
+        colunas só são mapeadas quando lidas. No modo "memory" todas as
+        colunas são lidas para a memória do processo na abertura.
+
+        Returns:
+            DatasetGeneration: Tabela, índices e manifesto da geração
+        """
+        from app.infrastructure.cache.dataset_changeset import DatasetChangeset
+        from app.infrastructure.indexes.certificate_index import CertificateIndex
+        from app.infrastructure.indexes.filter_index import CertificateFilterIndex
+        from app.infrastructure.indexes.text_index import CertificateTextIndex
+
+        path = self.generation_path(generation)
+        # Travada antes de qualquer leitura: colunas mapeadas sob demanda
+        # continuam disponíveis enquanto a geração estiver em uso
+        lease = self.generations.lease(generation)
+        try:
+            with open(path / self.MANIFEST_FILE, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("format_version") != FORMAT_VERSION:
+                raise ValueError(f"Geração {generation} em formato incompatível")
+
+            if storage_mode == "memory":
+                table = ColumnarDataset.load(path, manifest["columns"], manifest["records_count"], lazy=False, mmap=False)
+            else:
+                table = ColumnarDataset.load(path, manifest["columns"], manifest["records_count"])
+            index = CertificateIndex.load(path)
+            index.prefault()
+            filters = CertificateFilterIndex.load(path, len(index))
+            text = CertificateTextIndex.load(path)
+            changes = DatasetChangeset.load(path, manifest["changes"]) if "changes" in manifest else None
+            hashes = load_array(path / self.HASHES_FILE)
+        except Exception:
+            lease.release()
+            raise
+        return DatasetGeneration(
+            table=table, index=index, filters=filters, text=text, manifest=manifest,
+            hashes=hashes, changes=changes, lease=lease
+        )
+
+    def _open_base(self, generation: Optional[int], columns: List[str]) -> Optional[DatasetGeneration]:
+        """Abre a geração anterior para comparação, se existir e tiver as mesmas colunas"""
+        if generation is None:
+            return None
+        try:
+            base = self.open(generation)
+        except Exception as e:
+            logger.warning(f"Geração {generation} indisponível para atualização incremental: {e}")
+            return None
+        if base.table.column_names != columns:
+            logger.info("Colunas diferentes da geração anterior; reconstruindo a geração por inteiro")
+            return None
+        return base
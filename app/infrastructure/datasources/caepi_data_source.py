@@ -1,16 +1,65 @@
 import logging
 from app.infrastructure.datasources.data_source_interface import DataSourceInterface
 from app.infrastructure.cache.parquet_cache import ParquetCacheManager
+from app.infrastructure.datasources.caepi_parser import CAEPIParser
+from app.infrastructure.datasources.normalization import normalize_certificates, parse_registro, registro_keys, sort_by_registro
+from app.infrastructure.datasources.refresh_coordinator import SingleFlight
+import numpy as np
 import pandas as pd
 import os
+from contextlib import contextmanager
 from ftplib import FTP
 import io
+import json
+import tempfile
 import zipfile
 import time
+from pathlib import Path
+from typing import Iterator, Optional, TextIO
 from app.core.config import get_settings
+from app.core.executors import run_cpu, run_io
+from app.core.metrics import timed
     
 logger = logging.getLogger(__name__)
 
+
+@contextmanager
+def open_caepi_source(zip_file_path: Path, file_name: str) -> Iterator[TextIO]:
+    """
+    Abre o arquivo de certificados como stream de texto.
+    
+    Prioriza o ZIP baixado (lendo o membro descompactado em streaming) e
+    usa o arquivo texto extraído apenas como fallback.
+    """
+    if zip_file_path.exists():
+        with zipfile.ZipFile(zip_file_path) as zip_file:
+            names = zip_file.namelist()
+            member = file_name if file_name in names else next(
+                (name for name in names if name.lower().endswith('.txt')), None
+            )
+            if member is None:
+                raise FileNotFoundError(f"Arquivo {file_name} não encontrado em {zip_file_path}")
+            with zip_file.open(member) as raw, io.TextIOWrapper(raw, encoding="UTF-8") as stream:
+                yield stream
+    else:
+        with open(file_name, "r", encoding="UTF-8") as stream:
+            yield stream
+
+
+def load_caepi_dataframe(zip_file_path: Path, file_name: str, columns_name: list, chunk_size: int) -> pd.DataFrame:
+    """
+    Lê e otimiza o arquivo de certificados.
+    
+    Função de módulo (serializável) para poder rodar no pool de processos.
+    """
+    parser = CAEPIParser(columns_name, chunk_size=chunk_size)
+    with open_caepi_source(zip_file_path, file_name) as stream:
+        df = parser.parse(stream)
+    logger.info(f"DataFrame criado com {len(df)} registros")
+    
+    # Limpeza e otimização dos dados
+    return CAEPIDataSource._optimize_dataframe(df)
+
 class CAEPIDataSource(DataSourceInterface):
 
     def __init__(self):
@@ -26,37 +75,50 @@ class CAEPIDataSource(DataSourceInterface):
             "ObservacaoAnaliseLaudo", "CNPJLaboratorio", "RazaoSocialLaboratorio",
             "NRLaudo", "Norma"
         ]
+        self.zip_file_path = Path(self.settings.cache_dir) / self.settings.ftp_file_name
+        self.remote_stamp_path = self.zip_file_path.with_name(f"{self.zip_file_path.name}.remote.json")
+        self.ingest_chunk_size = self.settings.ingest_chunk_size_mb * 1024 * 1024
         self._cache_timeout = self.settings.cache_timeout
         self._last_update = 0
+        self._flights = SingleFlight()
+        self._unknown_stamp_warned = False
         
         # Inicializar gerenciador de cache
         self.cache_manager = ParquetCacheManager() if self.settings.enable_parquet_cache else None
         logger.info(f"Cache {'habilitado' if self.cache_manager else 'desabilitado'}")
     
+    @timed("get_data")
     async def get_data(self) -> pd.DataFrame:
         """
         Obtém os dados com cache inteligente para melhor performance.
         
         Prioridade:
-        1. Cache em memória (se válido)
+        1. Cache em memória (se carregado)
         2. Cache persistente (Parquet/Pickle)
         3. Recarregar do arquivo/FTP
         
+        Chamadas concorrentes no mesmo processo compartilham uma única carga.
+        
         Returns:
             pd.DataFrame: Dados dos certificados CA
         """
-        current_time = time.time()
-        
-        # 1. Verificar cache em memória primeiro
-        if (self.base_dados_df is not None and 
-            current_time - self._last_update <= self._cache_timeout):
+        # 1. Verificar cache em memória primeiro. Os dados em memória não expiram
+        # por tempo: a atualização é feita em segundo plano pelo CertificateRefresher,
+        # para que nenhuma requisição pague pela recarga.
+        if self.base_dados_df is not None:
             logger.debug("Retornando dados do cache em memória")
             return self.base_dados_df
         
+        return await self._flights.run("get_data", self._load_into_memory)
+
+    async def _load_into_memory(self) -> pd.DataFrame:
+        """Carrega os dados do cache persistente ou do arquivo (passos 2 a 4 de get_data)"""
+        current_time = time.time()
+        
         # 2. Tentar carregar do cache persistente (muito mais rápido que reprocessar)
         if self.cache_manager and self.cache_manager.is_cache_valid():
             logger.info("Carregando dados do cache persistente")
-            cached_df = self.cache_manager.load_from_cache()
+            cached_df = await run_io(self.cache_manager.load_from_cache)
             if cached_df is not None:
                 self.base_dados_df = cached_df
                 self._last_update = current_time
@@ -70,7 +132,7 @@ class CAEPIDataSource(DataSourceInterface):
         # 4. Salvar no cache persistente para próximas consultas
         if self.cache_manager and self.base_dados_df is not None:
             logger.info("Salvando dados no cache persistente")
-            success = self.cache_manager.save_to_cache(self.base_dados_df)
+            success = await run_io(self.cache_manager.save_to_cache, self.base_dados_df)
             if success:
                 logger.info("Dados salvos no cache com sucesso")
             else:
@@ -80,7 +142,12 @@ class CAEPIDataSource(DataSourceInterface):
 
     async def update_data(self) -> bool:
         """
-        Atualiza os dados baixando novamente do FTP e invalidando todos os caches.
+        Atualiza os dados baixando novamente do FTP.
+        
+        O cache persistente anterior não é descartado antes da atualização:
+        ele continua válido até ser sobrescrito pelos novos dados, e a
+        comparação com a versão anterior é feita na publicação da geração
+        (SharedDatasetStore), que só reprocessa as linhas alteradas.
         
         Returns:
             bool: True se atualizou com sucesso, False caso contrário
@@ -88,22 +155,16 @@ class CAEPIDataSource(DataSourceInterface):
         try:
             logger.info("Iniciando atualização de dados...")
             
-            # 1. Invalidar cache persistente
-            if self.cache_manager:
-                self.cache_manager.invalidate_cache()
-                logger.info("Cache persistente invalidado")
-            
-            # 2. Invalidar cache em memória
-            self.base_dados_df = None
-            self._last_update = 0
-            
-            # 3. Baixar e processar novos dados
+            # 1. Baixar e processar novos dados
+            # O DataFrame em memória só é substituído quando o novo estiver pronto,
+            # então consultas concorrentes continuam usando a versão anterior.
             await self._download_file()
             await self._to_dataframe()
+            self._last_update = time.time()
             
-            # 4. Salvar no cache persistente
+            # 2. Salvar no cache persistente (sobrescreve o anterior)
             if self.cache_manager and self.base_dados_df is not None:
-                success = self.cache_manager.save_to_cache(self.base_dados_df)
+                success = await run_io(self.cache_manager.save_to_cache, self.base_dados_df)
                 if success:
                     logger.info("Novos dados salvos no cache")
                 else:
@@ -116,206 +177,243 @@ class CAEPIDataSource(DataSourceInterface):
             logger.error(f"Erro ao atualizar dados: {e}")
             return False
 
+    async def has_updates(self) -> bool:
+        """
+        Verifica no FTP (SIZE/MDTM) se o arquivo remoto mudou desde o último download.
+        
+        Se o servidor não informa SIZE nem MDTM, não há como comparar: a
+        atualização é sempre feita (a publicação descarta conteúdo igual ao
+        da geração vigente, então o custo é o download e o parse).
+        
+        Returns:
+            bool: True se o arquivo remoto é diferente do baixado (ou se não há
+            registro do último download ou o servidor não informa SIZE/MDTM),
+            False caso contrário
+        """
+        remote_stamp = await run_io(self._fetch_remote_stamp_sync)
+        if not any(value is not None for value in remote_stamp.values()):
+            if not self._unknown_stamp_warned:
+                logger.warning("Servidor FTP não informa SIZE nem MDTM; a base será baixada a cada verificação")
+                self._unknown_stamp_warned = True
+            return True
+        
+        local_stamp = self._load_remote_stamp()
+        if not local_stamp or not self.zip_file_path.exists():
+            logger.info("Sem registro do último download, atualização necessária")
+            return True
+        
+        changed = remote_stamp != local_stamp
+        if changed:
+            logger.info(f"Arquivo remoto alterado: {local_stamp} -> {remote_stamp}")
+        else:
+            logger.debug("Arquivo remoto sem alterações")
+        return changed
+
     async def _load_data(self):
-        if not os.path.exists(self.file_name):
+        if not self.zip_file_path.exists() and not os.path.exists(self.file_name):
             await self._download_file()
 
+    @timed("download_file")
     async def _download_file(self):
-        """Download do arquivo do FTP com tratamento de erros e backup."""
-        file_bkp = f"{self.file_name}.bkp"
+        """Download do arquivo do FTP em uma thread de I/O, sem bloquear o event loop."""
+        await run_io(self._download_file_sync)
+
+    def _download_file_sync(self):
+        """
+        Download do arquivo do FTP com tratamento de erros.
         
-        # Fazer backup do arquivo atual se existir
-        if os.path.exists(self.file_name):
-            if os.path.exists(file_bkp):
-                os.remove(file_bkp)
-            os.rename(self.file_name, file_bkp)
-            logger.info("Backup do arquivo atual criado")
+        O conteúdo é gravado em streaming em um arquivo temporário no diretório
+        de cache e só substitui o ZIP anterior (via rename atômico) quando o
+        download termina com sucesso. O ZIP não é extraído: o parser lê o membro
+        de texto diretamente do arquivo compactado.
+        """
+        zip_file_name = self.settings.ftp_file_name
+        self.zip_file_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = tempfile.NamedTemporaryFile(
+            dir=self.zip_file_path.parent, prefix=f"{zip_file_name}.", suffix=".part", delete=False
+        )
 
         ftp = None
         try:
-            logger.info(f"Conectando ao FTP: {self.base_url}")
-            ftp = FTP(self.base_url)
-            ftp.login()
-            ftp.cwd(self.endpoint)
+            ftp = self._connect_ftp()
+            remote_stamp = self._read_remote_stamp(ftp)
             
-            zip_file_name = self.settings.ftp_file_name
             logger.info(f"Baixando arquivo: {zip_file_name}")
-            
-            r = io.BytesIO()
-            ftp.retrbinary(f"RETR {zip_file_name}", r.write)
+            with temp_file:
+                ftp.retrbinary(f"RETR {zip_file_name}", temp_file.write)
             
             # Verificar se o download foi bem-sucedido
-            if len(r.getvalue()) == 0:
+            size = os.path.getsize(temp_file.name)
+            if size == 0:
                 raise Exception("Arquivo baixado está vazio")
+            if not zipfile.is_zipfile(temp_file.name):
+                raise Exception("Arquivo baixado não é um ZIP válido")
             
-            logger.info(f"Arquivo baixado com sucesso: {len(r.getvalue())} bytes")
-            
-            # Extrair o ZIP
-            r.seek(0)  # Voltar para o início do buffer
-            with zipfile.ZipFile(r) as zip_file:
-                zip_file.extractall()
-            
-            logger.info("Arquivo extraído com sucesso")
+            logger.info(f"Arquivo baixado com sucesso: {size} bytes")
             
-            # Remover backup se tudo deu certo
-            if os.path.exists(file_bkp):
-                os.remove(file_bkp)
-                logger.debug("Backup removido")
+            # Publicar o novo ZIP; o anterior permanece intacto até este ponto
+            os.replace(temp_file.name, self.zip_file_path)
+            self._save_remote_stamp(remote_stamp)
+            logger.info(f"Arquivo salvo em {self.zip_file_path}")
             
         except Exception as e:
             logger.error(f"Erro ao baixar arquivo: {e}")
-            
-            # Restaurar backup se existir
-            if os.path.exists(file_bkp):
-                if os.path.exists(self.file_name):
-                    os.remove(self.file_name)
-                os.rename(file_bkp, self.file_name)
-                logger.info("Backup restaurado devido ao erro")
-            
             raise  # Re-lançar a exceção
             
         finally:
-            # Fechar conexão FTP
-            if ftp:
-                try:
-                    ftp.quit()
-                    logger.debug("Conexão FTP fechada")
-                except:
-                    logger.warning("Erro ao fechar conexão FTP")
-                    pass
+            if os.path.exists(temp_file.name):
+                os.remove(temp_file.name)
+            
+            self._close_ftp(ftp)
+
+    def _fetch_remote_stamp_sync(self) -> dict:
+        """Consulta tamanho e data de modificação do arquivo remoto"""
+        ftp = None
+        try:
+            ftp = self._connect_ftp()
+            return self._read_remote_stamp(ftp)
+        finally:
+            self._close_ftp(ftp)
+
+    def _connect_ftp(self) -> FTP:
+        logger.info(f"Conectando ao FTP: {self.base_url}")
+        ftp = FTP(self.base_url)
+        ftp.login()
+        ftp.cwd(self.endpoint)
+        return ftp
+
+    def _close_ftp(self, ftp: Optional[FTP]):
+        # Fechar conexão FTP
+        if ftp:
+            try:
+                ftp.quit()
+                logger.debug("Conexão FTP fechada")
+            except:
+                logger.warning("Erro ao fechar conexão FTP")
+                pass
+
+    def _read_remote_stamp(self, ftp: FTP) -> dict:
+        """Lê SIZE e MDTM do arquivo remoto (campos ficam None se o servidor não suportar)"""
+        zip_file_name = self.settings.ftp_file_name
+        stamp = {"size": None, "mdtm": None}
+        try:
+            ftp.voidcmd("TYPE I")  # SIZE exige modo binário em vários servidores
+            stamp["size"] = ftp.size(zip_file_name)
+        except Exception as e:
+            logger.debug(f"SIZE não suportado pelo servidor: {e}")
+        try:
+            stamp["mdtm"] = ftp.voidcmd(f"MDTM {zip_file_name}").split()[-1]
+        except Exception as e:
+            logger.debug(f"MDTM não suportado pelo servidor: {e}")
+        return stamp
 
+    def _load_remote_stamp(self) -> dict:
+        """Carrega SIZE/MDTM registrados no último download"""
+        try:
+            if self.remote_stamp_path.exists():
+                with open(self.remote_stamp_path, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.warning(f"Erro ao ler registro do último download: {e}")
+        return {}
+
+    def _save_remote_stamp(self, stamp: dict):
+        """Registra SIZE/MDTM do arquivo baixado (gravação atômica, como a do ZIP)"""
+        tmp_path = self.remote_stamp_path.with_name(f"{self.remote_stamp_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(stamp, f)
+            os.replace(tmp_path, self.remote_stamp_path)
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            logger.warning(f"Erro ao salvar registro do download: {e}")
 
+    @timed("to_dataframe")
     async def _to_dataframe(self):
         """Processa o arquivo e converte para DataFrame com limpeza de dados."""
         try:
             await self._load_data()
-            data = await self._read_file()
             logger.info("Arquivo carregado, iniciando processamento")
             
-            # Separar as linhas do arquivo
-            lines = data.strip().split('\n')
-            logger.debug(f"Total de linhas no arquivo: {len(lines)}")
-            
-            # Remover linhas vazias e limpar espaços
-            lines = [line.strip() for line in lines if line.strip()]
-            logger.debug(f"Linhas após limpeza: {len(lines)}")
-            
-            # Lista para armazenar os dados processados
-            processed_data = []
-            skipped_lines = 0
-            
-            for i, line in enumerate(lines):
-                # Detectar separador automaticamente (primeira tentativa com |, depois ;, depois tab)
-                separators = ['|', ';', '\t']
-                fields = None
-                
-                for sep in separators:
-                    test_fields = line.split(sep)
-                    if len(test_fields) > 1:  # Encontrou um separador válido
-                        fields = test_fields
-                        break
-                
-                if fields is None:
-                    fields = [line]  # Linha sem separador identificado
-                
-                # Limpar espaços dos campos
-                fields = [field.strip() for field in fields]
-                
-                if len(fields) >= len(self.columns_name):
-                    # Pegar apenas o número de colunas necessárias
-                    processed_data.append(fields[:len(self.columns_name)])
-                elif len(fields) > 1:  # Linha com alguns campos
-                    # Preencher campos faltantes com strings vazias
-                    padded_fields = fields + [''] * (len(self.columns_name) - len(fields))
-                    processed_data.append(padded_fields[:len(self.columns_name)])
-                else:
-                    skipped_lines += 1
-                    if i < 10:  # Log apenas das primeiras linhas problemáticas
-                        logger.debug(f"Linha {i+1} ignorada (poucos campos): {line[:100]}...")
-            
-            if skipped_lines > 0:
-                logger.warning(f"Ignoradas {skipped_lines} linhas com formato inválido")
-            
-            # Criar o DataFrame
-            self.base_dados_df = pd.DataFrame(processed_data, columns=self.columns_name)
-            logger.info(f"DataFrame criado com {len(self.base_dados_df)} registros")
+            # Parse e otimização rodam fora do event loop (processo dedicado)
+            df = await run_cpu(
+                load_caepi_dataframe,
+                self.zip_file_path,
+                self.file_name,
+                self.columns_name,
+                self.ingest_chunk_size
+            )
             
-            # Remover cabeçalho se presente
-            if (len(self.base_dados_df) > 0 and 
-                self.base_dados_df.iloc[0]['RegistroCA'].upper() in ['NR REGISTRO CA', 'REGISTROCA', 'NUMERO_CA']):
-                self.base_dados_df = self.base_dados_df.iloc[1:].reset_index(drop=True)
-                logger.info("Cabeçalho removido")
-            
-            # Limpeza e otimização dos dados
-            self._optimize_dataframe()
-            
-            logger.info(f"Processamento concluído: {len(self.base_dados_df)} certificados carregados")
-            return self.base_dados_df
+            # Publicar o novo DataFrame de uma só vez (troca atômica da referência)
+            self.base_dados_df = df
+            logger.info(f"Processamento concluído: {len(df)} certificados carregados")
+            return df
             
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Arquivo {self.file_name} não encontrado")
         except Exception as e:
             logger.error(f"Erro ao processar dados: {e}")
             raise
     
-    def _optimize_dataframe(self):
+    @staticmethod
+    def _optimize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
         """Otimiza o DataFrame para melhor performance."""
-        if self.base_dados_df is None or self.base_dados_df.empty:
-            return
+        if df is None or df.empty:
+            return df
         
         try:
-            # Remover espaços extras de todas as colunas de texto
-            string_columns = self.base_dados_df.select_dtypes(include=['object']).columns
-            for col in string_columns:
-                self.base_dados_df[col] = self.base_dados_df[col].astype(str).str.strip()
+            # DataValidade (ISO) e Situacao (categoria canônica) normalizadas uma única vez
+            normalize_certificates(df)
             
             # Converter colunas categóricas para economizar memória
-            categorical_columns = ['Situacao', 'Natureza', 'MarcaCA', 'Cor', 'AprovadoParaLaudo']
+            categorical_columns = ['Natureza', 'MarcaCA', 'Cor', 'AprovadoParaLaudo']
             for col in categorical_columns:
-                if col in self.base_dados_df.columns:
-                    self.base_dados_df[col] = self.base_dados_df[col].astype('category')
-            
-            # Tentar converter RegistroCA para numérico se possível
-            if 'RegistroCA' in self.base_dados_df.columns:
-                try:
-                    self.base_dados_df['RegistroCA'] = pd.to_numeric(
-                        self.base_dados_df['RegistroCA'], errors='coerce'
-                    ).fillna(self.base_dados_df['RegistroCA'])
-                except:
-                    pass  # Manter como string se conversão falhar
-            
-            # Tentar converter datas
-            if 'DataValidade' in self.base_dados_df.columns:
-                try:
-                    self.base_dados_df['DataValidade'] = pd.to_datetime(
-                        self.base_dados_df['DataValidade'], errors='coerce'
-                    )
-                except:
-                    pass
+                if col in df.columns:
+                    df[col] = df[col].astype('category')
+            
+            # RegistroCA numérico quando válido (mesma regra das consultas);
+            # valores inválidos são mantidos como vieram
+            if 'RegistroCA' in df.columns:
+                keys, valid = registro_keys(df['RegistroCA'])
+                if valid.all():
+                    df['RegistroCA'] = keys
+                else:
+                    df['RegistroCA'] = np.where(valid, keys.astype(object), df['RegistroCA'].to_numpy(dtype=object))
+            
+            # Linhas em ordem de RegistroCA (mesma ordem do cache Parquet)
+            df = sort_by_registro(df)
             
             logger.debug("DataFrame otimizado com sucesso")
             
         except Exception as e:
             logger.warning(f"Erro na otimização do DataFrame: {e}")
+        
+        return df
 
 
-    async def _read_file(self):
-        try:
-            with open(self.file_name, "r", encoding="UTF-8") as file:
-                data = file.read()
-            return data
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Arquivo {self.file_name} não encontrado")
-        except Exception as e:
-            raise Exception(f"Erro ao ler arquivo: {e}")
-    
     def is_data_loaded(self) -> bool:
         """Verifica se os dados já foram carregados"""
         return self.base_dados_df is not None and not self.base_dados_df.empty
     
+    def release_data(self):
+        """
+        Libera o DataFrame mantido em memória.
+        
+        Usado depois que os dados foram publicados como geração compartilhada;
+        uma nova chamada a get_data recarrega do cache persistente.
+        """
+        self.base_dados_df = None
+    
     async def search_certificate_optimized(self, registro_ca: str) -> pd.DataFrame:
         """
         Busca otimizada de certificado usando cache persistente.
         Muito mais rápido que carregar todo o DataFrame.
         
+        A leitura do cache roda fora do event loop. Só o formato Parquet lê
+        apenas o row group do CA (requer pyarrow); com o fallback pickle o
+        cache é lido por inteiro a cada busca.
+        
         Args:
             registro_ca: Número do registro CA
             
@@ -326,18 +424,21 @@ class CAEPIDataSource(DataSourceInterface):
             # Tentar busca direta no cache persistente (mais eficiente)
             if self.cache_manager and self.cache_manager.is_cache_valid():
                 logger.debug(f"Buscando certificado {registro_ca} no cache persistente")
-                result = self.cache_manager.search_certificates(registro_ca)
+                result = await run_io(self.cache_manager.search_certificates, registro_ca)
                 if result is not None and not result.empty:
                     logger.info(f"Certificado {registro_ca} encontrado no cache")
                     return result
             
             # Fallback para busca tradicional
             logger.debug(f"Buscando certificado {registro_ca} nos dados completos")
+            key = parse_registro(registro_ca)
+            if key is None:
+                return pd.DataFrame()
             df = await self.get_data()
             if df is not None and not df.empty:
-                # Garantir que RegistroCA seja tratado como string para comparação
-                result = df[df['RegistroCA'].astype(str).str.strip() == str(registro_ca).strip()]
-                return result
+                # Mesma regra do índice e do cache persistente
+                keys, valid = registro_keys(df['RegistroCA'])
+                return df[valid & (keys == key)]
             
             return pd.DataFrame()
             
@@ -421,6 +522,13 @@ class CAEPIDataSource(DataSourceInterface):
             }
         }
         
+        df = self.base_dados_df
+        if df is not None:
+            # Normalmente vazio: o DataFrame é liberado depois de publicado no SharedDatasetStore
+            memory = df.memory_usage(index=False, deep=True)
+            info["memory_cache"]["memory_bytes"] = int(memory.sum())
+            info["memory_cache"]["memory_bytes_by_column"] = {col: int(size) for col, size in memory.items()}
+        
         if self.cache_manager:
             info["persistent_cache"].update(self.cache_manager.get_cache_stats())
         
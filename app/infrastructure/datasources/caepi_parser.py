@@ -0,0 +1,164 @@
+import csv
+import io
+import logging
+import re
+from typing import Iterator, List, TextIO, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class CAEPIParser:
+    """
+    Parser vetorizado do arquivo de exportação do CAEPI (tgg_export_caepi.txt).
+
+    O separador é detectado uma única vez a partir de uma amostra do arquivo e
+    a leitura é feita pelo leitor em C do pandas, em blocos de tamanho fixo
+    (`chunk_size` caracteres, sempre terminando em fim de linha). Linhas com
+    menos campos são completadas com strings vazias e campos excedentes são
+    descartados, como no processamento linha a linha anterior.
+    """
+
+    SEPARATORS = ['|', ';', '\t']
+    HEADER_VALUES = ['NR REGISTRO CA', 'REGISTROCA', 'NUMERO_CA']
+    SAMPLE_SIZE = 64 * 1024
+    DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, columns_name: List[str], chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.columns_name = columns_name
+        self.chunk_size = chunk_size
+
+    def detect_delimiter(self, sample: str) -> str:
+        """
+        Detecta o separador a partir de uma amostra do arquivo.
+
+        Segue a mesma prioridade do processamento anterior (|, depois ;, depois
+        tab), escolhendo o primeiro separador presente na maioria das linhas.
+        """
+        lines = [line for line in sample.splitlines() if line.strip()]
+        if not lines:
+            return self.SEPARATORS[0]
+
+        for sep in self.SEPARATORS:
+            if sum(1 for line in lines if sep in line) * 2 >= len(lines):
+                return sep
+
+        logger.warning("Separador não identificado na amostra, usando '|'")
+        return self.SEPARATORS[0]
+
+    def parse(self, source: Union[str, TextIO]) -> pd.DataFrame:
+        """
+        Converte o arquivo de exportação em DataFrame.
+
+        Args:
+            source: Caminho do arquivo ou stream de texto
+
+        Returns:
+            pd.DataFrame: Dados com as colunas de `columns_name` (texto, sem espaços extras)
+        """
+        batches = list(self.iter_batches(source))
+        if not batches:
+            return pd.DataFrame(columns=self.columns_name)
+        if len(batches) == 1:
+            return batches[0].reset_index(drop=True)
+        return pd.concat(batches, ignore_index=True, copy=False)
+
+    def iter_batches(self, source: Union[str, TextIO]) -> Iterator[pd.DataFrame]:
+        """
+        Lê o arquivo de exportação em lotes.
+
+        O stream é consumido de forma incremental, então o texto completo do
+        arquivo nunca fica em memória de uma só vez.
+
+        Args:
+            source: Caminho do arquivo ou stream de texto (ex: membro de um ZIP)
+
+        Yields:
+            pd.DataFrame: Lotes já limpos, na ordem do arquivo
+        """
+        if isinstance(source, str):
+            with open(source, "r", encoding="UTF-8") as file:
+                yield from self.iter_batches(file)
+            return
+
+        sep = None
+        skipped_lines = 0
+        for batch_number, block in enumerate(self._iter_blocks(source)):
+            if sep is None:
+                sep = self.detect_delimiter(block[:self.SAMPLE_SIZE])
+                logger.debug(f"Separador detectado: {sep!r}")
+
+            df, skipped = self._clean(self._read_block(block, sep), block, sep, drop_header=batch_number == 0)
+            skipped_lines += skipped
+            yield df
+
+        if skipped_lines > 0:
+            logger.warning(f"Ignoradas {skipped_lines} linhas com formato inválido")
+
+    def _iter_blocks(self, stream: TextIO) -> Iterator[str]:
+        """Lê o stream em blocos de ~chunk_size caracteres terminados em fim de linha"""
+        while True:
+            block = stream.read(self.chunk_size)
+            if not block:
+                return
+            if not block.endswith('\n'):
+                block += stream.readline()
+            yield block
+
+    def _read_block(self, block: str, sep: str) -> pd.DataFrame:
+        """Converte um bloco de linhas em DataFrame com as colunas do layout"""
+        width = len(self.columns_name)
+        try:
+            return self._read_csv(block, sep, width)
+        except pd.errors.ParserError:
+            # Nenhuma linha do bloco tem todas as colunas do layout: ler apenas
+            # as colunas existentes e completar o restante com strings vazias
+            width = min(width, max(line.count(sep) + 1 for line in block.splitlines()))
+            df = self._read_csv(block, sep, width)
+            for col in self.columns_name[width:]:
+                df[col] = ''
+            return df
+
+    def _read_csv(self, block: str, sep: str, width: int) -> pd.DataFrame:
+        return pd.read_csv(
+            io.StringIO(block),
+            sep=sep,
+            header=None,
+            names=self.columns_name[:width],
+            usecols=range(width),
+            dtype=object,
+            engine='c',
+            quoting=csv.QUOTE_NONE,
+            na_filter=False,
+            skipinitialspace=True,
+            # Uma linha do DataFrame por linha do bloco (ver _clean)
+            skip_blank_lines=False,
+        )
+
+    def _clean(self, df: pd.DataFrame, block: str, sep: str, drop_header: bool = True) -> Tuple[pd.DataFrame, int]:
+        """Remove espaços, linhas vazias ou sem separador e o cabeçalho, se presente"""
+        # Espaços à esquerda já são descartados pelo leitor (skipinitialspace)
+        df = pd.DataFrame({col: df[col].str.rstrip() for col in df.columns}, copy=False)
+
+        # O leitor completa da mesma forma linhas sem separador e linhas como
+        # "123|"; como no processamento anterior, só as primeiras são
+        # descartadas. A distinção é feita no texto, apenas para as linhas em
+        # que só a primeira coluna tem conteúdo
+        only_first = ~(df.iloc[:, 1:].to_numpy() != '').any(axis=1)
+        skipped_lines = 0
+        if only_first.any():
+            lines = re.split(r'\r\n|\r|\n', block)
+            candidates = np.flatnonzero(only_first)
+            without_sep = np.array([sep not in lines[i] for i in candidates], dtype=bool)
+            blank = np.array([not lines[i].strip() for i in candidates], dtype=bool)
+            skipped_lines = int((without_sep & ~blank).sum())
+            df = df.drop(index=df.index[candidates[without_sep]])
+
+        # Remover cabeçalho se presente
+        if drop_header and len(df) > 0 and df.iloc[0]['RegistroCA'].upper() in self.HEADER_VALUES:
+            df = df.iloc[1:]
+            logger.info("Cabeçalho removido")
+
+        return df, skipped_lines
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from app.core.config import get_settings
+from app.infrastructure.datasources.dataset_holder import DatasetHolder
+
+logger = logging.getLogger(__name__)
+
+
+class CertificateRefresher:
+    """
+    Atualização periódica da base de certificados em segundo plano.
+
+    A cada `refresh_interval` segundos consulta o FTP (SIZE/MDTM) e só baixa e
+    reprocessa o arquivo quando ele mudou. O snapshot atual continua atendendo
+    as requisições durante todo o processo.
+    """
+
+    def __init__(self, dataset_holder: DatasetHolder):
+        self.settings = get_settings()
+        self.dataset_holder = dataset_holder
+        self.interval = self.settings.refresh_interval
+        self._task: Optional[asyncio.Task] = None
+        self.last_check: Optional[float] = None
+        self.last_refresh: Optional[float] = None
+
+    def start(self):
+        """Inicia a tarefa de atualização no event loop atual"""
+        if not self.settings.refresh_enabled:
+            logger.info("Atualização automática desabilitada")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="certificate-refresher")
+            logger.info(f"Atualização automática iniciada (intervalo: {self.interval}s)")
+
+    async def stop(self):
+        """Interrompe a tarefa de atualização"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Atualização automática encerrada")
+
+    async def check_and_refresh(self) -> bool:
+        """
+        Executa uma verificação e atualiza a base se o arquivo remoto mudou.
+
+        Returns:
+            bool: True se uma nova versão foi publicada
+        """
+        self.last_check = time.time()
+        if not await self.dataset_holder.data_source.has_updates():
+            return False
+
+        logger.info("Nova versão do arquivo CAEPI disponível, atualizando base")
+        success = await self.dataset_holder.refresh()
+        if success:
+            self.last_refresh = time.time()
+        else:
+            logger.warning("Falha na atualização automática; mantendo a versão atual")
+        return success
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check_and_refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Erros de rede não podem derrubar a tarefa; tenta no próximo ciclo
+                logger.error(f"Erro na atualização automática: {e}", exc_info=True)
@@ -12,6 +12,14 @@ class DataSourceInterface(ABC):
     async def update_data(self) -> bool:
         pass
 
+    @abstractmethod
+    async def has_updates(self) -> bool:
+        pass
+
     @abstractmethod
     def is_data_loaded(self) -> bool:
         pass
+
+    @abstractmethod
+    def release_data(self):
+        pass
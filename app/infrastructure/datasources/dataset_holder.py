@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from app.core.config import get_settings
+from app.core.executors import run_io
+from app.core.metrics import REFRESH_LAST_SUCCESS, REFRESHES, timed
+from app.infrastructure.cache.dataset_changeset import DatasetChangeset
+from app.infrastructure.cache.generations import GenerationLease
+from app.infrastructure.cache.shared_dataset import ColumnarDataset, SharedDatasetStore
+from app.infrastructure.datasources.data_source_interface import DataSourceInterface
+from app.infrastructure.datasources.refresh_coordinator import RefreshCoordinator, SingleFlight
+from app.infrastructure.indexes.certificate_index import CertificateIndex
+from app.infrastructure.indexes.filter_index import CertificateFilterIndex
+from app.infrastructure.indexes.text_index import CertificateTextIndex
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    """
+    Versão imutável do dataset carregado em memória.
+
+    Todas as requisições leem a mesma instância; uma atualização publica uma
+    nova instância em vez de alterar a atual. Tabela e índice são mapeados a
+    partir de uma geração do SharedDatasetStore, então todos os workers
+    compartilham as mesmas páginas de memória.
+
+    `version` é o hash do conteúdo da geração: igual em todos os workers e
+    entre gerações com os mesmos dados. `modified_at` é quando a geração foi
+    publicada. `changes` são as alterações em relação à geração anterior,
+    quando a geração foi publicada sobre outra. `lease` mantém a geração em
+    disco enquanto o snapshot existir (inclusive em requisições que ainda o
+    usam depois de uma troca de versão).
+    """
+
+    table: ColumnarDataset
+    index: CertificateIndex
+    filters: CertificateFilterIndex
+    text: CertificateTextIndex
+    generation: int
+    version: str
+    modified_at: float
+    loaded_at: float
+    changes: Optional[DatasetChangeset] = None
+    lease: Optional[GenerationLease] = field(default=None, repr=False, compare=False)
+
+    @property
+    def records_count(self) -> int:
+        return len(self.table)
+
+
+class DatasetHolder:
+    """
+    Mantém o dataset da aplicação durante todo o ciclo de vida do processo.
+
+    É criado uma única vez no lifespan do FastAPI e compartilhado por todas as
+    requisições. A troca de versão é feita por atribuição de referência, então
+    leitores sempre enxergam um snapshot completo (o antigo ou o novo).
+
+    Entre processos, a versão vigente é a geração apontada pelo
+    SharedDatasetStore: quem atualiza a base publica uma nova geração e os
+    demais workers a detectam (no máximo a cada `shared_dataset_poll_interval`
+    segundos) e apenas mapeiam os arquivos, sem reprocessar nada.
+
+    Carga e atualização passam pelo RefreshCoordinator, então apenas um
+    processo por vez baixa e processa o arquivo CAEPI; dentro do processo,
+    chamadas concorrentes compartilham a mesma execução (SingleFlight).
+    """
+
+    def __init__(
+        self,
+        data_source: DataSourceInterface,
+        store: Optional[SharedDatasetStore] = None,
+        coordinator: Optional[RefreshCoordinator] = None
+    ):
+        self.settings = get_settings()
+        self.data_source = data_source
+        self.store = store or SharedDatasetStore(self.settings.cache_dir)
+        self.coordinator = coordinator or RefreshCoordinator(
+            self.settings.cache_dir, self.settings.refresh_lock_poll_interval
+        )
+        self._flights = SingleFlight()
+        self.poll_interval = self.settings.shared_dataset_poll_interval
+        self._snapshot: Optional[DatasetSnapshot] = None
+        self._last_poll = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def snapshot(self) -> Optional[DatasetSnapshot]:
+        """Snapshot atual, ou None se o dataset ainda não foi carregado."""
+        return self._snapshot
+
+    def is_loaded(self) -> bool:
+        return self._snapshot is not None
+
+    async def get_snapshot(self) -> DatasetSnapshot:
+        """
+        Retorna o snapshot atual, carregando-o se necessário.
+
+        Se outro processo publicou uma geração mais nova, ela é mapeada e
+        passa a ser o snapshot atual. A fonte de dados só é carregada na
+        partida a frio; com um snapshot já carregado, a falta de geração
+        publicada fica a cargo da próxima atualização.
+        """
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._last_poll < self.poll_interval:
+            return snapshot
+        self._last_poll = now
+
+        generation = self.store.current_generation()
+        if snapshot is not None and snapshot.generation == generation:
+            return snapshot
+
+        if generation is not None:
+            try:
+                return await self._open(generation)
+            except Exception as e:
+                logger.warning(f"Não foi possível abrir a geração {generation}: {e}")
+
+        if snapshot is not None:
+            # Geração publicada sumiu ou está corrompida: o snapshot em memória
+            # continua válido e a próxima atualização publica uma nova geração
+            if generation is None:
+                logger.warning(
+                    f"Nenhuma geração publicada; mantendo o snapshot da geração {snapshot.generation}"
+                )
+            return snapshot
+
+        # Partida a frio sem geração utilizável: carregar da fonte de dados e publicar
+        return await self._flights.run("load", self._load, generation)
+
+    async def load(self) -> DatasetSnapshot:
+        """Carrega o dataset (usado no startup da aplicação)."""
+        logger.info("Carregando dataset em memória")
+        snapshot = await self.get_snapshot()
+        logger.info(f"Dataset carregado: {snapshot.records_count} registros (geração {snapshot.generation})")
+        return snapshot
+
+    async def refresh(self) -> bool:
+        """
+        Atualiza a fonte de dados e publica uma nova geração.
+
+        Enquanto a atualização ocorre, as consultas continuam sendo atendidas
+        pelo snapshot anterior. Se outro processo concluir uma atualização
+        enquanto esta aguarda a vez, a geração publicada por ele é usada e
+        nada é baixado novamente.
+        """
+        return await self._flights.run("refresh", self._refresh)
+
+    def describe(self) -> Dict[str, Any]:
+        """
+        Estado do dataset deste processo, para inspeção.
+
+        Inclui versão e geração do snapshot, bytes por coluna da tabela e por
+        componente dos índices, e as gerações em disco. Consulta o disco
+        (tamanho dos arquivos): chamar fora do event loop.
+        """
+        snapshot = self._snapshot
+        info: Dict[str, Any] = {
+            "loaded": snapshot is not None,
+            "storage_mode": self.settings.dataset_storage_mode,
+            "current_generation": self.store.current_generation(),
+            "generations_on_disk": self.store.generations.generations(),
+        }
+        if snapshot is None:
+            return info
+
+        loaded = set(snapshot.table.loaded_columns)
+        column_bytes = snapshot.table.column_nbytes()
+        index_bytes = self.store.component_sizes(snapshot.generation)
+        info.update({
+            "version": snapshot.version,
+            "generation": snapshot.generation,
+            "records_count": snapshot.records_count,
+            "index_size": len(snapshot.index),
+            "modified_at": datetime.fromtimestamp(snapshot.modified_at).isoformat(),
+            "loaded_at": datetime.fromtimestamp(snapshot.loaded_at).isoformat(),
+            "age_seconds": time.time() - snapshot.loaded_at,
+            "columns": {
+                name: {"bytes": size, "loaded": name in loaded} for name, size in column_bytes.items()
+            },
+            "table_bytes": sum(column_bytes.values()),
+            "index_bytes": index_bytes,
+            "index_total_bytes": sum(index_bytes.values()),
+        })
+        return info
+
+    def changed_keys(self, base_version: str, version: str) -> Optional[List[str]]:
+        """
+        RegistroCA alterados entre duas versões consecutivas da base.
+
+        Returns:
+            Lista de RegistroCA, ou None se `version` não é o snapshot atual
+            ou não foi publicada diretamente sobre `base_version`
+        """
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version or snapshot.changes is None:
+            return None
+        if snapshot.changes.base_version != base_version:
+            return None
+        return snapshot.changes.keys()
+
+    async def changes_between(self, since: str, version: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Alterações registradas no ChangeLog desde a versão `since` até `version`.
+
+        Returns:
+            Linhas do registro em ordem cronológica, ou None se `since` não é
+            uma versão anterior conhecida
+        """
+        return await run_io(self.store.change_log.entries_between, since, version)
+
+    async def _load(self, unusable: Optional[int]) -> DatasetSnapshot:
+        async with self.coordinator.acquire():
+            # Outro processo pode ter publicado uma geração enquanto aguardávamos a vez
+            generation = self.store.current_generation()
+            if generation is not None and generation != unusable:
+                try:
+                    return await self._open(generation)
+                except Exception as e:
+                    logger.warning(f"Não foi possível abrir a geração {generation}: {e}")
+
+            df = await self.data_source.get_data()
+            return await self._publish(df)
+
+    @timed("refresh")
+    async def _refresh(self) -> bool:
+        async with self.coordinator.acquire() as turn:
+            if not turn.refreshed_by_other():
+                success = await self.data_source.update_data()
+                if success:
+                    df = await self.data_source.get_data()
+                    await self._publish(df)
+                turn.record_refresh(success, self.store.current_generation())
+                REFRESHES.inc(result="success" if success else "failure")
+                if success:
+                    REFRESH_LAST_SUCCESS.set(time.time())
+                return success
+
+        logger.info("Base atualizada por outro processo durante a espera; usando a geração publicada")
+        generation = self.store.current_generation()
+        if turn.last_refresh.get("success") and generation is not None:
+            await self._open(generation)
+            REFRESH_LAST_SUCCESS.set(turn.last_refresh["finished_at"])
+        REFRESHES.inc(result="adopted")
+        return bool(turn.last_refresh.get("success"))
+
+    async def _open(self, generation: int) -> DatasetSnapshot:
+        async with self._lock:
+            if self._snapshot is not None and self._snapshot.generation == generation:
+                return self._snapshot
+
+            opened = await run_io(self.store.open, generation, self.settings.dataset_storage_mode)
+            snapshot = DatasetSnapshot(
+                table=opened.table,
+                index=opened.index,
+                filters=opened.filters,
+                text=opened.text,
+                generation=generation,
+                version=opened.manifest["version"],
+                modified_at=opened.manifest["created_at"],
+                loaded_at=time.time(),
+                changes=opened.changes,
+                lease=opened.lease
+            )
+            self._snapshot = snapshot
+            logger.info(f"Snapshot do dataset publicado (geração {generation})")
+
+        # A geração anterior deixa de ser usada por este processo (ao fim das
+        # requisições em andamento); remover as que nenhum processo usa mais
+        try:
+            await run_io(self.store.collect)
+        except Exception as e:
+            logger.warning(f"Falha ao remover gerações antigas: {e}")
+        return snapshot
+
+    async def _publish(self, df: pd.DataFrame) -> DatasetSnapshot:
+        if df is None:
+            raise ValueError("Fonte de dados não retornou dados")
+
+        # Gravação da geração e construção dos índices fora do event loop
+        generation = await run_io(self.store.publish, df)
+        snapshot = await self._open(generation)
+
+        # O DataFrame já foi convertido para a geração compartilhada; manter
+        # a cópia no heap do processo só duplicaria a memória
+        self.data_source.release_data()
+        return snapshot
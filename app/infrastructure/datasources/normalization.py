@@ -0,0 +1,162 @@
+"""
+Normalização de DataValidade e Situacao na ingestão do CAEPI, interpretação
+e ordenação das linhas por RegistroCA.
+
+Executada uma vez por carga (sobre os valores distintos de cada coluna),
+de modo que o caminho das requisições apenas lê valores já normalizados.
+"""
+
+import logging
+import unicodedata
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.domain.entities.certificate_status import CertificateStatus
+
+logger = logging.getLogger(__name__)
+
+# Formato do arquivo do CAEPI e formato servido pela API
+SOURCE_DATE_FORMAT = "%d/%m/%Y"
+ISO_DATE_FORMAT = "%Y-%m-%d"
+
+# Maior RegistroCA representável nos arrays int64 do índice
+MAX_REGISTRO_CA = int(np.iinfo(np.int64).max)
+
+
+def parse_registro(value) -> Optional[int]:
+    """
+    Interpretação canônica de um RegistroCA como inteiro.
+
+    Texto só é aceito se, sem espaços nas pontas, tiver apenas dígitos ASCII
+    ("1e3", "+123", "12.0" e "١٢٣" não são RegistroCA). Valores numéricos
+    vindos do DataFrame (RegistroCA convertido na ingestão) são aceitos se
+    forem inteiros não negativos.
+
+    Returns:
+        O RegistroCA, ou None se o valor não é um RegistroCA válido
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return None
+    if isinstance(value, (int, np.integer)):
+        key = int(value)
+    elif isinstance(value, (float, np.floating)):
+        if not np.isfinite(value) or not float(value).is_integer():
+            return None
+        key = int(value)
+    else:
+        text = str(value).strip()
+        if not (text.isascii() and text.isdigit()):
+            return None
+        key = int(text)
+    return key if 0 <= key <= MAX_REGISTRO_CA else None
+
+
+def registro_keys(values: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    `parse_registro` aplicado a uma coluna ou lista de RegistroCA.
+
+    Returns:
+        Tupla (chaves int64, máscara dos valores válidos); chaves inválidas
+        ficam como 0
+    """
+    values = values.to_numpy() if isinstance(values, pd.Series) else np.asarray(values, dtype=object)
+    if values.dtype.kind in "iu":
+        # Coluna já convertida na ingestão: sem interpretação por valor
+        valid = (values >= 0) & (values <= MAX_REGISTRO_CA)
+        return np.where(valid, values, 0).astype(np.int64), valid
+
+    parsed = [parse_registro(value) for value in values.astype(object, copy=False)]
+    valid = np.fromiter((key is not None for key in parsed), dtype=bool, count=len(parsed))
+    keys = np.fromiter((0 if key is None else key for key in parsed), dtype=np.int64, count=len(parsed))
+    return keys, valid
+
+
+def _status_key(value: str) -> str:
+    """Chave de comparação da situação: minúsculas e sem acentos"""
+    decomposed = unicodedata.normalize("NFKD", value.strip().lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+# Situação sem acentos/maiúsculas -> valor canônico
+_STATUS_BY_KEY = {_status_key(status.value): status.value for status in CertificateStatus}
+
+
+def normalize_dates(values: pd.Series) -> pd.Series:
+    """
+    Converte DataValidade para texto ISO (AAAA-MM-DD), ou "" se ausente/inválida.
+
+    O formato do CAEPI (DD/MM/AAAA) é informado explicitamente: sem ele o
+    pandas interpreta datas como 10/05/2017 no formato americano e descarta
+    as que não cabem nele (ex: 26/04/2018). Valores já em ISO, como os de
+    caches gravados depois desta normalização, são aceitos.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.strftime(ISO_DATE_FORMAT).fillna("").astype(object)
+
+    text = values.astype(object).where(values.notna(), "").astype(str).str.strip()
+    codes, uniques = pd.factorize(text)
+    unique_values = pd.Series(uniques, dtype=object)
+
+    parsed = pd.to_datetime(unique_values, format=SOURCE_DATE_FORMAT, errors="coerce")
+    pending = parsed.isna()
+    if pending.any():
+        parsed[pending] = pd.to_datetime(unique_values[pending], format=ISO_DATE_FORMAT, errors="coerce")
+
+    formatted = parsed.dt.strftime(ISO_DATE_FORMAT).fillna("").to_numpy(dtype=object)
+    invalid = int(((parsed.isna()) & (unique_values != "")).sum())
+    if invalid:
+        logger.warning(f"{invalid} valores distintos de DataValidade não reconhecidos")
+    return pd.Series(formatted[codes], index=values.index, dtype=object)
+
+
+def normalize_status(values: pd.Series) -> pd.Series:
+    """
+    Mapeia Situacao para os valores canônicos de CertificateStatus (categoria).
+
+    Variações de acento e maiúsculas são unificadas; valores desconhecidos
+    são mantidos como vieram (sem espaços nas pontas).
+    """
+    text = values.astype(object).where(values.notna(), "").astype(str).str.strip()
+    codes, uniques = pd.factorize(text)
+    mapped = np.array(
+        [_STATUS_BY_KEY.get(_status_key(value), value) for value in uniques],
+        dtype=object
+    )
+    categories = [status.value for status in CertificateStatus]
+    categories += sorted(set(mapped) - set(categories))
+    return pd.Series(
+        pd.Categorical(mapped[codes], categories=categories),
+        index=values.index
+    )
+
+
+def normalize_certificates(df: pd.DataFrame) -> pd.DataFrame:
+    """Normaliza DataValidade e Situacao do DataFrame de certificados (in place)"""
+    if df is None or df.empty:
+        return df
+    if "DataValidade" in df.columns:
+        df["DataValidade"] = normalize_dates(df["DataValidade"])
+    if "Situacao" in df.columns:
+        df["Situacao"] = normalize_status(df["Situacao"])
+    return df
+
+
+def sort_by_registro(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ordena as linhas por RegistroCA (valores inválidos para `parse_registro`
+    ao final).
+
+    A ordenação é estável, então duplicatas mantêm a ordem do arquivo. Com as
+    linhas em ordem de CA, o cache Parquet pode ser lido por faixa de chaves
+    e o conteúdo (e a versão) não depende de onde o DataFrame foi carregado.
+    """
+    if df is None or df.empty or "RegistroCA" not in df.columns:
+        return df
+    keys, valid = registro_keys(df["RegistroCA"])
+    if valid.all() and (keys[1:] >= keys[:-1]).all():
+        return df
+    # lexsort é estável; a última chave é a principal
+    order = np.lexsort((keys, ~valid))
+    return df.iloc[order].reset_index(drop=True)
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - fcntl só existe em sistemas POSIX
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Execução única de uma operação assíncrona por chave dentro do processo.
+
+    Chamadas concorrentes com a mesma chave aguardam a mesma tarefa em vez de
+    repetir o trabalho. A tarefa é protegida contra cancelamento: se quem a
+    iniciou desistir (ex: cliente desconectado), os demais continuam
+    aguardando o mesmo resultado.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(self, key: str, func: Callable[..., Awaitable[Any]], *args) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args))
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            logger.debug(f"Aguardando operação '{key}' já em andamento")
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Evita o aviso de exceção não recuperada quando ninguém aguardava a tarefa
+        if not task.cancelled():
+            task.exception()
+
+
+class RefreshTurn:
+    """Vez de um processo na atualização, obtida de RefreshCoordinator.acquire"""
+
+    def __init__(self, coordinator: "RefreshCoordinator", requested_at: float):
+        self.coordinator = coordinator
+        self.requested_at = requested_at
+        self.last_refresh = coordinator.read_state()
+
+    def refreshed_by_other(self) -> bool:
+        """Indica se outro processo concluiu uma atualização enquanto esta vez era aguardada"""
+        return self.last_refresh is not None and self.last_refresh.get("finished_at", 0) >= self.requested_at
+
+    def record_refresh(self, success: bool, generation: Optional[int]):
+        """Registra o resultado da atualização para os processos que aguardam a vez"""
+        self.coordinator.write_state({
+            "success": success,
+            "generation": generation,
+            "finished_at": time.time(),
+            "pid": os.getpid(),
+        })
+
+
+class RefreshCoordinator:
+    """
+    Coordena entre processos (ex: workers do Gunicorn) a carga e a
+    atualização da base, para que apenas um deles baixe, processe e publique.
+
+    A vez é uma trava exclusiva (flock) em `cache_dir/refresh.lock`: quem a
+    obtém faz o trabalho e registra o resultado em `cache_dir/refresh.json`;
+    os demais aguardam a liberação e, ao obter a vez, verificam se a
+    atualização já foi feita para apenas usar a geração publicada. A trava é
+    liberada pelo sistema operacional se o processo morrer, então uma
+    atualização interrompida nunca bloqueia os demais.
+
+    Dentro do processo, as vezes são serializadas por um asyncio.Lock; sem
+    fcntl (fora de sistemas POSIX) a coordenação fica restrita ao processo.
+    """
+
+    LOCK_FILE = "refresh.lock"
+    STATE_FILE = "refresh.json"
+
+    def __init__(self, cache_dir: str, poll_interval: float = 0.5):
+        self.lock_path = Path(cache_dir) / self.LOCK_FILE
+        self.state_path = Path(cache_dir) / self.STATE_FILE
+        self.poll_interval = poll_interval
+        self._local_lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[RefreshTurn]:
+        """
+        Aguarda a vez deste processo e a mantém durante o bloco `async with`.
+
+        A espera não ocupa threads: a trava é tentada sem bloqueio a cada
+        `poll_interval` segundos.
+        """
+        requested_at = time.time()
+        async with self._local_lock:
+            lock_file = await self._lock()
+            try:
+                yield RefreshTurn(self, requested_at)
+            finally:
+                if lock_file is not None:
+                    lock_file.close()
+
+    def read_state(self) -> Optional[Dict[str, Any]]:
+        """Resultado da última atualização registrada, ou None"""
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Erro ao ler registro da última atualização: {e}")
+            return None
+
+    def write_state(self, state: Dict[str, Any]):
+        tmp_path = self.state_path.with_name(f"{self.STATE_FILE}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            logger.warning(f"Erro ao registrar resultado da atualização: {e}")
+
+    async def _lock(self):
+        if fcntl is None:
+            return None
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.lock_path, "a+b")
+        waiting = False
+        try:
+            while True:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if not waiting:
+                        logger.info("Atualização da base em andamento em outro processo; aguardando")
+                        waiting = True
+                    await asyncio.sleep(self.poll_interval)
+        except BaseException:
+            lock_file.close()
+            raise
+        if waiting:
+            logger.info("Atualização do outro processo concluída")
+        return lock_file
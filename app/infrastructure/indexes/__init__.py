@@ -0,0 +1,10 @@
+"""
+Estruturas de índice em memória para consultas rápidas aos certificados CA.
+"""
+
+from .certificate_index import CertificateIndex
+from .filter_index import CertificateFilterIndex
+from .text_index import CertificateTextIndex
+from .key_filter import KeyFilter
+
+__all__ = ['CertificateIndex', 'CertificateFilterIndex', 'CertificateTextIndex', 'KeyFilter']
@@ -0,0 +1,294 @@
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.domain.entities.certificate_status import CertificateStatus
+from app.infrastructure.cache.shared_dataset import StringColumn, load_array, prefault
+from app.infrastructure.datasources.normalization import (
+    ISO_DATE_FORMAT, normalize_dates, normalize_status, parse_registro, registro_keys
+)
+from app.infrastructure.indexes.key_filter import KeyFilter
+
+logger = logging.getLogger(__name__)
+
+# Acima deste valor de RegistroCA a tabela de endereçamento direto ficaria
+# grande demais e a busca passa a ser binária sobre as chaves ordenadas.
+MAX_DIRECT_TABLE_SIZE = 10_000_000
+
+# Dia (desde 1970-01-01) usado para certificados sem DataValidade reconhecida
+NO_DATE = np.iinfo(np.int32).min
+
+# Código da situação (posição em CertificateStatus, -1 se desconhecida) ->
+# a validade depende apenas da data. Cancelado e Em análise nunca são válidos.
+# O último elemento atende o código -1.
+_DATED_STATUS = np.array(
+    [status in (CertificateStatus.VALIDO, CertificateStatus.VENCIDO) for status in CertificateStatus] + [False]
+)
+
+
+class CertificateIndex:
+    """
+    Índice compacto de certificados por RegistroCA.
+
+    Construído uma vez por versão do dataset. As chaves numéricas ficam em um
+    array ordenado e os campos servidos pela API em arrays alinhados a ele, de
+    modo que uma consulta não aloca nenhum objeto do pandas.
+
+    Quando a faixa de números de CA é pequena o suficiente, uma tabela de
+    endereçamento direto (RegistroCA -> posição) torna a consulta O(1).
+    Um KeyFilter (bitmap ou Bloom) descarta CAs inexistentes e entradas não
+    numéricas antes de qualquer consulta.
+
+    Para a validade em uma data de referência, a DataValidade também é
+    guardada como número de dias (int32) e a situação como código (int8),
+    de modo que a verificação de muitos CAs é uma única comparação vetorizada.
+
+    Todos os arrays podem ser gravados com `save` e reabertos com `load`
+    mapeados em memória, compartilhados entre processos.
+    """
+
+    def __init__(
+        self,
+        keys: np.ndarray,
+        rows: np.ndarray,
+        data_validade,
+        situacao,
+        direct: Optional[np.ndarray] = None,
+        key_filter: Optional[KeyFilter] = None,
+        expiration_days: Optional[np.ndarray] = None,
+        status_codes: Optional[np.ndarray] = None,
+    ):
+        self.keys = keys
+        self.rows = rows
+        self.data_validade = data_validade
+        self.situacao = situacao
+        self._direct = direct
+        self.key_filter = key_filter
+        if expiration_days is None:
+            expiration_days = self._expiration_days(data_validade)
+        if status_codes is None:
+            status_codes = self._status_codes(situacao)
+        self.expiration_days = expiration_days
+        self.status_codes = status_codes
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "CertificateIndex":
+        """
+        Constrói o índice a partir do DataFrame de certificados.
+
+        Registros cujo RegistroCA não é aceito por `parse_registro` são
+        ignorados; em caso de duplicatas, prevalece a primeira ocorrência (mesmo comportamento da
+        busca anterior com DataFrame.loc).
+        """
+        if df is None or df.empty:
+            empty = np.array([], dtype=object)
+            keys = np.array([], dtype=np.int64)
+            return cls(keys, np.array([], dtype=np.int64), empty, empty, key_filter=KeyFilter.build(keys))
+
+        keys, valid = registro_keys(df['RegistroCA'])
+        keys = keys[valid]
+        rows = np.flatnonzero(valid).astype(np.int64)
+
+        # Ordenação estável preserva a primeira ocorrência de cada chave
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        rows = rows[order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        duplicates = int(len(keys) - first.sum())
+        if duplicates:
+            logger.debug(f"{duplicates} registros CA duplicados ignorados no índice")
+        keys = keys[first]
+        rows = rows[first]
+
+        # Idempotente: dados vindos da ingestão já estão normalizados
+        data_validade = normalize_dates(df['DataValidade'].iloc[rows]).to_numpy(dtype=object)
+        situacao = normalize_status(df['Situacao'].iloc[rows])
+
+        index = cls(
+            keys, rows, data_validade, situacao.to_numpy(dtype=object),
+            cls._build_direct_table(keys), KeyFilter.build(keys),
+            status_codes=cls._status_codes(situacao),
+        )
+        logger.info(f"Índice de certificados construído com {len(index)} chaves")
+        return index
+
+    @classmethod
+    def load(cls, directory: Path) -> "CertificateIndex":
+        """Abre um índice gravado com `save`, mapeando os arrays em memória"""
+        direct_path = directory / "index.direct.npy"
+        return cls(
+            load_array(directory / "index.keys.npy"),
+            load_array(directory / "index.rows.npy"),
+            StringColumn.load(directory, "index.data_validade"),
+            StringColumn.load(directory, "index.situacao"),
+            load_array(direct_path) if direct_path.exists() else None,
+            KeyFilter.load(directory),
+            load_array(directory / "index.expiration_days.npy"),
+            load_array(directory / "index.status_codes.npy"),
+        )
+
+    def prefault(self):
+        """Traz os arrays mapeados do índice para a memória (camada quente)"""
+        key_filter_bits = self.key_filter.bits if self.key_filter is not None else None
+        for array in (self.keys, self.rows, self._direct, key_filter_bits, self.expiration_days, self.status_codes):
+            if array is not None:
+                prefault(array)
+        for column in (self.data_validade, self.situacao):
+            if isinstance(column, StringColumn):
+                prefault(column.data)
+                prefault(column.offsets)
+
+    def save(self, directory: Path):
+        """Grava os arrays do índice em `directory` (formato .npy)"""
+        np.save(directory / "index.keys.npy", self.keys)
+        np.save(directory / "index.rows.npy", self.rows)
+        StringColumn.from_values(self.data_validade).save(directory, "index.data_validade")
+        StringColumn.from_values(self.situacao).save(directory, "index.situacao")
+        np.save(directory / "index.expiration_days.npy", self.expiration_days)
+        np.save(directory / "index.status_codes.npy", self.status_codes)
+        if self._direct is not None:
+            np.save(directory / "index.direct.npy", self._direct)
+        if self.key_filter is not None:
+            self.key_filter.save(directory)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def might_contain(self, registro_ca: str) -> bool:
+        """
+        Teste rápido de existência de um RegistroCA (já sem espaços).
+
+        False garante que o certificado não existe (entrada não numérica ou
+        ausente do filtro); True deve ser confirmado com `find`.
+        """
+        key = parse_registro(registro_ca)
+        if key is None:
+            return False
+        if self.key_filter is None:
+            return True
+        return self.key_filter.might_contain(key)
+
+    def find(self, registro_ca: str) -> Optional[int]:
+        """
+        Localiza a posição de um RegistroCA no índice.
+
+        Returns:
+            Posição nos arrays compactos ou None se não encontrado
+        """
+        key = parse_registro(registro_ca)
+        if key is None:
+            return None
+
+        if self._direct is not None:
+            if 0 <= key < len(self._direct):
+                position = int(self._direct[key])
+                return position if position >= 0 else None
+            return None
+
+        position = int(np.searchsorted(self.keys, key))
+        if position < len(self.keys) and self.keys[position] == key:
+            return position
+        return None
+
+    def find_many(self, registros_ca: List[str]) -> np.ndarray:
+        """
+        Localiza vários RegistroCA de uma só vez (operação vetorizada).
+
+        As chaves são interpretadas por `parse_registro`, as mesmas regras de
+        `find` e `might_contain`: entradas como "1e3" ou "+123" não localizam
+        nenhum certificado.
+
+        Returns:
+            Array com a posição de cada chave no índice, ou -1 se não encontrada
+            ou inválida
+        """
+        keys, valid = registro_keys(registros_ca)
+        positions = np.full(len(keys), -1, dtype=np.int64)
+        keys = keys[valid]
+
+        if self._direct is not None:
+            in_range = (keys >= 0) & (keys < len(self._direct))
+            found = np.full(len(keys), -1, dtype=np.int64)
+            found[in_range] = self._direct[keys[in_range]]
+        else:
+            candidates = np.searchsorted(self.keys, keys)
+            candidates = np.minimum(candidates, max(len(self.keys) - 1, 0))
+            found = np.full(len(keys), -1, dtype=np.int64)
+            if len(self.keys):
+                match = self.keys[candidates] == keys
+                found[match] = candidates[match]
+
+        positions[valid] = found
+        return positions
+
+    def record(self, position: int) -> Tuple[str, str, str]:
+        """Retorna (registro_ca, data_validade, situacao) da posição informada"""
+        return str(self.keys[position]), self.data_validade[position], self.situacao[position]
+
+    def records(self, positions: np.ndarray) -> Tuple[List[str], List[str], List[str]]:
+        """Versão vetorizada de `record`: (registros_ca, datas_validade, situacoes) das posições"""
+        positions = np.asarray(positions, dtype=np.int64)
+        return (
+            self.keys[positions].astype(str).tolist(),
+            self._take(self.data_validade, positions),
+            self._take(self.situacao, positions),
+        )
+
+    def validity(self, positions: np.ndarray, reference_day: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Validade das posições informadas em uma data de referência.
+
+        Um certificado é válido na data se a situação é Válido ou Vencido
+        (a situação do arquivo reflete a data da extração) e a DataValidade
+        não é anterior à data de referência.
+
+        Args:
+            positions: Posições no índice
+            reference_day: Data de referência em dias desde 1970-01-01
+
+        Returns:
+            Tupla (válido em cada posição, dias até o vencimento - negativo se
+            já vencido; NO_DATE quando não há DataValidade)
+        """
+        expiration = self.expiration_days[positions]
+        has_date = expiration != NO_DATE
+        expires_in = np.where(has_date, expiration.astype(np.int64) - reference_day, NO_DATE)
+        valid = _DATED_STATUS[self.status_codes[positions]] & has_date & (expires_in >= 0)
+        return valid, expires_in
+
+    @staticmethod
+    def _take(column, positions: np.ndarray) -> List[str]:
+        if isinstance(column, StringColumn):
+            return column.take(positions).tolist()
+        return np.asarray(column, dtype=object)[positions].tolist()
+
+    @staticmethod
+    def _expiration_days(data_validade) -> np.ndarray:
+        """DataValidade (texto ISO) -> dias desde 1970-01-01 (int32), NO_DATE se ausente"""
+        values = pd.Series(np.asarray(data_validade, dtype=object), dtype=object)
+        parsed = pd.to_datetime(values, format=ISO_DATE_FORMAT, errors='coerce')
+        days = np.full(len(values), NO_DATE, dtype=np.int32)
+        present = parsed.notna().to_numpy()
+        days[present] = parsed[present].to_numpy().astype('datetime64[D]').astype(np.int64)
+        return days
+
+    @staticmethod
+    def _status_codes(situacao) -> np.ndarray:
+        """Situação -> posição em CertificateStatus (int8), -1 se desconhecida"""
+        if not isinstance(situacao, pd.Series) or not isinstance(situacao.dtype, pd.CategoricalDtype):
+            situacao = normalize_status(pd.Series(np.asarray(situacao, dtype=object), dtype=object))
+        # As categorias de normalize_status começam pelos valores de CertificateStatus
+        codes = situacao.cat.codes.to_numpy()
+        return np.where(codes < len(CertificateStatus), codes, -1).astype(np.int8)
+
+    @staticmethod
+    def _build_direct_table(keys: np.ndarray) -> Optional[np.ndarray]:
+        if len(keys) == 0 or keys[0] < 0 or keys[-1] >= MAX_DIRECT_TABLE_SIZE:
+            return None
+        table = np.full(int(keys[-1]) + 1, -1, dtype=np.int32)
+        table[keys] = np.arange(len(keys), dtype=np.int32)
+        return table
@@ -0,0 +1,305 @@
+import bisect
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.infrastructure.cache.shared_dataset import StringColumn, load_array, to_text
+from app.infrastructure.indexes.postings import decode_terms, drop_unused_terms
+from app.infrastructure.indexes.text import fold, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Filtro da API -> coluna do CAEPI
+CATEGORY_FIELDS = {"situacao": "Situacao", "natureza": "Natureza", "cor": "Cor"}
+TOKEN_FIELDS = {"razao_social": "RazaoSocial", "marca_ca": "MarcaCA", "nome_equipamento": "NomeEquipamento"}
+CNPJ_FIELD = "CNPJ"
+
+FILTER_FIELDS = list(CATEGORY_FIELDS) + list(TOKEN_FIELDS) + ["cnpj"]
+
+
+class CategoryIndex:
+    """Códigos de categoria por documento (valores normalizados com `fold`)"""
+
+    def __init__(self, codes: np.ndarray, categories):
+        self.codes = codes
+        self.categories = categories
+        self._lookup: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def build(cls, values: List[str]) -> "CategoryIndex":
+        # `fold` só é aplicado aos valores distintos
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        folded = pd.Series([fold(value).strip() for value in uniques], dtype=object)
+        folded_codes, categories = pd.factorize(folded)
+        return cls(folded_codes[codes].astype(np.int32), np.asarray(categories, dtype=object))
+
+    def code(self, value: str) -> Optional[int]:
+        if self._lookup is None:
+            self._lookup = {self.categories[i]: i for i in range(len(self.categories))}
+        return self._lookup.get(fold(value).strip())
+
+    def save(self, directory: Path, name: str):
+        np.save(directory / f"{name}.codes.npy", self.codes)
+        StringColumn.from_values(self.categories).save(directory, f"{name}.categories")
+
+    @classmethod
+    def load(cls, directory: Path, name: str) -> "CategoryIndex":
+        return cls(load_array(directory / f"{name}.codes.npy"), StringColumn.load(directory, f"{name}.categories"))
+
+
+class TokenIndex:
+    """
+    Índice invertido de tokens: vocabulário ordenado e listas de documentos
+    (posting lists) em formato CSR, com os ids de documento em ordem crescente.
+    """
+
+    def __init__(self, terms, offsets: np.ndarray, docs: np.ndarray):
+        self.terms = terms
+        self.offsets = offsets
+        self.docs = docs
+        self._vocabulary: Optional[List[str]] = None
+
+    @classmethod
+    def build(
+        cls, values: List[str], base: Optional["TokenIndex"] = None, doc_map: Optional[np.ndarray] = None
+    ) -> "TokenIndex":
+        """
+        Tokeniza o valor de cada documento e monta as posting lists.
+
+        Com `base` e `doc_map` (documento de `base` -> mesmo documento neste
+        índice, ou -1 se alterado/removido), apenas os documentos novos ou
+        alterados são tokenizados; os pares termo-documento dos demais são
+        copiados de `base`.
+        """
+        term_ids: Dict[str, int] = {}
+        base_terms = base_docs = np.array([], dtype=np.int64)
+        docs = range(len(values))
+        if base is not None and doc_map is not None:
+            term_ids = {term: term_id for term_id, term in enumerate(base.vocabulary)}
+            base_terms = np.repeat(np.arange(len(term_ids), dtype=np.int64), np.diff(base.offsets))
+            base_docs = doc_map[base.docs]
+            kept = base_docs >= 0
+            base_terms, base_docs = base_terms[kept], base_docs[kept]
+            fresh = np.ones(len(values), dtype=bool)
+            fresh[doc_map[doc_map >= 0]] = False
+            docs = np.flatnonzero(fresh).tolist()
+
+        pair_terms, pair_docs = [], []
+        for doc in docs:
+            for token in set(tokenize(values[doc])):
+                pair_terms.append(term_ids.setdefault(token, len(term_ids)))
+                pair_docs.append(doc)
+
+        # Renumerar os termos em ordem alfabética (permite busca por prefixo)
+        vocabulary = sorted(term_ids)
+        rank = np.empty(len(vocabulary), dtype=np.int64)
+        rank[[term_ids[term] for term in vocabulary]] = np.arange(len(vocabulary))
+
+        pair_terms = rank[np.concatenate((base_terms, np.asarray(pair_terms, dtype=np.int64)))]
+        pair_docs = np.concatenate((base_docs, np.asarray(pair_docs, dtype=np.int64))).astype(np.int32)
+        vocabulary, pair_terms, counts = drop_unused_terms(vocabulary, pair_terms)
+        # Documentos de cada termo em ordem crescente
+        order = np.lexsort((pair_docs, pair_terms))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(np.asarray(vocabulary, dtype=object), offsets, pair_docs[order])
+
+    @property
+    def vocabulary(self) -> List[str]:
+        if self._vocabulary is None:
+            self._vocabulary = decode_terms(self.terms)
+        return self._vocabulary
+
+    def postings(self, term_id: int) -> np.ndarray:
+        return self.docs[self.offsets[term_id]:self.offsets[term_id + 1]]
+
+    def lookup(self, token: str, prefix: bool = True) -> np.ndarray:
+        """
+        Documentos que contêm o token (ou, com `prefix`, algum token iniciado por ele).
+
+        Returns:
+            Array ordenado de ids de documento
+        """
+        vocabulary = self.vocabulary
+        start = bisect.bisect_left(vocabulary, token)
+        end = bisect.bisect_left(vocabulary, token + "\uffff") if prefix else start + 1
+        if start >= len(vocabulary) or (not prefix and vocabulary[start] != token):
+            return np.array([], dtype=np.int32)
+        if end - start == 1:
+            return self.postings(start)
+        return np.unique(self.docs[self.offsets[start]:self.offsets[end]])
+
+    def save(self, directory: Path, name: str):
+        StringColumn.from_values(self.terms).save(directory, f"{name}.terms")
+        np.save(directory / f"{name}.offsets.npy", self.offsets)
+        np.save(directory / f"{name}.docs.npy", self.docs)
+
+    @classmethod
+    def load(cls, directory: Path, name: str) -> "TokenIndex":
+        return cls(
+            StringColumn.load(directory, f"{name}.terms"),
+            load_array(directory / f"{name}.offsets.npy"),
+            load_array(directory / f"{name}.docs.npy"),
+        )
+
+
+class CertificateFilterIndex:
+    """
+    Índices para busca de certificados por múltiplos campos.
+
+    Os documentos são as posições do CertificateIndex (um por RegistroCA),
+    então os ids resultantes já estão em ordem de RegistroCA e apontam
+    diretamente para os campos servidos pela API.
+
+    - Situacao, Natureza e Cor: código de categoria por documento
+    - CNPJ: chaves numéricas ordenadas (busca binária)
+    - RazaoSocial, MarcaCA e NomeEquipamento: tokens sem acento, com busca por prefixo
+
+    Uma consulta intersecta as posting lists dos filtros de texto/CNPJ (da
+    menor para a maior) e só então aplica os filtros de categoria sobre os
+    candidatos restantes, sem varrer as strings do dataset.
+    """
+
+    def __init__(
+        self,
+        categories: Dict[str, CategoryIndex],
+        tokens: Dict[str, TokenIndex],
+        cnpj_keys: np.ndarray,
+        cnpj_docs: np.ndarray,
+        size: int,
+    ):
+        self.categories = categories
+        self.tokens = tokens
+        self.cnpj_keys = cnpj_keys
+        self.cnpj_docs = cnpj_docs
+        self.size = size
+
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: pd.DataFrame,
+        rows: np.ndarray,
+        base: Optional["CertificateFilterIndex"] = None,
+        doc_map: Optional[np.ndarray] = None,
+    ) -> "CertificateFilterIndex":
+        """
+        Constrói os índices a partir do DataFrame.
+
+        Args:
+            df: DataFrame de certificados
+            rows: Linha do DataFrame de cada documento (CertificateIndex.rows)
+            base: Índices da geração anterior (opcional)
+            doc_map: Documento de `base` -> documento com o mesmo conteúdo,
+                ou -1. Com `base`, os índices de tokens só tokenizam os
+                documentos novos ou alterados.
+        """
+        def values(column: str) -> List[str]:
+            if column not in df.columns:
+                return [""] * len(rows)
+            return to_text(df[column].to_numpy(dtype=object)[rows])
+
+        categories = {field: CategoryIndex.build(values(column)) for field, column in CATEGORY_FIELDS.items()}
+        tokens = {
+            field: TokenIndex.build(
+                values(column),
+                base.tokens[field] if base is not None else None,
+                doc_map
+            )
+            for field, column in TOKEN_FIELDS.items()
+        }
+
+        cnpj = pd.to_numeric(
+            pd.Series(values(CNPJ_FIELD), dtype=object).str.replace(r"\D", "", regex=True),
+            errors="coerce"
+        ).to_numpy(dtype=np.float64)
+        valid = np.flatnonzero(~np.isnan(cnpj))
+        cnpj_keys = cnpj[valid].astype(np.int64)
+        order = np.argsort(cnpj_keys, kind="stable")
+
+        index = cls(categories, tokens, cnpj_keys[order], valid[order].astype(np.int32), len(rows))
+        logger.info(
+            "Índices de filtro construídos: "
+            + ", ".join(f"{field}={len(token_index.offsets) - 1} termos" for field, token_index in tokens.items())
+        )
+        return index
+
+    def search(self, filters: Dict[str, str]) -> np.ndarray:
+        """
+        Retorna os documentos que atendem a todos os filtros informados.
+
+        Filtros de texto exigem que todos os termos apareçam (prefixo por
+        termo); filtros de categoria comparam o valor inteiro, sem acentos.
+
+        Returns:
+            Array ordenado de ids de documento (posições do CertificateIndex)
+        """
+        postings: List[np.ndarray] = []
+        category_filters = []
+
+        for field, value in filters.items():
+            if value is None or not str(value).strip():
+                continue
+            value = str(value)
+            if field in self.categories:
+                code = self.categories[field].code(value)
+                if code is None:
+                    return np.array([], dtype=np.int32)
+                category_filters.append((self.categories[field].codes, code))
+            elif field in self.tokens:
+                terms = tokenize(value)
+                if not terms:
+                    return np.array([], dtype=np.int32)
+                postings.extend(self.tokens[field].lookup(term) for term in terms)
+            elif field == "cnpj":
+                postings.append(self._lookup_cnpj(value))
+            else:
+                raise ValueError(f"Filtro desconhecido: {field}")
+
+        if postings:
+            postings.sort(key=len)
+            result = postings[0]
+            for docs in postings[1:]:
+                if len(result) == 0:
+                    break
+                result = np.intersect1d(result, docs, assume_unique=True)
+            for codes, code in category_filters:
+                result = result[codes[result] == code]
+            return result
+
+        if category_filters:
+            mask = np.ones(self.size, dtype=bool)
+            for codes, code in category_filters:
+                mask &= codes == code
+            return np.flatnonzero(mask).astype(np.int32)
+
+        return np.arange(self.size, dtype=np.int32)
+
+    def _lookup_cnpj(self, value: str) -> np.ndarray:
+        digits = "".join(char for char in value if char.isdigit())
+        if not digits:
+            return np.array([], dtype=np.int32)
+        key = int(digits)
+        start = np.searchsorted(self.cnpj_keys, key, side="left")
+        end = np.searchsorted(self.cnpj_keys, key, side="right")
+        return np.sort(self.cnpj_docs[start:end])
+
+    def save(self, directory: Path):
+        for field, category_index in self.categories.items():
+            category_index.save(directory, f"filter.{field}")
+        for field, token_index in self.tokens.items():
+            token_index.save(directory, f"filter.{field}")
+        np.save(directory / "filter.cnpj.keys.npy", self.cnpj_keys)
+        np.save(directory / "filter.cnpj.docs.npy", self.cnpj_docs)
+
+    @classmethod
+    def load(cls, directory: Path, size: int) -> "CertificateFilterIndex":
+        return cls(
+            {field: CategoryIndex.load(directory, f"filter.{field}") for field in CATEGORY_FIELDS},
+            {field: TokenIndex.load(directory, f"filter.{field}") for field in TOKEN_FIELDS},
+            load_array(directory / "filter.cnpj.keys.npy"),
+            load_array(directory / "filter.cnpj.docs.npy"),
+            size,
+        )
@@ -0,0 +1,90 @@
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from app.infrastructure.cache.shared_dataset import load_array
+
+logger = logging.getLogger(__name__)
+
+# Até este valor de RegistroCA o filtro é um bitmap exato (no máximo 32 MB);
+# acima dele, um filtro de Bloom com BLOOM_BITS_PER_KEY bits por chave.
+MAX_BITMAP_KEY = 256 * 1024 * 1024
+BLOOM_BITS_PER_KEY = 10
+BLOOM_HASHES = 7
+
+_MASK64 = (1 << 64) - 1
+_HASH_A = 0x9E3779B97F4A7C15
+_HASH_B = 0xC2B2AE3D27D4EB4F
+
+
+class KeyFilter:
+    """
+    Teste de pertinência compacto para RegistroCA, construído por geração.
+
+    Descarta chaves inexistentes antes de qualquer acesso ao índice ou às
+    colunas. Com a faixa de CAs usual o filtro é um bitmap (1 bit por número
+    de CA, sem falsos positivos); para chaves muito grandes ou esparsas vira
+    um filtro de Bloom, em que um resultado positivo ainda precisa ser
+    confirmado no índice.
+    """
+
+    def __init__(self, bits: np.ndarray, hashes: int):
+        self.bits = bits
+        self.hashes = hashes
+        self.size = len(bits) * 8
+        # Indexar um memoryview devolve int do Python, sem criar escalares numpy
+        self._view = memoryview(bits)
+
+    @classmethod
+    def build(cls, keys: np.ndarray) -> "KeyFilter":
+        """Constrói o filtro a partir das chaves ordenadas do CertificateIndex"""
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(keys) == 0 or (keys[0] >= 0 and keys[-1] < MAX_BITMAP_KEY):
+            size = int(keys[-1]) + 1 if len(keys) else 1
+            present = np.zeros(size, dtype=bool)
+            present[keys] = True
+            key_filter = cls(np.packbits(present, bitorder="little"), 0)
+        else:
+            size = max(64, len(keys) * BLOOM_BITS_PER_KEY)
+            bits = np.zeros((size + 7) // 8, dtype=np.uint8)
+            for position in cls._positions(keys.astype(np.uint64), len(bits) * 8, BLOOM_HASHES):
+                np.bitwise_or.at(bits, position >> 3, (1 << (position & 7)).astype(np.uint8))
+            key_filter = cls(bits, BLOOM_HASHES)
+
+        kind = f"Bloom ({key_filter.hashes} hashes)" if key_filter.hashes else "bitmap"
+        logger.info(f"Filtro de chaves construído: {kind}, {key_filter.bits.nbytes / 1024:.0f} KB")
+        return key_filter
+
+    def might_contain(self, key: int) -> bool:
+        """False garante que a chave não existe; True (no Bloom) ainda pode ser falso positivo"""
+        if self.hashes == 0:
+            if key < 0 or key >= self.size:
+                return False
+            return bool(self._view[key >> 3] >> (key & 7) & 1)
+
+        key &= _MASK64
+        h1 = (key * _HASH_A) & _MASK64
+        h2 = ((key * _HASH_B) & _MASK64) | 1
+        for i in range(self.hashes):
+            position = ((h1 + i * h2) & _MASK64) % self.size
+            if not self._view[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+    @staticmethod
+    def _positions(keys: np.ndarray, size: int, hashes: int):
+        # Mesmo esquema de `might_contain` (aritmética módulo 2^64), vetorizado
+        h1 = keys * np.uint64(_HASH_A)
+        h2 = (keys * np.uint64(_HASH_B)) | np.uint64(1)
+        for i in range(hashes):
+            yield ((h1 + np.uint64(i) * h2) % np.uint64(size)).astype(np.int64)
+
+    def save(self, directory: Path):
+        np.save(directory / "index.filter.bits.npy", self.bits)
+        np.save(directory / "index.filter.hashes.npy", np.array([self.hashes], dtype=np.int64))
+
+    @classmethod
+    def load(cls, directory: Path) -> "KeyFilter":
+        hashes = int(np.load(directory / "index.filter.hashes.npy")[0])
+        return cls(load_array(directory / "index.filter.bits.npy"), hashes)
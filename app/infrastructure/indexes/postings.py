@@ -0,0 +1,31 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from app.infrastructure.cache.shared_dataset import StringColumn
+
+
+def decode_terms(terms) -> List[str]:
+    """Vocabulário de um índice invertido como lista (decodificado de uma vez)"""
+    if isinstance(terms, StringColumn):
+        return terms.to_numpy().tolist()
+    return list(terms)
+
+
+def drop_unused_terms(vocabulary: List[str], pair_terms: np.ndarray) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Remove do vocabulário (ordenado) os termos sem nenhum documento.
+
+    Acontece na construção incremental, quando todos os documentos de um
+    termo da geração anterior foram alterados ou removidos.
+
+    Returns:
+        Tupla (vocabulário, termo de cada par renumerado, documentos por termo)
+    """
+    counts = np.bincount(pair_terms, minlength=len(vocabulary))
+    used = counts > 0
+    if used.all():
+        return vocabulary, pair_terms, counts
+    rank = np.cumsum(used) - 1
+    vocabulary = [term for term, keep in zip(vocabulary, used.tolist()) if keep]
+    return vocabulary, rank[pair_terms], counts[used]
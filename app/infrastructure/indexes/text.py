@@ -0,0 +1,45 @@
+import re
+import unicodedata
+from typing import List
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def fold(value: str) -> str:
+    """Normaliza o texto para comparação: minúsculas e sem acentos"""
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(value: str) -> List[str]:
+    """Quebra o texto normalizado em tokens alfanuméricos"""
+    return _TOKEN_PATTERN.findall(fold(value))
+
+
+# Palavras sem valor de busca em nomes e descrições de EPIs
+STOPWORDS = frozenset({
+    "a", "ao", "aos", "as", "com", "contra", "da", "das", "de", "do", "dos",
+    "e", "em", "na", "nas", "no", "nos", "o", "os", "ou", "para", "por",
+    "sem", "sob", "sobre", "um", "uma",
+})
+
+_PLURAL_RULES = (("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ois", "ol"), ("ns", "m"))
+
+
+def stem(token: str) -> str:
+    """Reduz plurais regulares do português ao singular (ex: luvas -> luva)"""
+    if len(token) <= 3 or not token.endswith("s") or token.isdigit():
+        return token
+    for suffix, replacement in _PLURAL_RULES:
+        if token.endswith(suffix):
+            return token[:-len(suffix)] + replacement
+    if token.endswith("ss") or token.endswith("us") or token.endswith("is"):
+        return token
+    return token[:-1]
+
+
+def analyze(value: str) -> List[str]:
+    """Tokens para busca textual: sem acentos, sem stopwords e no singular"""
+    return [stem(token) for token in tokenize(value) if token not in STOPWORDS]
@@ -0,0 +1,295 @@
+import logging
+import math
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.infrastructure.cache.shared_dataset import StringColumn, load_array, to_text
+from app.infrastructure.indexes.postings import decode_terms, drop_unused_terms
+from app.infrastructure.indexes.text import analyze
+
+logger = logging.getLogger(__name__)
+
+# Colunas indexadas e peso de cada ocorrência no cálculo do BM25
+TEXT_FIELDS = {"NomeEquipamento": 3, "DescricaoEquipamento": 1}
+
+# Parâmetros do BM25
+K1 = 1.2
+B = 0.75
+
+
+def vbyte_encode(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Codifica inteiros não negativos em bytes variáveis (7 bits por byte).
+
+    O bit mais alto indica que o valor continua no próximo byte.
+
+    Returns:
+        Tupla (bytes codificados, quantidade de bytes de cada valor)
+    """
+    values = values.astype(np.uint64)
+    sizes = np.ones(len(values), dtype=np.int64)
+    for shift in (7, 14, 21, 28):
+        sizes += values >= (1 << shift)
+
+    ends = np.cumsum(sizes)
+    starts = ends - sizes
+    encoded = np.empty(int(ends[-1]) if len(ends) else 0, dtype=np.uint8)
+    for k in range(5):
+        selected = sizes > k
+        if not selected.any():
+            break
+        byte = (values[selected] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        byte |= np.where(sizes[selected] > k + 1, np.uint64(0x80), np.uint64(0))
+        encoded[starts[selected] + k] = byte.astype(np.uint8)
+    return encoded, sizes
+
+
+def vbyte_decode(encoded: np.ndarray) -> np.ndarray:
+    """Decodifica um trecho gerado por `vbyte_encode` (operação vetorizada)"""
+    if len(encoded) == 0:
+        return np.array([], dtype=np.int64)
+    encoded = np.asarray(encoded)
+    group_ends = np.flatnonzero(encoded < 0x80)
+    group_starts = np.empty_like(group_ends)
+    group_starts[0] = 0
+    group_starts[1:] = group_ends[:-1] + 1
+    shift = np.arange(len(encoded)) - np.repeat(group_starts, group_ends - group_starts + 1)
+    contributions = (encoded & 0x7F).astype(np.int64) << (7 * shift)
+    return np.add.reduceat(contributions, group_starts)
+
+
+class CertificateTextIndex:
+    """
+    Índice invertido para busca textual em NomeEquipamento e DescricaoEquipamento.
+
+    Os documentos são as posições do CertificateIndex. Para cada termo
+    (sem acento, sem stopwords e no singular) a lista de documentos é gravada
+    com deltas codificados em bytes variáveis, junto da frequência do termo
+    em cada documento. A busca exige todos os termos e ordena por BM25.
+    """
+
+    def __init__(
+        self,
+        terms,
+        byte_offsets: np.ndarray,
+        posting_offsets: np.ndarray,
+        postings: np.ndarray,
+        frequencies: np.ndarray,
+        doc_lengths: np.ndarray,
+    ):
+        self.terms = terms
+        self.byte_offsets = byte_offsets
+        self.posting_offsets = posting_offsets
+        self.postings = postings
+        self.frequencies = frequencies
+        self.doc_lengths = doc_lengths
+        self.size = len(doc_lengths)
+        self._vocabulary: Optional[Dict[str, int]] = None
+        self._length_norm: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: pd.DataFrame,
+        rows: np.ndarray,
+        base: Optional["CertificateTextIndex"] = None,
+        doc_map: Optional[np.ndarray] = None,
+    ) -> "CertificateTextIndex":
+        """
+        Constrói o índice a partir do DataFrame.
+
+        Args:
+            df: DataFrame de certificados
+            rows: Linha do DataFrame de cada documento (CertificateIndex.rows)
+            base: Índice da geração anterior (opcional)
+            doc_map: Documento de `base` -> documento com o mesmo conteúdo,
+                ou -1. Com `base`, apenas os documentos novos ou alterados
+                são analisados; as ocorrências dos demais são copiadas.
+        """
+        term_ids: Dict[str, int] = {}
+        base_terms = base_docs = np.array([], dtype=np.int64)
+        base_freqs = np.array([], dtype=np.uint8)
+        doc_lengths = np.zeros(len(rows), dtype=np.int64)
+        docs = np.arange(len(rows))
+        if base is not None and doc_map is not None:
+            term_ids = {term: term_id for term_id, term in enumerate(base.vocabulary)}
+            base_terms, base_docs, base_freqs = base.pairs()
+            base_docs = doc_map[base_docs]
+            kept = base_docs >= 0
+            base_terms, base_docs, base_freqs = base_terms[kept], base_docs[kept], base_freqs[kept]
+            moved = doc_map >= 0
+            doc_lengths[doc_map[moved]] = base.doc_lengths[moved]
+            fresh = np.ones(len(rows), dtype=bool)
+            fresh[doc_map[moved]] = False
+            docs = np.flatnonzero(fresh)
+
+        fields = [
+            (to_text(df[column].to_numpy(dtype=object)[rows[docs]]), weight)
+            for column, weight in TEXT_FIELDS.items()
+            if column in df.columns
+        ]
+
+        pair_terms, pair_docs, pair_freqs = [], [], []
+        for i, doc in enumerate(docs.tolist()):
+            counts: Counter = Counter()
+            for values, weight in fields:
+                for token in analyze(values[i]):
+                    counts[token] += weight
+            doc_lengths[doc] = sum(counts.values())
+            for token, count in counts.items():
+                pair_terms.append(term_ids.setdefault(token, len(term_ids)))
+                pair_docs.append(doc)
+                pair_freqs.append(count)
+
+        vocabulary = sorted(term_ids)
+        rank = np.empty(len(vocabulary), dtype=np.int64)
+        rank[[term_ids[term] for term in vocabulary]] = np.arange(len(vocabulary))
+        pair_terms = rank[np.concatenate((base_terms, np.asarray(pair_terms, dtype=np.int64)))]
+        pair_docs = np.concatenate((base_docs, np.asarray(pair_docs, dtype=np.int64)))
+        pair_freqs = np.concatenate((
+            base_freqs,
+            np.minimum(np.asarray(pair_freqs, dtype=np.int64), 255).astype(np.uint8)
+        ))
+        vocabulary, pair_terms, term_counts = drop_unused_terms(vocabulary, pair_terms)
+
+        # Documentos de cada termo em ordem crescente
+        order = np.lexsort((pair_docs, pair_terms))
+        pair_terms, pair_docs, pair_freqs = pair_terms[order], pair_docs[order], pair_freqs[order]
+
+        posting_offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(term_counts, out=posting_offsets[1:])
+
+        # Deltas entre documentos consecutivos do mesmo termo (o primeiro é absoluto)
+        deltas = np.diff(pair_docs, prepend=0)
+        term_starts = posting_offsets[:-1][np.diff(posting_offsets) > 0]
+        deltas[term_starts] = pair_docs[term_starts]
+        postings, sizes = vbyte_encode(deltas)
+        byte_starts = np.concatenate(([0], np.cumsum(sizes)))
+        byte_offsets = byte_starts[posting_offsets]
+
+        index = cls(
+            np.asarray(vocabulary, dtype=object),
+            byte_offsets,
+            posting_offsets,
+            postings,
+            pair_freqs,
+            np.minimum(doc_lengths, np.iinfo(np.uint16).max).astype(np.uint16),
+        )
+        logger.info(
+            f"Índice textual construído: {len(vocabulary)} termos, {len(pair_docs)} ocorrências, "
+            f"{postings.nbytes / (1024 * 1024):.1f} MB de postings"
+        )
+        return index
+
+    def __len__(self) -> int:
+        return len(self.posting_offsets) - 1
+
+    @property
+    def vocabulary(self) -> List[str]:
+        return decode_terms(self.terms)
+
+    def term_id(self, term: str) -> Optional[int]:
+        if self._vocabulary is None:
+            self._vocabulary = {term: term_id for term_id, term in enumerate(self.vocabulary)}
+        return self._vocabulary.get(term)
+
+    def pairs(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Todas as ocorrências do índice, em ordem de termo.
+
+        Returns:
+            Tupla (termo, documento, frequência) de cada ocorrência
+        """
+        counts = np.diff(self.posting_offsets)
+        terms = np.repeat(np.arange(len(self), dtype=np.int64), counts)
+        # Os deltas recomeçam em cada termo: soma acumulada descontada do início do termo
+        totals = np.cumsum(vbyte_decode(self.postings))
+        starts = np.concatenate(([0], totals))[self.posting_offsets[:-1]]
+        docs = totals - np.repeat(starts, counts)
+        return terms, docs, np.asarray(self.frequencies)
+
+    def documents(self, term_id: int) -> np.ndarray:
+        """Decodifica a lista de documentos de um termo (ordem crescente)"""
+        encoded = self.postings[self.byte_offsets[term_id]:self.byte_offsets[term_id + 1]]
+        count = self.posting_offsets[term_id + 1] - self.posting_offsets[term_id]
+        if len(encoded) == count:
+            # Listas densas: todos os deltas cabem em um byte, sem decodificação
+            return np.cumsum(encoded, dtype=np.int64)
+        return np.cumsum(vbyte_decode(encoded))
+
+    def search(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Busca os documentos que contêm todos os termos da consulta.
+
+        Returns:
+            Tupla (documentos, scores BM25), ordenada por score decrescente
+            (empates pela ordem de RegistroCA)
+        """
+        terms = list(dict.fromkeys(analyze(query)))
+        term_ids = [self.term_id(term) for term in terms]
+        if not terms or any(term_id is None for term_id in term_ids):
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+
+        # Começar pelo termo mais raro: os demais só são consultados nos candidatos
+        term_ids.sort(key=lambda term_id: self.posting_offsets[term_id + 1] - self.posting_offsets[term_id])
+
+        length_norm = self._get_length_norm()
+        docs = None
+        matches = []
+        for term_id in term_ids:
+            term_docs = self.documents(term_id)
+            if docs is None:
+                docs = term_docs
+                positions = np.arange(len(term_docs))
+            else:
+                positions = np.minimum(np.searchsorted(term_docs, docs), len(term_docs) - 1)
+                found = term_docs[positions] == docs
+                docs, positions = docs[found], positions[found]
+                matches = [(tid, pos[found]) for tid, pos in matches]
+            matches.append((term_id, positions))
+            if len(docs) == 0:
+                return docs, np.array([], dtype=np.float64)
+
+        # BM25 apenas para os documentos que contêm todos os termos
+        scores = np.zeros(len(docs), dtype=np.float64)
+        norm = length_norm[docs]
+        for term_id, positions in matches:
+            start, end = self.posting_offsets[term_id], self.posting_offsets[term_id + 1]
+            document_frequency = end - start
+            idf = math.log(1 + (self.size - document_frequency + 0.5) / (document_frequency + 0.5))
+            frequencies = np.asarray(self.frequencies[start:end][positions], dtype=np.float64)
+            scores += idf * frequencies * (K1 + 1) / (frequencies + norm)
+
+        order = np.lexsort((docs, -scores))
+        return docs[order], scores[order]
+
+    def _get_length_norm(self) -> np.ndarray:
+        """K1 * (1 - B + B * dl / avgdl) de cada documento, calculado uma vez por processo"""
+        if self._length_norm is None:
+            lengths = np.asarray(self.doc_lengths, dtype=np.float64)
+            average = lengths.mean() if len(lengths) and lengths.mean() > 0 else 1.0
+            self._length_norm = K1 * (1 - B + B * lengths / average)
+        return self._length_norm
+
+    def save(self, directory: Path):
+        StringColumn.from_values(self.terms).save(directory, "text.terms")
+        np.save(directory / "text.byte_offsets.npy", self.byte_offsets)
+        np.save(directory / "text.posting_offsets.npy", self.posting_offsets)
+        np.save(directory / "text.postings.npy", self.postings)
+        np.save(directory / "text.frequencies.npy", self.frequencies)
+        np.save(directory / "text.doc_lengths.npy", self.doc_lengths)
+
+    @classmethod
+    def load(cls, directory: Path) -> "CertificateTextIndex":
+        return cls(
+            StringColumn.load(directory, "text.terms"),
+            load_array(directory / "text.byte_offsets.npy"),
+            load_array(directory / "text.posting_offsets.npy"),
+            load_array(directory / "text.postings.npy"),
+            load_array(directory / "text.frequencies.npy"),
+            load_array(directory / "text.doc_lengths.npy"),
+        )
@@ -1,57 +1,92 @@
+from app.core.metrics import INDEX_LOOKUPS, timed
 from app.domain.repositories.ca_repository_interface import CARepositoryInterface
-from app.infrastructure.datasources.data_source_interface import DataSourceInterface
+from app.infrastructure.datasources.dataset_holder import DatasetHolder
 from app.domain.entities.approve_certificate import ApproveCertificate
-from typing import Optional
+from app.domain.entities.certificate_change import CertificateChange, CertificateChangeFeed, CertificateChangeKind
+from app.domain.entities.certificate_details import CertificateDetails
+from app.domain.entities.certificate_export import CertificateExport
+from app.domain.entities.certificate_search_result import CertificateSearchResult
+from app.domain.entities.certificate_validity import CertificateValidity
+from app.domain.entities.dataset_version import DatasetVersion
+from app.infrastructure.datasources.normalization import parse_registro
+from app.infrastructure.indexes.certificate_index import NO_DATE, CertificateIndex
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Colunas descritivas do CAEPI -> campos de CertificateDetails. Ficam fora do
+# índice (camada quente) e só são lidas na consulta de detalhes.
+DETAIL_FIELDS = {
+    "NRProcesso": "nr_processo",
+    "CNPJ": "cnpj",
+    "RazaoSocial": "razao_social",
+    "Natureza": "natureza",
+    "NomeEquipamento": "nome_equipamento",
+    "DescricaoEquipamento": "descricao_equipamento",
+    "MarcaCA": "marca_ca",
+    "Referencia": "referencia",
+    "Cor": "cor",
+    "AprovadoParaLaudo": "aprovado_para_laudo",
+    "RestricaoLaudo": "restricao_laudo",
+    "ObservacaoAnaliseLaudo": "observacao_analise_laudo",
+    "CNPJLaboratorio": "cnpj_laboratorio",
+    "RazaoSocialLaboratorio": "razao_social_laboratorio",
+    "NRLaudo": "nr_laudo",
+    "Norma": "norma",
+}
+
 
 class PandasCARepository(CARepositoryInterface):
 
-    def __init__(self, data_source: DataSourceInterface):
-        self.data_source = data_source
-        self._index_df: Optional[pd.DataFrame] = None  # índice para buscas rápidas
+    def __init__(self, dataset_holder: DatasetHolder):
+        self.dataset_holder = dataset_holder
+        self.data_source = dataset_holder.data_source
 
     async def get_data(self) -> pd.DataFrame:
-        """Retorna o DataFrame completo da fonte de dados"""
-        return await self.data_source.get_data()
+        """Materializa o DataFrame completo do snapshot atual (uso eventual)"""
+        snapshot = await self.dataset_holder.get_snapshot()
+        return snapshot.table.to_dataframe()
     
-    async def _ensure_index(self):
-        """Cria índice para consultas rápidas, se ainda não existir"""
-        if self._index_df is None:
-            df = await self.get_data()
-            # Garantir que RegistroCA seja string e sem espaços
-            df['RegistroCA'] = df['RegistroCA'].astype(str).str.strip()
-            # Criar índice, mantendo coluna RegistroCA no DataFrame
-            self._index_df = df.set_index('RegistroCA', drop=False)
+    @timed("ensure_index")
+    async def _ensure_index(self) -> CertificateIndex:
+        """Retorna o índice do snapshot atual (construído uma vez por versão do dataset)"""
+        snapshot = await self.dataset_holder.get_snapshot()
+        return snapshot.index
+
+    def might_exist(self, registro_ca: str) -> bool:
+        """
+        Teste de existência sem I/O nem logs, sobre o filtro de chaves do snapshot.
+        
+        False garante que o certificado não existe na versão atual da base;
+        sem snapshot carregado a resposta é sempre True (consulta normal).
+        """
+        snapshot = self.dataset_holder.snapshot
+        return snapshot is None or snapshot.index.might_contain(registro_ca)
 
     async def get_certificate(self, registro_ca: str) -> Optional[ApproveCertificate]:
         """Busca um certificado específico pelo registro CA usando índice"""
         try:
-            await self._ensure_index()
+            index = await self._ensure_index()
             registro_ca_clean = registro_ca.strip()
+            if not index.might_contain(registro_ca_clean):
+                INDEX_LOOKUPS.inc(result="miss")
+                return None
             
             logger.debug(f"Buscando certificado: {registro_ca_clean}")
             
-            if registro_ca_clean in self._index_df.index:
-                row = self._index_df.loc[registro_ca_clean]
-                
-                # Se houver duplicatas, pegar a primeira linha
-                if isinstance(row, pd.DataFrame):
-                    row = row.iloc[0]
-                    logger.debug(f"Múltiplas entradas encontradas para {registro_ca_clean}, usando a primeira")
-                
-                # Log dos dados antes da conversão para debug
-                logger.debug(f"Dados do certificado: RegistroCA={row['RegistroCA']}, "
-                           f"DataValidade={row['DataValidade']} (tipo: {type(row['DataValidade'])}), "
-                           f"Situacao={row['Situacao']}")
+            position = index.find(registro_ca_clean)
+            INDEX_LOOKUPS.inc(result="miss" if position is None else "hit")
+            if position is not None:
+                registro, data_validade, situacao = index.record(position)
                 
                 certificate = ApproveCertificate(
-                    registro_ca=str(row['RegistroCA']),
-                    data_validade=self._format_date(row['DataValidade']),
-                    situacao=str(row['Situacao'])
+                    registro_ca=registro,
+                    data_validade=data_validade,
+                    situacao=situacao
                 )
                 
                 logger.info(f"Certificado {registro_ca_clean} encontrado com sucesso")
@@ -64,52 +99,313 @@ class PandasCARepository(CARepositoryInterface):
             logger.error(f"Erro ao buscar certificado {registro_ca}: {e}", exc_info=True)
             return None
 
-    async def update_base_certificate(self) -> bool:
-        """Atualiza a base de dados dos certificados e reinicia o índice"""
-        try:
-            success = await self.data_source.update_data()
-            if success:
-                # Resetar índice para reconstrução com dados novos
-                self._index_df = None
-            return success
-        except Exception as e:
-            print(f"Erro ao atualizar base de certificados: {e}")
-            return False
+    async def get_certificates(self, registros_ca: List[str]) -> Dict[str, Optional[ApproveCertificate]]:
+        """
+        Busca vários certificados em uma única passada vetorizada sobre o índice.
+        
+        Returns:
+            Dicionário na ordem de entrada: registro CA -> certificado (ou None)
+        """
+        index = await self._ensure_index()
+        keys = [registro_ca.strip() for registro_ca in registros_ca]
+        positions = index.find_many(keys)
+        
+        results: Dict[str, Optional[ApproveCertificate]] = {}
+        for key, position in zip(keys, positions.tolist()):
+            if position < 0:
+                results.setdefault(key, None)
+                continue
+            registro, data_validade, situacao = index.record(position)
+            results[key] = ApproveCertificate(
+                registro_ca=registro,
+                data_validade=data_validade,
+                situacao=situacao
+            )
+        
+        found = sum(1 for certificate in results.values() if certificate is not None)
+        INDEX_LOOKUPS.inc(found, result="hit")
+        INDEX_LOOKUPS.inc(len(results) - found, result="miss")
+        logger.info(f"Busca em lote: {found} de {len(results)} certificados encontrados")
+        return results
 
-    def is_data_available(self) -> bool:
-        """Verifica se há dados disponíveis na fonte"""
-        return self.data_source.is_data_loaded()
-    
-    def _format_date(self, date_value) -> str:
+    async def get_validity(
+        self, registros_ca: List[str], reference_date: date
+    ) -> Dict[str, Optional[CertificateValidity]]:
         """
-        Converte qualquer tipo de data para string no formato esperado.
+        Validade de vários certificados em uma data de referência.
+        
+        A localização e a comparação de datas/situações são feitas de uma vez
+        sobre os arrays do índice (dias int32 e códigos de situação); só a
+        montagem do resultado percorre os registros.
         
-        Args:
-            date_value: Valor da data (pode ser Timestamp, string, etc.)
-            
         Returns:
-            str: Data formatada como string
+            Dicionário na ordem de entrada: registro CA -> validade (ou None)
+        """
+        index = await self._ensure_index()
+        keys = [registro_ca.strip() for registro_ca in registros_ca]
+        positions = index.find_many(keys)
+        found = positions >= 0
+        hits = int(found.sum())
+        INDEX_LOOKUPS.inc(hits, result="hit")
+        INDEX_LOOKUPS.inc(len(keys) - hits, result="miss")
+        
+        reference_day = (reference_date - date(1970, 1, 1)).days
+        valid, expires_in = index.validity(positions[found], reference_day)
+        
+        results: Dict[str, Optional[CertificateValidity]] = {}
+        found_records = iter(zip(*index.records(positions[found]), valid.tolist(), expires_in.tolist()))
+        for key, is_found in zip(keys, found.tolist()):
+            if not is_found:
+                results.setdefault(key, None)
+                continue
+            registro, data_validade, situacao, is_valid, days = next(found_records)
+            results[key] = CertificateValidity(
+                certificate=ApproveCertificate(
+                    registro_ca=registro,
+                    data_validade=data_validade,
+                    situacao=situacao
+                ),
+                reference_date=reference_date,
+                valid=is_valid,
+                expires_in_days=None if days == NO_DATE else days
+            )
+        
+        logger.info(f"Validade em {reference_date.isoformat()}: {int(valid.sum())} de {len(results)} certificados válidos")
+        return results
+
+    async def list_certificates(self, limit: Optional[int] = None) -> List[ApproveCertificate]:
+        """Certificados em ordem de registro CA, lidos apenas do índice (até `limit`)"""
+        index = await self._ensure_index()
+        count = len(index) if limit is None else min(limit, len(index))
+        certificates = []
+        for position in range(count):
+            registro, data_validade, situacao = index.record(position)
+            certificates.append(ApproveCertificate(
+                registro_ca=registro,
+                data_validade=data_validade,
+                situacao=situacao
+            ))
+        return certificates
+
+    async def get_certificate_details(self, registro_ca: str) -> Optional[CertificateDetails]:
+        """
+        Busca todos os campos de um certificado.
+        
+        A localização usa o índice; as colunas descritivas são decodificadas
+        apenas para a linha encontrada, direto dos arquivos da geração.
         """
         try:
-            if pd.isna(date_value) or date_value is None:
-                return ""
-            
-            # Se já é string, retornar como está
-            if isinstance(date_value, str):
-                return date_value.strip()
-            
-            # Se é Timestamp do pandas, converter para string
-            if isinstance(date_value, pd.Timestamp):
-                return date_value.strftime("%d/%m/%Y")
+            snapshot = await self.dataset_holder.get_snapshot()
+            index = snapshot.index
+            registro_ca_clean = registro_ca.strip()
             
-            # Tentar converter para datetime e depois para string
-            if hasattr(date_value, 'strftime'):
-                return date_value.strftime("%d/%m/%Y")
+            position = index.find(registro_ca_clean)
+            INDEX_LOOKUPS.inc(result="miss" if position is None else "hit")
+            if position is None:
+                logger.info(f"Certificado {registro_ca_clean} não encontrado")
+                return None
             
-            # Fallback: converter para string
-            return str(date_value)
+            return self._read_details(snapshot, [position])[0]
             
         except Exception as e:
-            logger.warning(f"Erro ao formatar data {date_value}: {e}")
-            return str(date_value) if date_value is not None else ""
+            logger.error(f"Erro ao buscar detalhes do certificado {registro_ca}: {e}", exc_info=True)
+            return None
+
+    async def search_certificates_by_filters(
+        self, filters: Dict[str, str], offset: int = 0, limit: int = 100
+    ) -> Tuple[int, List[ApproveCertificate]]:
+        """
+        Busca certificados por múltiplos campos usando os índices de filtro.
+        
+        Returns:
+            Tupla (total de resultados, certificados da página solicitada),
+            em ordem de registro CA
+        """
+        snapshot = await self.dataset_holder.get_snapshot()
+        positions = snapshot.filters.search(filters)
+        
+        certificates = []
+        for position in positions[offset:offset + limit].tolist():
+            registro, data_validade, situacao = snapshot.index.record(position)
+            certificates.append(ApproveCertificate(
+                registro_ca=registro,
+                data_validade=data_validade,
+                situacao=situacao
+            ))
+        
+        logger.info(f"Busca por filtros {filters}: {len(positions)} certificados encontrados")
+        return len(positions), certificates
 
+    async def search_certificates(
+        self, query: str, offset: int = 0, limit: int = 20
+    ) -> Tuple[int, List[CertificateSearchResult]]:
+        """
+        Busca textual em nome e descrição do equipamento, ordenada por relevância (BM25).
+        
+        Returns:
+            Tupla (total de resultados, resultados da página solicitada)
+        """
+        snapshot = await self.dataset_holder.get_snapshot()
+        positions, scores = snapshot.text.search(query)
+        
+        nomes = snapshot.table.column("NomeEquipamento") if "NomeEquipamento" in snapshot.table.column_names else None
+        results = []
+        for position, score in zip(positions[offset:offset + limit].tolist(), scores[offset:offset + limit].tolist()):
+            registro, data_validade, situacao = snapshot.index.record(position)
+            results.append(CertificateSearchResult(
+                certificate=ApproveCertificate(
+                    registro_ca=registro,
+                    data_validade=data_validade,
+                    situacao=situacao
+                ),
+                nome_equipamento=nomes[int(snapshot.index.rows[position])] if nomes is not None else "",
+                score=round(score, 4)
+            ))
+        
+        logger.info(f"Busca textual '{query}': {len(positions)} certificados encontrados")
+        return len(positions), results
+
+    async def export_certificates(
+        self,
+        filters: Dict[str, str],
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 5000
+    ) -> CertificateExport:
+        """
+        Exporta os certificados que atendem aos filtros, em lotes de tamanho fixo.
+        
+        A paginação é por chave (keyset) sobre RegistroCA: cada lote começa no
+        primeiro registro maior que o último CA do lote anterior (ou que
+        `after`), localizado por busca binária. Apenas um lote é decodificado
+        por vez e todos os lotes leem o mesmo snapshot, mesmo que uma nova
+        geração seja publicada durante a exportação.
+        
+        Returns:
+            CertificateExport com o total que atende aos filtros, a quantidade
+            exportada, o cursor da próxima página (ou None) e o iterador de lotes
+        
+        Raises:
+            ValueError: se `after` não for um RegistroCA válido (`parse_registro`)
+        """
+        snapshot = await self.dataset_holder.get_snapshot()
+        index = snapshot.index
+        # Ids de documento são posições do índice, já em ordem de RegistroCA
+        positions = snapshot.filters.search(filters)
+        
+        def keyset_start(cursor: Optional[int]) -> int:
+            if cursor is None:
+                return 0
+            return int(np.searchsorted(positions, np.searchsorted(index.keys, cursor, side="right")))
+        
+        after_key = None
+        if after and after.strip():
+            # Mesma regra de RegistroCA das consultas
+            after_key = parse_registro(after)
+            if after_key is None:
+                raise ValueError(f"Cursor inválido: {after}")
+        
+        remaining = len(positions) - keyset_start(after_key)
+        count = remaining if limit is None else min(limit, remaining)
+        next_after = None
+        if 0 < count < remaining:
+            next_after = str(index.keys[positions[keyset_start(after_key) + count - 1]])
+        
+        def batches() -> Iterator[List[CertificateDetails]]:
+            cursor, exported = after_key, 0
+            while exported < count:
+                start = keyset_start(cursor)
+                batch = positions[start:start + min(batch_size, count - exported)]
+                if len(batch) == 0:
+                    return
+                yield self._read_details(snapshot, batch)
+                cursor = int(index.keys[batch[-1]])
+                exported += len(batch)
+        
+        logger.info(f"Exportação {filters}: {count} de {len(positions)} certificados")
+        return CertificateExport(
+            total=len(positions), count=count, next_after=next_after, batches=batches(), version=snapshot.version
+        )
+
+    @staticmethod
+    def _read_details(snapshot, positions) -> List[CertificateDetails]:
+        """Decodifica todos os campos das posições informadas, coluna a coluna"""
+        index, table = snapshot.index, snapshot.table
+        rows = index.rows[np.asarray(positions, dtype=np.int64)]
+        available = set(table.column_names)
+        columns = {
+            field: table.column(column).take(rows)
+            for column, field in DETAIL_FIELDS.items()
+            if column in available
+        }
+        
+        details = []
+        for i, position in enumerate(positions):
+            registro, data_validade, situacao = index.record(int(position))
+            details.append(CertificateDetails(
+                registro_ca=registro,
+                data_validade=data_validade,
+                situacao=situacao,
+                **{field: values[i] for field, values in columns.items()}
+            ))
+        return details
+
+    async def get_dataset_version(self) -> DatasetVersion:
+        """Versão (hash do conteúdo) e data de publicação do snapshot atual"""
+        snapshot = await self.dataset_holder.get_snapshot()
+        return DatasetVersion(version=snapshot.version, modified_at=snapshot.modified_at)
+
+    async def get_changes(self, since: str) -> Optional[CertificateChangeFeed]:
+        """
+        Alterações de certificados desde a versão `since` até a versão atual.
+        
+        As alterações vêm do registro gravado a cada publicação (ChangeLog),
+        sem consultar a tabela: cada lote corresponde a uma versão, em ordem
+        cronológica, então aplicá-los em sequência reproduz a versão atual.
+        
+        Returns:
+            CertificateChangeFeed, ou None se `since` não é uma versão
+            anterior conhecida (o cliente deve sincronizar pela exportação)
+        """
+        snapshot = await self.dataset_holder.get_snapshot()
+        entries = await self.dataset_holder.changes_between(since, snapshot.version)
+        if entries is None:
+            return None
+        
+        def batches() -> Iterator[List[CertificateChange]]:
+            for entry in entries:
+                version = entry["version"]
+                batch = [
+                    CertificateChange(version, str(registro), CertificateChangeKind.INCLUIDO, data_validade, situacao)
+                    for registro, data_validade, situacao in entry["added"]
+                ]
+                batch.extend(
+                    CertificateChange(
+                        version, str(registro), CertificateChangeKind.ALTERADO,
+                        data_validade, situacao, data_validade_anterior, situacao_anterior
+                    )
+                    for registro, data_validade, situacao, data_validade_anterior, situacao_anterior in entry["changed"]
+                )
+                batch.extend(
+                    CertificateChange(version, str(registro), CertificateChangeKind.REMOVIDO)
+                    for registro in entry["removed"]
+                )
+                yield batch
+        
+        logger.info(f"Alterações desde {since}: {len(entries)} versões até {snapshot.version}")
+        return CertificateChangeFeed(
+            since=since, version=snapshot.version, versions=[entry["version"] for entry in entries], batches=batches()
+        )
+
+    async def update_base_certificate(self) -> bool:
+        """Atualiza a base de dados dos certificados e publica o novo índice"""
+        try:
+            # O snapshot anterior continua atendendo consultas até a troca
+            return await self.dataset_holder.refresh()
+        except Exception as e:
+            print(f"Erro ao atualizar base de certificados: {e}")
+            return False
+
+    def is_data_available(self) -> bool:
+        """Verifica se há dados disponíveis na fonte"""
+        return self.dataset_holder.is_loaded() or self.data_source.is_data_loaded()
@@ -1,6 +1,28 @@
-from app.interface.dtos.certificate_dto import ApiResponse
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.interface.dtos.certificate_dto import (
+    ApiResponse,
+    CertificateBatchResponse,
+    CertificateDetailsApiResponse,
+    CertificateSearchResponse,
+    CertificateTextSearchResponse,
+    CertificateValidityApiResponse,
+    CertificateValidityBatchResponse,
+)
+from app.core.executors import run_io
+from app.infrastructure.cache.response_cache import ResponseCache
 from app.interface.presenters.certificate_presenter import CertificatePresenter
+from app.domain.entities.certificate_change import CertificateChangeFeed
+from app.domain.entities.certificate_export import CertificateExport
+from app.domain.entities.dataset_version import DatasetVersion
+from app.application.use_cases.check_certificate_validity_use_case import CheckCertificateValidityUseCase
+from app.application.use_cases.export_certificates_use_case import ExportCertificatesUseCase
+from app.application.use_cases.get_certificate_changes_use_case import GetCertificateChangesUseCase
 from app.application.use_cases.get_certificate_use_case import GetCertificateUseCase
+from app.application.use_cases.get_certificate_details_use_case import GetCertificateDetailsUseCase
+from app.application.use_cases.get_dataset_version_use_case import GetDatasetVersionUseCase
+from app.application.use_cases.get_certificates_batch_use_case import GetCertificatesBatchUseCase
+from app.application.use_cases.search_certificates_use_case import SearchCertificatesUseCase
 from app.application.use_cases.update_certificates_use_case import UpdateCertificatesUseCase
 
 
@@ -11,11 +33,29 @@ class CertificateController:
         self,
         get_certificate_use_case: GetCertificateUseCase,
         update_certificates_use_case: UpdateCertificatesUseCase,
-        presenter: CertificatePresenter
+        presenter: CertificatePresenter,
+        get_certificates_batch_use_case: GetCertificatesBatchUseCase,
+        get_certificate_details_use_case: GetCertificateDetailsUseCase,
+        search_certificates_use_case: SearchCertificatesUseCase,
+        export_certificates_use_case: ExportCertificatesUseCase,
+        get_dataset_version_use_case: GetDatasetVersionUseCase,
+        check_certificate_validity_use_case: CheckCertificateValidityUseCase,
+        get_certificate_changes_use_case: GetCertificateChangesUseCase,
+        response_cache: Optional[ResponseCache] = None
     ):
         self.get_certificate_use_case = get_certificate_use_case
         self.update_certificates_use_case = update_certificates_use_case
+        self.get_certificates_batch_use_case = get_certificates_batch_use_case
+        self.get_certificate_details_use_case = get_certificate_details_use_case
+        self.search_certificates_use_case = search_certificates_use_case
+        self.export_certificates_use_case = export_certificates_use_case
+        self.get_dataset_version_use_case = get_dataset_version_use_case
+        self.check_certificate_validity_use_case = check_certificate_validity_use_case
+        self.get_certificate_changes_use_case = get_certificate_changes_use_case
+        self.response_cache = response_cache if response_cache is not None else ResponseCache(0)
         self.presenter = presenter
+        # Corpo fixo para CAs descartados pelo filtro de chaves
+        self._not_found_body = presenter.to_json(presenter.present_certificate(None))
     
     async def get_certificate(self, registro_ca: str) -> ApiResponse:
         """Busca um certificado por registro CA"""
@@ -29,6 +69,190 @@ class CertificateController:
         except Exception as e:
             return self.presenter.present_error(f"Erro interno: {str(e)}")
         
+    async def get_certificate_json(self, registro_ca: str, version: Optional[DatasetVersion]) -> Tuple[bool, bytes]:
+        """
+        Busca um certificado e retorna a resposta já serializada em JSON
+        
+        CAs inexistentes ou não numéricos são descartados pelo filtro de
+        chaves da base, sem busca nem logs. Certificados encontrados ficam no
+        cache de respostas (por CA e versão da base); um acerto devolve os
+        bytes prontos, sem consultar o índice nem validar o modelo de resposta.
+        
+        Returns:
+            Tupla (certificado encontrado, corpo JSON da resposta)
+        """
+        key = (registro_ca or "").strip()
+        if key and not self.get_certificate_use_case.might_exist(key):
+            return False, self._not_found_body
+        # Chave canônica (sem zeros à esquerda), igual ao RegistroCA das alterações da base
+        cache_key = key.lstrip("0") or "0"
+        if version is not None:
+            body = self.response_cache.get(version.version, cache_key)
+            if body is not None:
+                return True, body
+        
+        response = await self.get_certificate(key)
+        body = self.presenter.to_json(response)
+        if response.success and version is not None:
+            self.response_cache.put(version.version, cache_key, body)
+        return response.success, body
+    
+    async def warm_response_cache(self) -> int:
+        """
+        Pré-carrega o cache de respostas com os certificados da base (em ordem
+        de registro CA, até o tamanho do cache)
+        
+        Returns:
+            Quantidade de respostas carregadas
+        """
+        if not self.response_cache.enabled:
+            return 0
+        version = await self.get_dataset_version()
+        if version is None:
+            return 0
+        
+        certificates = await self.get_certificates_batch_use_case.execute_all(self.response_cache.max_size)
+        
+        def render():
+            rendered = []
+            for certificate in certificates:
+                try:
+                    response = self.presenter.present_certificate(certificate)
+                except Exception:
+                    continue
+                rendered.append((certificate.registro_ca, self.presenter.to_json(response)))
+            return rendered
+        
+        # Validação e serialização fora do event loop
+        rendered = await run_io(render)
+        return self.response_cache.put_many(version.version, rendered)
+    
+    async def get_certificate_details(self, registro_ca: str) -> CertificateDetailsApiResponse:
+        """Busca todos os dados de um certificado por registro CA"""
+        try:
+            if not registro_ca or not registro_ca.strip():
+                return CertificateDetailsApiResponse(success=False, message="Registro CA é obrigatório")
+            
+            details = await self.get_certificate_details_use_case.execute(registro_ca.strip())
+            return self.presenter.present_details(details)
+            
+        except Exception as e:
+            return CertificateDetailsApiResponse(success=False, message=f"Erro interno: {str(e)}")
+        
+    async def get_certificates_batch(self, registros_ca: List[str]) -> CertificateBatchResponse:
+        """Busca vários certificados por registro CA"""
+        try:
+            results = await self.get_certificates_batch_use_case.execute(registros_ca)
+            return self.presenter.present_batch(results)
+            
+        except Exception as e:
+            return CertificateBatchResponse(success=False, message=f"Erro interno: {str(e)}")
+    
+    async def get_certificate_validity(
+        self, registro_ca: str, reference_date: Optional[date]
+    ) -> CertificateValidityApiResponse:
+        """Verifica a validade de um certificado na data de referência (padrão: hoje)"""
+        try:
+            key = (registro_ca or "").strip()
+            if not key:
+                return CertificateValidityApiResponse(success=False, message="Registro CA é obrigatório")
+            if not self.get_certificate_use_case.might_exist(key):
+                return self.presenter.present_validity(None)
+            
+            results = await self.check_certificate_validity_use_case.execute([key], reference_date)
+            return self.presenter.present_validity(results.get(key))
+            
+        except Exception as e:
+            return CertificateValidityApiResponse(success=False, message=f"Erro interno: {str(e)}")
+    
+    async def get_certificate_validity_json(
+        self, registro_ca: str, reference_date: Optional[date]
+    ) -> Tuple[bool, bytes]:
+        """
+        Verifica a validade de um certificado e retorna a resposta serializada
+        
+        Returns:
+            Tupla (certificado encontrado, corpo JSON da resposta)
+        """
+        response = await self.get_certificate_validity(registro_ca, reference_date)
+        return response.success, self.presenter.to_json(response)
+    
+    async def get_certificates_validity(
+        self, registros_ca: List[str], reference_date: Optional[date]
+    ) -> CertificateValidityBatchResponse:
+        """Verifica a validade de vários certificados na data de referência (padrão: hoje)"""
+        try:
+            reference_date = reference_date or date.today()
+            results = await self.check_certificate_validity_use_case.execute(registros_ca, reference_date)
+            return self.presenter.present_validity_batch(reference_date, results)
+            
+        except Exception as e:
+            return CertificateValidityBatchResponse(success=False, message=f"Erro interno: {str(e)}")
+    
+    async def search_certificates_by_filters(
+        self, filters: Dict[str, str], offset: int, limit: int
+    ) -> CertificateSearchResponse:
+        """Busca certificados por múltiplos filtros, com paginação"""
+        try:
+            if not any(value and value.strip() for value in filters.values()):
+                return CertificateSearchResponse(success=False, message="Informe ao menos um filtro")
+            
+            total, certificates = await self.search_certificates_use_case.execute(filters, offset, limit)
+            return self.presenter.present_search(total, certificates, offset, limit)
+            
+        except Exception as e:
+            return CertificateSearchResponse(success=False, message=f"Erro interno: {str(e)}")
+    
+    async def search_certificates(self, query: str, offset: int, limit: int) -> CertificateTextSearchResponse:
+        """Busca textual de certificados por nome e descrição do equipamento"""
+        try:
+            if not query or not query.strip():
+                return CertificateTextSearchResponse(success=False, message="Informe os termos da busca")
+            
+            total, results = await self.search_certificates_use_case.execute_text(query, offset, limit)
+            return self.presenter.present_text_search(query.strip(), total, results, offset, limit)
+            
+        except Exception as e:
+            return CertificateTextSearchResponse(success=False, message=f"Erro interno: {str(e)}")
+    
+    async def stream_certificates_batch(self, registros_ca: List[str]) -> Iterator[str]:
+        """Busca vários certificados e retorna as linhas NDJSON do resultado"""
+        results = await self.get_certificates_batch_use_case.execute(registros_ca)
+        return self.presenter.present_batch_stream(results)
+    
+    async def export_certificates(
+        self, filters: Dict[str, str], export_format: str, after: Optional[str], limit: Optional[int]
+    ) -> Tuple[CertificateExport, Iterator[bytes]]:
+        """
+        Exporta certificados filtrados e retorna os blocos serializados da resposta
+        
+        Raises:
+            ValueError: formato indisponível ou cursor inválido
+        """
+        export = await self.export_certificates_use_case.execute(filters, after, limit)
+        return export, self.presenter.present_export(export, export_format)
+    
+    async def stream_certificate_changes(
+        self, since: str
+    ) -> Optional[Tuple[CertificateChangeFeed, Iterator[bytes]]]:
+        """
+        Alterações desde a versão informada e os blocos NDJSON da resposta
+        
+        Returns:
+            Tupla (feed, blocos da resposta), ou None se a versão é desconhecida
+        
+        Raises:
+            ValueError: versão não informada
+        """
+        feed = await self.get_certificate_changes_use_case.execute(since)
+        if feed is None:
+            return None
+        return feed, self.presenter.present_changes(feed)
+    
+    async def get_dataset_version(self) -> Optional[DatasetVersion]:
+        """Versão vigente da base (validação de cache HTTP, sem consultar certificados)"""
+        return await self.get_dataset_version_use_case.execute()
+    
     async def update_certificates_database(self) -> ApiResponse:
         """Atualiza a base de dados de certificados"""
         try:
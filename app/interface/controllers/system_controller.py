@@ -0,0 +1,47 @@
+import os
+from typing import Any, Dict
+from app.core.config import get_settings
+from app.core.executors import run_io
+from app.core.metrics import process_memory_bytes
+from app.infrastructure.cache.response_cache import ResponseCache
+from app.infrastructure.datasources.caepi_data_source import CAEPIDataSource
+from app.infrastructure.datasources.dataset_holder import DatasetHolder
+
+
+class SystemController:
+    """Controller de inspeção do estado do processo (dataset, caches e memória)"""
+
+    def __init__(self, dataset_holder: DatasetHolder, data_source: CAEPIDataSource, response_cache: ResponseCache):
+        self.dataset_holder = dataset_holder
+        self.data_source = data_source
+        self.response_cache = response_cache
+
+    async def get_cache_info(self) -> Dict[str, Any]:
+        """
+        Estado dos caches deste worker.
+
+        Reúne o snapshot do dataset (versão, carga, bytes por coluna e por
+        índice, gerações em disco), o cache de respostas, o cache persistente
+        e o DataFrame da fonte de dados (CAEPIDataSource.get_cache_info), a
+        última atualização registrada pelo RefreshCoordinator e a memória
+        residente do processo. As consultas ao disco rodam fora do event loop.
+        """
+        dataset = await run_io(self.dataset_holder.describe)
+        data_source = await run_io(self.data_source.get_cache_info)
+        last_refresh = await run_io(self.dataset_holder.coordinator.read_state)
+        return {
+            "process": {
+                "pid": os.getpid(),
+                "resident_memory_bytes": process_memory_bytes(),
+            },
+            "dataset": dataset,
+            "response_cache": self.response_cache.stats(),
+            "memory_cache": data_source["memory_cache"],
+            "persistent_cache": data_source["persistent_cache"],
+            "last_refresh": last_refresh,
+            "settings": {
+                "cache_timeout": get_settings().cache_timeout,
+                "cache_format": get_settings().cache_format,
+                "refresh_interval": get_settings().refresh_interval,
+            },
+        }
@@ -1,6 +1,10 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional
-from datetime import datetime
+from typing import Dict, List, Optional
+from datetime import date, datetime
+from app.core.config import get_settings
+from app.domain.entities.certificate_status import CertificateStatus
+
+_STATUS_VALUES = frozenset(status.value for status in CertificateStatus)
 
 
 class CertificateRequest(BaseModel):
@@ -14,6 +18,51 @@ class CertificateRequest(BaseModel):
     )
 
 
+class CertificateBatchRequest(BaseModel):
+    """Requisição para buscar vários certificados por CA"""
+    registros_ca: List[str] = Field(
+        ...,
+        title="Registros CA",
+        description="Lista de números de registro de Certificados de Aprovação",
+        example=["12345", "67890"],
+        min_length=1
+    )
+
+    @field_validator("registros_ca")
+    @classmethod
+    def validate_batch_size(cls, value):
+        max_size = get_settings().batch_max_size
+        if len(value) > max_size:
+            raise ValueError(f"registros_ca deve conter no máximo {max_size} itens")
+        return value
+
+
+class CertificateValidityBatchRequest(CertificateBatchRequest):
+    """Requisição para verificar a validade de vários certificados em uma data"""
+    data_referencia: Optional[date] = Field(
+        None,
+        title="Data de referência",
+        description="Data em que a validade é verificada (padrão: hoje)",
+        example="2025-06-30"
+    )
+
+
+class CertificateFilterRequest(BaseModel):
+    """Requisição de busca de certificados por filtros (todos opcionais, combinados com E)"""
+    situacao: Optional[str] = Field(None, description="Situação do certificado (ex: Válido, Vencido)", example="Válido")
+    natureza: Optional[str] = Field(None, description="Natureza (Nacional/Importado)", example="Nacional")
+    cor: Optional[str] = Field(None, description="Cor do equipamento", example="Preto")
+    cnpj: Optional[str] = Field(None, description="CNPJ do fabricante/importador (com ou sem pontuação)")
+    razao_social: Optional[str] = Field(None, description="Termos da razão social (sem diferenciar acentos)")
+    marca_ca: Optional[str] = Field(None, description="Termos da marca")
+    nome_equipamento: Optional[str] = Field(None, description="Termos do nome do equipamento", example="luva")
+    offset: int = Field(0, ge=0, description="Quantidade de resultados a pular")
+    limit: int = Field(100, ge=1, le=1000, description="Quantidade máxima de resultados")
+
+    def filters(self) -> Dict[str, str]:
+        return self.model_dump(exclude={"offset", "limit"}, exclude_none=True)
+
+
 class CertificateResponse(BaseModel):
     """Resposta de certificado"""
 
@@ -40,6 +89,13 @@ class CertificateResponse(BaseModel):
     def normalize_date(cls, value):
         if isinstance(value, str):
             value = value.strip()
+            # Caminho rápido: a ingestão já grava as datas em ISO
+            if len(value) == 10 and value[4] == "-":
+                try:
+                    date.fromisoformat(value)
+                    return value
+                except ValueError:
+                    pass
             for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"):
                 try:
                     parsed = datetime.strptime(value, fmt)
@@ -55,6 +111,10 @@ class CertificateResponse(BaseModel):
         if not isinstance(value, str):
             raise ValueError("situacao deve ser uma string")
 
+        # Caminho rápido: a ingestão já grava a situação canônica
+        if value in _STATUS_VALUES:
+            return value
+
         valor_normalizado = value.strip().capitalize()
 
         # Substituir variações comuns (sem acento, maiúsculas etc)
@@ -77,6 +137,38 @@ class CertificateResponse(BaseModel):
         from_attributes = True
 
 
+class CertificateDetailsResponse(CertificateResponse):
+    """Resposta com todos os dados de um certificado"""
+
+    nr_processo: str = Field("", description="Número do processo")
+    cnpj: str = Field("", description="CNPJ do fabricante/importador")
+    razao_social: str = Field("", description="Razão social do fabricante/importador")
+    natureza: str = Field("", description="Natureza (Nacional/Importado)")
+    nome_equipamento: str = Field("", description="Nome do equipamento")
+    descricao_equipamento: str = Field("", description="Descrição do equipamento")
+    marca_ca: str = Field("", description="Marca do CA")
+    referencia: str = Field("", description="Referência do equipamento")
+    cor: str = Field("", description="Cor do equipamento")
+    aprovado_para_laudo: str = Field("", description="Aprovado para laudo")
+    restricao_laudo: str = Field("", description="Restrição do laudo")
+    observacao_analise_laudo: str = Field("", description="Observação da análise do laudo")
+    cnpj_laboratorio: str = Field("", description="CNPJ do laboratório")
+    razao_social_laboratorio: str = Field("", description="Razão social do laboratório")
+    nr_laudo: str = Field("", description="Número do laudo")
+    norma: str = Field("", description="Norma técnica")
+
+
+class CertificateValidityResponse(CertificateResponse):
+    """Certificado com a validade em uma data de referência"""
+
+    data_referencia: str = Field(..., description="Data de referência da verificação (formato YYYY-MM-DD)")
+    valido: bool = Field(..., description="Indica se o certificado é válido na data de referência")
+    dias_para_vencer: Optional[int] = Field(
+        None,
+        description="Dias entre a data de referência e a data de validade (negativo se já vencido)"
+    )
+
+
 class ApiResponse(BaseModel):
     """Resposta padrão da API"""
 
@@ -95,3 +187,107 @@ class ApiResponse(BaseModel):
         if success is False and value is not None:
             raise ValueError("Se success=False, data deve ser None")
         return value
+
+
+class CertificateDetailsApiResponse(ApiResponse):
+    """Resposta da consulta de detalhes de um certificado"""
+
+    data: Optional[CertificateDetailsResponse] = Field(
+        None,
+        description="Dados completos do certificado, se aplicável"
+    )
+
+
+class CertificateValidityApiResponse(ApiResponse):
+    """Resposta da consulta de validade de um certificado"""
+
+    data: Optional[CertificateValidityResponse] = Field(
+        None,
+        description="Certificado e validade na data de referência, se aplicável"
+    )
+
+
+class CertificateBatchResponse(BaseModel):
+    """Resposta da busca em lote de certificados"""
+
+    success: bool = Field(..., description="Indica se a operação foi bem-sucedida")
+    message: str = Field(..., min_length=3, description="Mensagem de status da operação")
+    total: int = Field(0, description="Quantidade de registros CA consultados")
+    found: List[CertificateResponse] = Field(
+        default_factory=list,
+        description="Certificados encontrados"
+    )
+    missing: List[str] = Field(
+        default_factory=list,
+        description="Registros CA não encontrados na base"
+    )
+    invalid: List[str] = Field(
+        default_factory=list,
+        description="Registros CA encontrados, mas com dados fora do formato esperado"
+    )
+
+
+class CertificateValidityBatchResponse(BaseModel):
+    """Resposta da verificação de validade em lote"""
+
+    success: bool = Field(..., description="Indica se a operação foi bem-sucedida")
+    message: str = Field(..., min_length=3, description="Mensagem de status da operação")
+    data_referencia: str = Field("", description="Data de referência da verificação (formato YYYY-MM-DD)")
+    total: int = Field(0, description="Quantidade de registros CA consultados")
+    validos: int = Field(0, description="Quantidade de certificados válidos na data de referência")
+    found: List[CertificateValidityResponse] = Field(
+        default_factory=list,
+        description="Certificados encontrados, com a validade na data de referência"
+    )
+    missing: List[str] = Field(
+        default_factory=list,
+        description="Registros CA não encontrados na base"
+    )
+    invalid: List[str] = Field(
+        default_factory=list,
+        description="Registros CA encontrados, mas com dados fora do formato esperado"
+    )
+
+
+class CertificateSearchResponse(BaseModel):
+    """Resposta paginada de busca de certificados"""
+
+    success: bool = Field(..., description="Indica se a operação foi bem-sucedida")
+    message: str = Field(..., min_length=3, description="Mensagem de status da operação")
+    total: int = Field(0, description="Quantidade total de certificados encontrados")
+    offset: int = Field(0, description="Posição do primeiro resultado da página")
+    limit: int = Field(0, description="Tamanho máximo da página")
+    items: List[CertificateResponse] = Field(
+        default_factory=list,
+        description="Certificados da página"
+    )
+    invalid: List[str] = Field(
+        default_factory=list,
+        description="Registros CA da página com dados fora do formato esperado"
+    )
+
+
+class CertificateSearchHit(CertificateResponse):
+    """Certificado encontrado na busca textual"""
+
+    nome_equipamento: str = Field("", description="Nome do equipamento")
+    score: float = Field(0.0, description="Relevância do resultado (BM25)")
+
+
+class CertificateTextSearchResponse(BaseModel):
+    """Resposta paginada da busca textual"""
+
+    success: bool = Field(..., description="Indica se a operação foi bem-sucedida")
+    message: str = Field(..., min_length=3, description="Mensagem de status da operação")
+    query: str = Field("", description="Termos buscados")
+    total: int = Field(0, description="Quantidade total de certificados encontrados")
+    offset: int = Field(0, description="Posição do primeiro resultado da página")
+    limit: int = Field(0, description="Tamanho máximo da página")
+    items: List[CertificateSearchHit] = Field(
+        default_factory=list,
+        description="Certificados da página, do mais para o menos relevante"
+    )
+    invalid: List[str] = Field(
+        default_factory=list,
+        description="Registros CA da página com dados fora do formato esperado"
+    )
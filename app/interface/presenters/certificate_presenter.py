@@ -1,5 +1,84 @@
-from app.interface.dtos.certificate_dto import ApiResponse, CertificateResponse
+import csv
+import io
+import json
+import logging
+from dataclasses import fields
+from datetime import date
+from typing import Dict, Iterator, List, Optional
+from pydantic import BaseModel, ValidationError
+from app.interface.dtos.certificate_dto import (
+    ApiResponse,
+    CertificateBatchResponse,
+    CertificateDetailsApiResponse,
+    CertificateDetailsResponse,
+    CertificateResponse,
+    CertificateSearchHit,
+    CertificateSearchResponse,
+    CertificateTextSearchResponse,
+    CertificateValidityApiResponse,
+    CertificateValidityBatchResponse,
+    CertificateValidityResponse,
+)
 from app.domain.entities.approve_certificate import ApproveCertificate
+from app.domain.entities.certificate_change import CertificateChangeFeed
+from app.domain.entities.certificate_details import CertificateDetails
+from app.domain.entities.certificate_export import CertificateExport
+from app.domain.entities.certificate_search_result import CertificateSearchResult
+from app.domain.entities.certificate_validity import CertificateValidity
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow é opcional
+    pa = None
+    pq = None
+
+# Formato de exportação -> media type da resposta
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+EXPORT_FIELDS = [field.name for field in fields(CertificateDetails)]
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Destino de escrita que acumula os bytes até serem consumidos.
+
+    O ParquetWriter grava um row group por lote; os bytes são drenados a
+    cada lote, mas `tell` continua contando o total gravado, que é usado
+    nos offsets do rodapé do arquivo.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
 
 
 class CertificatePresenter:
@@ -17,13 +96,184 @@ class CertificatePresenter:
         return ApiResponse(
             success=True,
             message="Certificado encontrado",
-            data=CertificateResponse(
-                registro_ca=certificate.registro_ca,
-                data_validade=certificate.data_validade,
-                situacao=certificate.situacao
+            data=self._to_response(certificate)
+        )
+    
+    def present_details(self, details: Optional[CertificateDetails]) -> CertificateDetailsApiResponse:
+        """Apresenta os dados completos de um certificado"""
+        if details is None:
+            return CertificateDetailsApiResponse(
+                success=False,
+                message="Certificado não encontrado",
+                data=None
+            )
+        
+        return CertificateDetailsApiResponse(
+            success=True,
+            message="Certificado encontrado",
+            data=CertificateDetailsResponse(**details.to_dict())
+        )
+    
+    def present_batch(self, results: Dict[str, Optional[ApproveCertificate]]) -> CertificateBatchResponse:
+        """Apresenta o resultado de uma busca em lote"""
+        found, missing, invalid = [], [], []
+        for registro_ca, certificate in results.items():
+            if certificate is None:
+                missing.append(registro_ca)
+                continue
+            try:
+                found.append(self._to_response(certificate))
+            except ValidationError as e:
+                logger.warning(f"Certificado {registro_ca} com dados inválidos: {e.errors()[0]['msg']}")
+                invalid.append(registro_ca)
+        
+        return CertificateBatchResponse(
+            success=True,
+            message=f"{len(found)} de {len(results)} certificados encontrados",
+            total=len(results),
+            found=found,
+            missing=missing,
+            invalid=invalid
+        )
+    
+    def present_validity(self, validity: Optional[CertificateValidity]) -> CertificateValidityApiResponse:
+        """Apresenta a validade de um certificado na data de referência"""
+        if validity is None:
+            return CertificateValidityApiResponse(
+                success=False,
+                message="Certificado não encontrado",
+                data=None
             )
+        
+        return CertificateValidityApiResponse(
+            success=True,
+            message="Certificado válido na data" if validity.valid else "Certificado não válido na data",
+            data=CertificateValidityResponse(**validity.to_dict())
+        )
+    
+    def present_validity_batch(
+        self, reference_date: date, results: Dict[str, Optional[CertificateValidity]]
+    ) -> CertificateValidityBatchResponse:
+        """Apresenta o resultado de uma verificação de validade em lote"""
+        found, missing, invalid = [], [], []
+        for registro_ca, validity in results.items():
+            if validity is None:
+                missing.append(registro_ca)
+                continue
+            try:
+                found.append(CertificateValidityResponse(**validity.to_dict()))
+            except ValidationError as e:
+                logger.warning(f"Certificado {registro_ca} com dados inválidos: {e.errors()[0]['msg']}")
+                invalid.append(registro_ca)
+        
+        valid = sum(1 for item in found if item.valido)
+        return CertificateValidityBatchResponse(
+            success=True,
+            message=f"{valid} de {len(results)} certificados válidos em {reference_date.isoformat()}",
+            data_referencia=reference_date.isoformat(),
+            total=len(results),
+            validos=valid,
+            found=found,
+            missing=missing,
+            invalid=invalid
         )
     
+    def present_search(
+        self, total: int, certificates: List[ApproveCertificate], offset: int, limit: int
+    ) -> CertificateSearchResponse:
+        """Apresenta uma página de resultados de busca"""
+        items, invalid = [], []
+        for certificate in certificates:
+            try:
+                items.append(self._to_response(certificate))
+            except ValidationError as e:
+                logger.warning(f"Certificado {certificate.registro_ca} com dados inválidos: {e.errors()[0]['msg']}")
+                invalid.append(certificate.registro_ca)
+        
+        return CertificateSearchResponse(
+            success=True,
+            message=f"{total} certificados encontrados",
+            total=total,
+            offset=offset,
+            limit=limit,
+            items=items,
+            invalid=invalid
+        )
+    
+    def present_text_search(
+        self, query: str, total: int, results: List[CertificateSearchResult], offset: int, limit: int
+    ) -> CertificateTextSearchResponse:
+        """Apresenta uma página de resultados da busca textual"""
+        items, invalid = [], []
+        for result in results:
+            try:
+                items.append(CertificateSearchHit(**result.to_dict()))
+            except ValidationError as e:
+                logger.warning(f"Certificado {result.certificate.registro_ca} com dados inválidos: {e.errors()[0]['msg']}")
+                invalid.append(result.certificate.registro_ca)
+        
+        return CertificateTextSearchResponse(
+            success=True,
+            message=f"{total} certificados encontrados",
+            query=query,
+            total=total,
+            offset=offset,
+            limit=limit,
+            items=items,
+            invalid=invalid
+        )
+    
+    def present_batch_stream(self, results: Dict[str, Optional[ApproveCertificate]]) -> Iterator[str]:
+        """Apresenta o resultado de uma busca em lote como NDJSON (uma linha por registro CA)"""
+        for registro_ca, certificate in results.items():
+            line = {"registro_ca": registro_ca, "found": certificate is not None, "data": None}
+            if certificate is not None:
+                try:
+                    line["data"] = self._to_response(certificate).model_dump()
+                except ValidationError as e:
+                    line["error"] = e.errors()[0]['msg']
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+    
+    def present_export(self, export: CertificateExport, export_format: str) -> Iterator[bytes]:
+        """
+        Serializa os lotes de uma exportação no formato solicitado.
+        
+        Cada lote é convertido e enviado antes do próximo ser lido, então a
+        memória usada não depende do tamanho da exportação. Datas e situações
+        já chegam normalizadas da ingestão (ISO e valores canônicos).
+        """
+        records = (
+            [details.to_dict() for details in batch]
+            for batch in export.batches
+        )
+        if export_format == "ndjson":
+            return self._export_ndjson(records)
+        if export_format == "csv":
+            return self._export_csv(records)
+        if export_format == "parquet":
+            if pa is None:
+                raise ValueError("Exportação em Parquet requer o pacote pyarrow")
+            return self._export_parquet(records)
+        raise ValueError(f"Formato de exportação inválido: {export_format}")
+    
+    def present_changes(self, feed: CertificateChangeFeed) -> Iterator[bytes]:
+        """
+        Serializa as alterações em NDJSON, um bloco por versão da base.
+        
+        Cada linha traz a versão em que a alteração ocorreu (`versao`), o
+        `tipo` (incluido, alterado ou removido) e, exceto nas remoções, a
+        data de validade e a situação; alterações trazem também os valores
+        anteriores.
+        """
+        return self._export_ndjson([change.to_dict() for change in batch] for batch in feed.batches)
+    
+    def to_json(self, response: BaseModel) -> bytes:
+        """Serializa uma resposta para os bytes JSON enviados ao cliente (orjson, se disponível)"""
+        data = response.model_dump(mode="json")
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
     def present_error(self, message: str) -> ApiResponse:
         """Apresenta erro"""
         return ApiResponse(
@@ -38,4 +288,39 @@ class CertificatePresenter:
             success=success,
             message=message or ("Atualização realizada" if success else "Falha na atualização"),
             data=None
-        )
\ No newline at end of file
+        )
+    
+    def _to_response(self, certificate: ApproveCertificate) -> CertificateResponse:
+        return CertificateResponse(
+            registro_ca=certificate.registro_ca,
+            data_validade=certificate.data_validade,
+            situacao=certificate.situacao
+        )
+    
+    @staticmethod
+    def _export_ndjson(records: Iterator[List[Dict[str, str]]]) -> Iterator[bytes]:
+        for batch in records:
+            yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch).encode("utf-8")
+    
+    @staticmethod
+    def _export_csv(records: Iterator[List[Dict[str, str]]]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for batch in records:
+            writer.writerows(batch)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+    
+    @staticmethod
+    def _export_parquet(records: Iterator[List[Dict[str, str]]]) -> Iterator[bytes]:
+        schema = pa.schema([(name, pa.string()) for name in EXPORT_FIELDS])
+        sink = _ChunkSink()
+        with pq.ParquetWriter(sink, schema, compression="snappy") as writer:
+            for batch in records:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                yield sink.drain()
+        yield sink.drain()
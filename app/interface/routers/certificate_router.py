@@ -1,11 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends
+from datetime import date
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from fastapi.responses import Response, StreamingResponse
 from app.interface.controllers.certificate_controller import CertificateController
-from app.interface.presenters.certificate_presenter import CertificatePresenter
-from app.infrastructure.repositories.pandas_ca_repository import PandasCARepository
-from app.infrastructure.datasources.caepi_data_source import CAEPIDataSource
-from app.application.use_cases.get_certificate_use_case import GetCertificateUseCase
-from app.application.use_cases.update_certificates_use_case import UpdateCertificatesUseCase
-from app.interface.dtos.certificate_dto import ApiResponse, CertificateRequest
+from app.interface.dtos.certificate_dto import (
+    ApiResponse,
+    CertificateBatchRequest,
+    CertificateBatchResponse,
+    CertificateDetailsApiResponse,
+    CertificateFilterRequest,
+    CertificateRequest,
+    CertificateSearchResponse,
+    CertificateTextSearchResponse,
+    CertificateValidityBatchRequest,
+    CertificateValidityBatchResponse,
+)
+from app.interface.presenters.certificate_presenter import EXPORT_MEDIA_TYPES
+from app.interface.routers.http_cache import cache_headers, is_not_modified
 
 # Criar router
 router = APIRouter(
@@ -18,22 +29,9 @@ router = APIRouter(
 )
 
 
-async def get_certificate_controller() -> CertificateController:
-    """Dependency injection para o controller"""
-    # Criar instâncias das dependências
-    data_source = CAEPIDataSource()
-    repository = PandasCARepository(data_source)
-    presenter = CertificatePresenter()
-    
-    # Criar use cases
-    get_certificate_use_case = GetCertificateUseCase(repository)
-    update_certificates_use_case = UpdateCertificatesUseCase(repository)
-    
-    return CertificateController(
-        get_certificate_use_case=get_certificate_use_case,
-        update_certificates_use_case=update_certificates_use_case,
-        presenter=presenter
-    )
+def get_certificate_controller(request: Request) -> CertificateController:
+    """Dependency injection para o controller (instância única criada no lifespan)"""
+    return request.app.state.container.certificate_controller
 
 
 @router.post(
@@ -83,9 +81,399 @@ async def get_certificate(
     }
     ```
     """
-    result = await controller.get_certificate(request.registro_ca)
+    version = await controller.get_dataset_version()
+    _, body = await controller.get_certificate_json(request.registro_ca, version)
+    return Response(content=body, media_type="application/json")
+
+@router.post(
+    "/get-certificate-details-by-ca",
+    response_model=CertificateDetailsApiResponse,
+    summary="Buscar detalhes do certificado por CA",
+    description="Retorna todos os dados cadastrados de um certificado (fabricante, equipamento, laudo e norma)",
+    responses={
+        200: {
+            "description": "Certificado encontrado com sucesso",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "success": True,
+                        "message": "Certificado encontrado",
+                        "data": {
+                            "registro_ca": "12345",
+                            "data_validade": "2025-12-31",
+                            "situacao": "Válido",
+                            "cnpj": "00000000000100",
+                            "razao_social": "EMPRESA LTDA",
+                            "nome_equipamento": "LUVA",
+                            "norma": "NBR 13712"
+                        }
+                    }
+                }
+            }
+        },
+        422: {
+            "description": "Dados de entrada inválidos"
+        }
+    }
+)
+async def get_certificate_details(
+    request: CertificateRequest,
+    controller: CertificateController = Depends(get_certificate_controller)
+):
+    """
+    Busca todos os dados de um certificado pelo registro CA.
+    
+    Os campos descritivos não ficam residentes em memória: são lidos do
+    cache em disco apenas para o certificado consultado.
+    """
+    result = await controller.get_certificate_details(request.registro_ca)
     return result
 
+@router.post(
+    "/batch",
+    response_model=CertificateBatchResponse,
+    summary="Buscar certificados em lote",
+    description="Busca vários certificados de uma só vez, retornando encontrados e não encontrados",
+    responses={
+        200: {
+            "description": "Resultado da busca em lote",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "success": True,
+                        "message": "1 de 2 certificados encontrados",
+                        "total": 2,
+                        "found": [
+                            {
+                                "registro_ca": "12345",
+                                "data_validade": "2025-12-31",
+                                "situacao": "Válido"
+                            }
+                        ],
+                        "missing": ["67890"],
+                        "invalid": []
+                    }
+                },
+                "application/x-ndjson": {
+                    "example": '{"registro_ca": "12345", "found": true, "data": {...}}\n'
+                               '{"registro_ca": "67890", "found": false, "data": null}\n'
+                }
+            }
+        },
+        422: {
+            "description": "Dados de entrada inválidos"
+        }
+    }
+)
+async def get_certificates_batch(
+    request: CertificateBatchRequest,
+    stream: bool = Query(False, description="Retorna o resultado como NDJSON em streaming (uma linha por CA)"),
+    controller: CertificateController = Depends(get_certificate_controller)
+):
+    """
+    Busca vários certificados pelo registro CA em uma única chamada.
+    
+    Recebe no corpo da requisição:
+    - **registros_ca**: Lista de números de registro CA
+    
+    Com `stream=true` a resposta é enviada em NDJSON, recomendado para lotes grandes.
+    """
+    if stream:
+        lines = await controller.stream_certificates_batch(request.registros_ca)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    
+    result = await controller.get_certificates_batch(request.registros_ca)
+    return result
+
+@router.post(
+    "/batch/validity",
+    response_model=CertificateValidityBatchResponse,
+    summary="Verificar validade de certificados em lote",
+    description="Verifica se cada certificado é válido em uma data de referência e quantos dias faltam para o vencimento",
+    responses={
+        200: {
+            "description": "Resultado da verificação em lote",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "success": True,
+                        "message": "1 de 2 certificados válidos em 2025-06-30",
+                        "data_referencia": "2025-06-30",
+                        "total": 2,
+                        "validos": 1,
+                        "found": [
+                            {
+                                "registro_ca": "12345",
+                                "data_validade": "2025-12-31",
+                                "situacao": "Válido",
+                                "data_referencia": "2025-06-30",
+                                "valido": True,
+                                "dias_para_vencer": 184
+                            }
+                        ],
+                        "missing": ["67890"],
+                        "invalid": []
+                    }
+                }
+            }
+        },
+        422: {
+            "description": "Dados de entrada inválidos"
+        }
+    }
+)
+async def get_certificates_validity(
+    request: CertificateValidityBatchRequest,
+    controller: CertificateController = Depends(get_certificate_controller)
+):
+    """
+    Verifica a validade de vários certificados em uma data de referência.
+    
+    Recebe no corpo da requisição:
+    - **registros_ca**: Lista de números de registro CA
+    - **data_referencia**: Data da verificação (opcional, padrão: hoje)
+    
+    Um certificado é válido na data quando a situação é Válido ou Vencido
+    e a data de validade não é anterior à data de referência; cancelados e
+    em análise nunca são válidos. `dias_para_vencer` é negativo para
+    certificados já vencidos na data.
+    """
+    result = await controller.get_certificates_validity(request.registros_ca, request.data_referencia)
+    return result
+
+@router.get(
+    "/search",
+    response_model=CertificateTextSearchResponse,
+    summary="Busca textual de certificados",
+    description="Busca por nome e descrição do equipamento, sem diferenciar acentos, ordenada por relevância",
+    responses={
+        200: {
+            "description": "Página de certificados encontrados",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "success": True,
+                        "message": "1 certificados encontrados",
+                        "query": "luva nitrilica",
+                        "total": 1,
+                        "offset": 0,
+                        "limit": 20,
+                        "items": [
+                            {
+                                "registro_ca": "12345",
+                                "data_validade": "2025-12-31",
+                                "situacao": "Válido",
+                                "nome_equipamento": "LUVA NITRÍLICA",
+                                "score": 12.5
+                            }
+                        ],
+                        "invalid": []
+                    }
+                }
+            }
+        }
+    }
+)
+async def search_certificates(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, description="Termos da busca (ex: luva nitrilica, respirador PFF2)"),
+    offset: int = Query(0, ge=0, description="Quantidade de resultados a pular"),
+    limit: int = Query(20, ge=1, le=100, description="Quantidade máxima de resultados"),
+    controller: CertificateController = Depends(get_certificate_controller)
+):
+    """
+    Busca textual em nome e descrição do equipamento.
+    
+    Todos os termos devem aparecer no certificado (em qualquer ordem, sem
+    diferenciar acentos e plurais). Os resultados são ordenados por relevância.
+    
+    A resposta traz `ETag`/`Last-Modified` da versão da base e responde 304
+    a `If-None-Match` enquanto a base não mudar.
+    """
+    version = await controller.get_dataset_version()
+    headers = cache_headers(version)
+    if is_not_modified(request, version):
+        return Response(status_code=304, headers=headers)
+    
+    result = await controller.search_certificates(q, offset, limit)
+    if result.success:
+        response.headers.update(headers)
+    return result
+
+@router.post(
+    "/search-by-filters",
+    response_model=CertificateSearchResponse,
+    summary="Buscar certificados por filtros",
+    description="Busca certificados combinando filtros por situação, natureza, cor, CNPJ, razão social, marca e nome do equipamento",
+    responses={
+        200: {
+            "description": "Página de certificados encontrados",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "success": True,
+                        "message": "1 certificados encontrados",
+                        "total": 1,
+                        "offset": 0,
+                        "limit": 100,
+                        "items": [
+                            {
+                                "registro_ca": "12345",
+                                "data_validade": "2025-12-31",
+                                "situacao": "Válido"
+                            }
+                        ],
+                        "invalid": []
+                    }
+                }
+            }
+        },
+        422: {
+            "description": "Dados de entrada inválidos"
+        }
+    }
+)
+async def search_certificates_by_filters(
+    request: CertificateFilterRequest,
+    controller: CertificateController = Depends(get_certificate_controller)
+):
+    """
+    Busca certificados que atendem a todos os filtros informados.
+    
+    - **situacao**, **natureza**, **cor**: valor exato, sem diferenciar maiúsculas e acentos
+    - **cnpj**: CNPJ com ou sem pontuação
+    - **razao_social**, **marca_ca**, **nome_equipamento**: todos os termos devem
+      aparecer (cada termo casa com palavras iniciadas por ele)
+    
+    Os resultados são ordenados por registro CA e paginados com `offset`/`limit`.
+    """
+    result = await controller.search_certificates_by_filters(request.filters(), request.offset, request.limit)
+    return result
+
+@router.get(
+    "/export",
+    summary="Exportar certificados",
+    description="Exporta em streaming os certificados que atendem aos filtros, em NDJSON, CSV ou Parquet",
+    responses={
+        200: {
+            "description": "Certificados exportados em ordem de registro CA",
+            "content": {
+                "application/x-ndjson": {
+                    "example": '{"registro_ca": "12345", "data_validade": "2025-12-31", "situacao": "Válido", ...}\n'
+                },
+                "text/csv": {},
+                "application/vnd.apache.parquet": {}
+            }
+        },
+        400: {
+            "description": "Formato indisponível ou cursor inválido"
+        }
+    }
+)
+async def export_certificates(
+    format: Literal["ndjson", "csv", "parquet"] = Query("ndjson", description="Formato do arquivo exportado"),
+    situacao: Optional[str] = Query(None, description="Situação do certificado (ex: Válido, Vencido)"),
+    natureza: Optional[str] = Query(None, description="Natureza (Nacional/Importado)"),
+    cor: Optional[str] = Query(None, description="Cor do equipamento"),
+    cnpj: Optional[str] = Query(None, description="CNPJ do fabricante/importador (com ou sem pontuação)"),
+    razao_social: Optional[str] = Query(None, description="Termos da razão social"),
+    marca_ca: Optional[str] = Query(None, description="Termos da marca"),
+    nome_equipamento: Optional[str] = Query(None, description="Termos do nome do equipamento"),
+    after: Optional[str] = Query(None, description="Exporta a partir do registro CA seguinte a este (cursor X-Next-After)"),
+    limit: Optional[int] = Query(None, ge=1, description="Quantidade máxima de certificados (padrão: todos)"),
+    controller: CertificateController = Depends(get_certificate_controller)
+):
+    """
+    Exporta os certificados que atendem aos filtros (os mesmos da busca por
+    filtros), com todos os campos cadastrados.
+    
+    Exemplo: todos os CAs válidos de um fabricante
+    `GET /certificates/export?format=csv&cnpj=00.000.000/0001-00&situacao=Válido`
+    
+    A resposta é enviada em lotes de tamanho fixo, ordenada por registro CA.
+    Com `limit`, o cabeçalho `X-Next-After` traz o cursor da próxima página
+    (informado em `after`); `X-Total-Count` traz o total que atende aos filtros.
+    """
+    filters = {
+        "situacao": situacao, "natureza": natureza, "cor": cor, "cnpj": cnpj,
+        "razao_social": razao_social, "marca_ca": marca_ca, "nome_equipamento": nome_equipamento,
+    }
+    try:
+        export, chunks = await controller.export_certificates(filters, format, after, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    headers = {
+        "Content-Disposition": f'attachment; filename="certificados.{format}"',
+        "X-Total-Count": str(export.total),
+    }
+    if export.next_after is not None:
+        headers["X-Next-After"] = export.next_after
+    if export.version is not None:
+        headers["X-Dataset-Version"] = export.version
+    return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
+
+@router.get(
+    "/changes",
+    summary="Alterações desde uma versão da base",
+    description="Lista em streaming (NDJSON) os CAs incluídos, removidos e alterados desde a versão informada",
+    responses={
+        200: {
+            "description": "Alterações em ordem cronológica, agrupadas por versão",
+            "content": {
+                "application/x-ndjson": {
+                    "example": (
+                        '{"versao": "9f2c...", "registro_ca": "12345", "tipo": "alterado", '
+                        '"data_validade": "2026-12-31", "situacao": "Válido", '
+                        '"data_validade_anterior": "2025-12-31", "situacao_anterior": "Vencido"}\n'
+                    )
+                }
+            }
+        },
+        410: {
+            "description": "Versão desconhecida ou anterior ao histórico de alterações; sincronize pela exportação"
+        }
+    }
+)
+async def get_certificate_changes(
+    since: str = Query(..., description="Versão já sincronizada (ETag ou X-Dataset-Version de uma resposta anterior)"),
+    controller: CertificateController = Depends(get_certificate_controller)
+):
+    """
+    Sincronização incremental da base.
+    
+    Um cliente que espelha a base exporta tudo uma vez (`/certificates/export`,
+    guardando o cabeçalho `X-Dataset-Version`) e depois consulta apenas as
+    alterações desde essa versão. Cada linha traz a `versao` em que ocorreu e
+    o `tipo`:
+    
+    - **incluido**: novo CA, com data de validade e situação
+    - **alterado**: CA com algum campo alterado, com data de validade e
+      situação atuais e anteriores (transições de situação/validade)
+    - **removido**: CA que deixou de constar na base
+    
+    Aplicar as linhas em ordem leva o cliente à versão do cabeçalho
+    `X-Dataset-Version`, que deve ser usada como `since` na próxima consulta.
+    Responde 410 se a versão não consta no histórico.
+    """
+    try:
+        result = await controller.stream_certificate_changes(since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(
+            status_code=410,
+            detail="Versão desconhecida ou anterior ao histórico de alterações; sincronize pela exportação"
+        )
+    
+    feed, chunks = result
+    headers = {
+        "X-Dataset-Version": feed.version,
+        "X-Change-Versions": str(len(feed.versions)),
+    }
+    return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES["ndjson"], headers=headers)
+
 @router.post(
     "/update-database",
     response_model=ApiResponse,
@@ -116,4 +504,71 @@ async def update_database(
     a base de dados local para garantir informações atualizadas.
     """
     result = await controller.update_certificates_database()
-    return result
\ No newline at end of file
+    return result
+
+@router.get(
+    "/{registro_ca}",
+    response_model=ApiResponse,
+    summary="Consultar certificado por CA (cacheável)",
+    description="Variante GET da busca por CA, com ETag/Last-Modified/Cache-Control vinculados à versão da base",
+    responses={
+        200: {
+            "description": "Certificado encontrado com sucesso",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "success": True,
+                        "message": "Certificado encontrado",
+                        "data": {
+                            "registro_ca": "12345",
+                            "data_validade": "2025-12-31",
+                            "situacao": "Válido"
+                        }
+                    }
+                }
+            }
+        },
+        304: {
+            "description": "Não modificado desde a versão informada em If-None-Match/If-Modified-Since"
+        },
+
+        404: {
+            "description": "Certificado não encontrado"
+        }
+    }
+)
+async def get_certificate_by_path(
+    registro_ca: str,
+    request: Request,
+    data_referencia: Optional[date] = Query(
+        None, description="Verifica a validade nesta data (YYYY-MM-DD): inclui valido e dias_para_vencer"
+    ),
+    controller: CertificateController = Depends(get_certificate_controller)
+):
+    """
+    Busca um certificado pelo registro CA informado na URL.
+    
+    Como os dados só mudam quando a base é atualizada, a resposta pode ser
+    armazenada por CDNs e clientes: o `ETag` é a versão da base e uma
+    requisição com `If-None-Match` igual é respondida com 304 sem consultar
+    o certificado. `If-None-Match: *` só resulta em 304 se o certificado
+    existir.
+    
+    Com `data_referencia`, `data` traz também `data_referencia`, `valido`
+    (situação Válido ou Vencido e validade não anterior à data) e
+    `dias_para_vencer` (negativo se já vencido na data).
+    """
+    version = await controller.get_dataset_version()
+    headers = cache_headers(version)
+    if is_not_modified(request, version, exists=False):
+        return Response(status_code=304, headers=headers)
+    
+    if data_referencia is not None:
+        found, body = await controller.get_certificate_validity_json(registro_ca, data_referencia)
+    else:
+        found, body = await controller.get_certificate_json(registro_ca, version)
+    if not found:
+        return Response(content=body, status_code=404, media_type="application/json", headers={"Cache-Control": "no-store"})
+    if is_not_modified(request, version):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
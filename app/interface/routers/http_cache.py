@@ -0,0 +1,58 @@
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+from fastapi import Request
+from app.core.config import get_settings
+from app.domain.entities.dataset_version import DatasetVersion
+
+
+def etag_for(version: DatasetVersion) -> str:
+    """ETag forte derivada da versão da base (igual em todos os workers)"""
+    return f'"{version.version}"'
+
+
+def cache_headers(version: Optional[DatasetVersion]) -> Dict[str, str]:
+    """
+    Cabeçalhos de cache HTTP para respostas que só mudam com a base.
+
+    Sem versão disponível (base ainda não carregada) a resposta não é cacheável.
+    """
+    if version is None:
+        return {"Cache-Control": "no-store"}
+    return {
+        "ETag": etag_for(version),
+        "Last-Modified": formatdate(version.modified_at, usegmt=True),
+        "Cache-Control": f"public, max-age={get_settings().http_cache_max_age}",
+    }
+
+
+def is_not_modified(request: Request, version: Optional[DatasetVersion], exists: bool = True) -> bool:
+    """
+    Verifica as pré-condições If-None-Match / If-Modified-Since da requisição.
+
+    If-None-Match tem precedência; If-Modified-Since só é considerado quando
+    o cliente não envia ETag (RFC 9110, seção 13.2.2). `If-None-Match: *`
+    só é satisfeito por um recurso existente: rotas que ainda não consultaram
+    o recurso informam `exists=False` e repetem a verificação após encontrá-lo.
+    """
+    if version is None:
+        return False
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = etag_for(version)
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            if (candidate == "*" and exists) or candidate.removeprefix("W/") == etag:
+                return True
+        return False
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # Last-Modified tem resolução de segundos
+        return int(version.modified_at) <= since
+
+    return False
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response
+from app.core.config import get_settings
+from app.core.metrics import registry
+from app.interface.controllers.system_controller import SystemController
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Criar router
+router = APIRouter(
+    tags=["Sistema"],
+    responses={
+        500: {"description": "Erro interno do servidor"}
+    }
+)
+
+
+def get_system_controller(request: Request) -> SystemController:
+    """Dependency injection para o controller (instância única criada no lifespan)"""
+    return request.app.state.container.system_controller
+
+
+@router.get(
+    "/metrics",
+    summary="Métricas (Prometheus)",
+    description="Métricas de latência, cache, dataset e atualização de todos os workers, no formato texto do Prometheus",
+    response_class=Response,
+    responses={
+        200: {"content": {PROMETHEUS_MEDIA_TYPE: {}}},
+        404: {"description": "Métricas desabilitadas (ENABLE_METRICS=false)"}
+    }
+)
+async def metrics():
+    """
+    Métricas no formato de exposição do Prometheus.
+
+    Contadores e histogramas são somados entre todos os workers (inclusive
+    os já recriados pelo Gunicorn); gauges por worker trazem o rótulo `pid`.
+    A resposta é montada no event loop, sem depender do pool de I/O, para
+    continuar disponível durante uma atualização da base.
+    """
+    if not get_settings().enable_metrics:
+        raise HTTPException(status_code=404, detail="Métricas desabilitadas")
+    return Response(content=registry.render(), media_type=PROMETHEUS_MEDIA_TYPE)
+
+
+@router.get(
+    "/system/cache",
+    summary="Estado dos caches",
+    description="Versão e carga do dataset, memória por coluna, tamanho dos índices, cache de respostas e geração em disco deste worker",
+    responses={
+        200: {
+            "description": "Estado dos caches do worker que atendeu a requisição",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "process": {"pid": 7, "resident_memory_bytes": 196112384},
+                        "dataset": {
+                            "loaded": True,
+                            "version": "cc56739b35c91d3b",
+                            "generation": 1792200776244,
+                            "records_count": 20000,
+                            "loaded_at": "2026-10-17T01:32:56",
+                            "columns": {"RegistroCA": {"bytes": 258000, "loaded": True}},
+                            "index_total_bytes": 4100000
+                        },
+                        "response_cache": {"entries": 20000, "hit_ratio": 0.93}
+                    }
+                }
+            }
+        }
+    }
+)
+async def cache_info(controller: SystemController = Depends(get_system_controller)):
+    """
+    Estado dos caches para dimensionar containers e ajustar `CACHE_TIMEOUT`.
+
+    Os valores são do worker que atendeu a requisição (`process.pid`): o
+    dataset e o cache persistente são compartilhados, mas o cache de
+    respostas e a memória residente são de cada worker.
+    """
+    return await controller.get_cache_info()
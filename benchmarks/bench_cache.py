@@ -0,0 +1,124 @@
+"""
+Benchmark dos formatos de cache persistente do ParquetCacheManager.
+
+Grava o mesmo DataFrame (arquivo sintético, já otimizado) em cada formato
+disponível (pickle, parquet e arrow) e mede, em um processo novo para cada
+formato, o tempo de load_from_cache e o RSS após a carga e após ler uma
+única coluna.
+
+Uso:
+    python -m benchmarks.bench_cache [quantidade_de_linhas]
+"""
+
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_parser import COLUMNS_NAME, generate_file
+
+FORMATS = ["pickle", "parquet", "arrow"]
+
+
+def rss_mb() -> float:
+    """RSS atual do processo em MB (Linux), ou pico via getrusage"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def configure(cache_format: str, cache_dir: str):
+    """Configura as variáveis lidas por get_settings() no processo filho"""
+    os.environ["CACHE_FORMAT"] = cache_format
+    os.environ["CACHE_DIR"] = cache_dir
+    os.environ["LOG_TO_FILE"] = "false"
+    os.environ["CACHE_TIMEOUT"] = str(24 * 3600)
+    os.environ.setdefault("FTP_HOST", "localhost")
+    os.environ.setdefault("FTP_ENDPOINT", "/")
+    os.environ.setdefault("FTP_FILE_NAME", "tgg_export_caepi.zip")
+
+
+def save(cache_format: str, cache_dir: str, source: str):
+    configure(cache_format, cache_dir)
+    from app.infrastructure.cache.parquet_cache import ParquetCacheManager
+
+    with open(source, "rb") as f:
+        df = pickle.load(f)
+    manager = ParquetCacheManager()
+    if manager.cache_format != cache_format:
+        print("indisponível")
+        return
+    manager.save_to_cache(df)
+    print(f"{os.path.getsize(manager.cache_file_path) / (1024 * 1024):.1f}")
+
+
+def load(cache_format: str, cache_dir: str):
+    configure(cache_format, cache_dir)
+    from app.infrastructure.cache.parquet_cache import ParquetCacheManager
+
+    manager = ParquetCacheManager()
+    baseline = rss_mb()
+
+    start = time.perf_counter()
+    df = manager.load_from_cache()
+    elapsed = time.perf_counter() - start
+    after_load = rss_mb()
+
+    # Acesso típico: uma coluna de texto inteira
+    total = int(df["RazaoSocial"].astype(str).str.len().sum())
+    after_column = rss_mb()
+    assert total > 0
+    print(f"{elapsed:.3f} {after_load - baseline:.1f} {after_column - baseline:.1f}")
+
+
+def child(*args) -> str:
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_cache", *args],
+        capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def run(rows: int):
+    from app.infrastructure.datasources.caepi_parser import CAEPIParser
+    from app.infrastructure.datasources.caepi_data_source import CAEPIDataSource
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tgg_export_caepi.txt")
+        generate_file(path, rows)
+        df = CAEPIDataSource._optimize_dataframe(CAEPIParser(COLUMNS_NAME).parse(path))
+        source = os.path.join(tmp, "source.pkl")
+        with open(source, "wb") as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        print(f"DataFrame sintético: {len(df)} linhas")
+        del df
+
+        print(f"{'formato':>8}  {'arquivo':>9}  {'carga':>8}  {'RSS carga':>10}  {'RSS +1 coluna':>13}")
+        for cache_format in FORMATS:
+            cache_dir = os.path.join(tmp, cache_format)
+            size = child("--save", cache_format, cache_dir, source)
+            if size == "indisponível":
+                print(f"{cache_format:>8}  indisponível (pyarrow não instalado)")
+                continue
+            elapsed, rss_load, rss_column = child("--load", cache_format, cache_dir).split()
+            print(
+                f"{cache_format:>8}  {float(size):>6.1f} MB  {float(elapsed):>7.3f}s  "
+                f"{float(rss_load):>7.1f} MB  {float(rss_column):>10.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--save":
+        save(*sys.argv[2:5])
+    elif len(sys.argv) > 1 and sys.argv[1] == "--load":
+        load(*sys.argv[2:4])
+    else:
+        run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,127 @@
+"""
+Benchmark da busca pontual por CA no cache Parquet (ParquetCacheManager.search_certificates).
+
+Compara a busca anterior (reproduzida abaixo como referência: leitura do
+arquivo inteiro e DataFrame.query) com a busca por filtro do pyarrow sobre o
+Parquet ordenado por RegistroCA em row groups pequenos. A latência "fria" é
+a da primeira busca em um processo novo (inclui abrir o arquivo e ler o
+rodapé); a "quente" é a mediana das buscas seguintes.
+
+Uso:
+    python -m benchmarks.bench_parquet_lookup [quantidade_de_linhas]
+"""
+
+import os
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_cache import configure
+from benchmarks.bench_parser import COLUMNS_NAME, generate_file
+
+LOOKUPS = 50
+MODES = ["anterior", "pushdown"]
+
+
+def legacy_save(df: pd.DataFrame, path: str):
+    """Gravação anterior: to_parquet na ordem do DataFrame, row groups padrão"""
+    df.to_parquet(path, compression="snappy", index=False, engine="pyarrow")
+
+
+def legacy_search(path: str, registro_ca: str):
+    """Busca anterior: carrega o arquivo inteiro e filtra com DataFrame.query"""
+    df = pd.read_parquet(path, engine="pyarrow")
+    valor = pd.to_numeric(registro_ca, errors="coerce")
+    result = df.query("RegistroCA == @valor")
+    return result if not result.empty else None
+
+
+def save(mode: str, cache_dir: str, source: str):
+    configure("parquet", cache_dir)
+    from app.infrastructure.cache.parquet_cache import ParquetCacheManager
+
+    with open(source, "rb") as f:
+        df = pickle.load(f)
+    manager = ParquetCacheManager()
+    if manager.cache_format != "parquet":
+        print("indisponível")
+        return
+    manager.save_to_cache(df)
+    if mode == "anterior":
+        # Mesma geração e metadados, com o arquivo no layout anterior
+        legacy_save(manager._optimize_dataframe(df), str(manager.cache_file_path))
+
+    import pyarrow.parquet as pq
+    row_groups = pq.ParquetFile(str(manager.cache_file_path)).num_row_groups
+    print(f"{os.path.getsize(manager.cache_file_path) / (1024 * 1024):.1f} {row_groups}")
+
+
+def lookup(mode: str, cache_dir: str, rows: int):
+    configure("parquet", cache_dir)
+    from app.infrastructure.cache.parquet_cache import ParquetCacheManager
+
+    manager = ParquetCacheManager()
+    path = str(manager.cache_file_path)
+    search = (lambda ca: legacy_search(path, ca)) if mode == "anterior" else manager.search_certificates
+
+    random.seed(7)
+    keys = [str(1000 + random.randrange(rows)) for _ in range(LOOKUPS + 1)]
+    timings = []
+    for registro_ca in keys:
+        start = time.perf_counter()
+        result = search(registro_ca)
+        timings.append(time.perf_counter() - start)
+        assert result is not None and len(result) == 1
+    warm = sorted(timings[1:])
+    print(f"{timings[0] * 1000:.2f} {warm[len(warm) // 2] * 1000:.2f}")
+
+
+def child(*args) -> str:
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_parquet_lookup", *args],
+        capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def run(rows: int):
+    from app.infrastructure.datasources.caepi_parser import CAEPIParser
+    from app.infrastructure.datasources.caepi_data_source import CAEPIDataSource
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tgg_export_caepi.txt")
+        generate_file(path, rows)
+        df = CAEPIDataSource._optimize_dataframe(CAEPIParser(COLUMNS_NAME).parse(path))
+        source = os.path.join(tmp, "source.pkl")
+        with open(source, "wb") as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        print(f"DataFrame sintético: {len(df)} linhas, {LOOKUPS} buscas por CA")
+        del df
+
+        print(f"{'busca':>9}  {'arquivo':>9}  {'row groups':>10}  {'fria':>10}  {'quente p50':>10}")
+        for mode in MODES:
+            cache_dir = os.path.join(tmp, mode)
+            saved = child("--save", mode, cache_dir, source)
+            if saved == "indisponível":
+                print(f"{mode:>9}  indisponível (pyarrow não instalado)")
+                continue
+            size, row_groups = saved.split()
+            cold, warm = child("--lookup", mode, cache_dir, str(rows)).split()
+            print(
+                f"{mode:>9}  {float(size):>6.1f} MB  {int(row_groups):>10}  "
+                f"{float(cold):>7.2f} ms  {float(warm):>7.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--save":
+        save(*sys.argv[2:5])
+    elif len(sys.argv) > 1 and sys.argv[1] == "--lookup":
+        lookup(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,115 @@
+"""
+Benchmark do parser do arquivo tgg_export_caepi.txt.
+
+Compara o processamento linha a linha anterior (reproduzido abaixo como
+referência) com o CAEPIParser vetorizado, sobre um arquivo sintético:
+linhas por segundo e pico de memória alocada durante o parse.
+
+Uso:
+    python -m benchmarks.bench_parser [quantidade_de_linhas]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from app.infrastructure.datasources.caepi_parser import CAEPIParser
+
+COLUMNS_NAME = [
+    "RegistroCA", "DataValidade", "Situacao", "NRProcesso", "CNPJ",
+    "RazaoSocial", "Natureza", "NomeEquipamento", "DescricaoEquipamento",
+    "MarcaCA", "Referencia", "Cor", "AprovadoParaLaudo", "RestricaoLaudo",
+    "ObservacaoAnaliseLaudo", "CNPJLaboratorio", "RazaoSocialLaboratorio",
+    "NRLaudo", "Norma"
+]
+
+
+def generate_file(path: str, rows: int):
+    """Gera um arquivo no mesmo formato da exportação do CAEPI"""
+    random.seed(42)
+    with open(path, "w", encoding="UTF-8") as file:
+        file.write("|".join(["NR Registro CA"] + COLUMNS_NAME[1:]) + "\n")
+        for i in range(rows):
+            fields = [
+                str(1000 + i),
+                f"{random.randint(1, 28):02d}/{random.randint(1, 12):02d}/{random.randint(2015, 2030)}",
+                random.choice(["VÁLIDO", "VENCIDO", "CANCELADO"]),
+                f"46000.{i:06d}/2020-11",
+                f"{random.randint(10 ** 13, 10 ** 14 - 1)}",
+                f"EMPRESA {i % 5000} LTDA",
+                random.choice(["Nacional", "Importado"]),
+                random.choice(["LUVA", "RESPIRADOR", "CAPACETE", "BOTA"]),
+                "Equipamento de proteção individual confeccionado em material sintético " * 3,
+                random.choice(["3M", "MSA", "VOLK"]),
+                f"REF-{i}",
+                random.choice(["Azul", "Preto", ""]),
+                "Sim",
+                "",
+                "Observação da análise do laudo " * 4,
+                "00000000000100",
+                "LABORATÓRIO DE ENSAIOS",
+                f"L{i}",
+                "NBR 13712",
+            ]
+            file.write("|".join(fields) + "\n")
+
+
+def legacy_parse(path: str) -> pd.DataFrame:
+    """Processamento linha a linha anterior ao CAEPIParser"""
+    with open(path, "r", encoding="UTF-8") as file:
+        data = file.read()
+    lines = [line.strip() for line in data.strip().split('\n') if line.strip()]
+    processed_data = []
+    for line in lines:
+        fields = None
+        for sep in ['|', ';', '\t']:
+            test_fields = line.split(sep)
+            if len(test_fields) > 1:
+                fields = test_fields
+                break
+        if fields is None:
+            fields = [line]
+        fields = [field.strip() for field in fields]
+        if len(fields) >= len(COLUMNS_NAME):
+            processed_data.append(fields[:len(COLUMNS_NAME)])
+        elif len(fields) > 1:
+            padded_fields = fields + [''] * (len(COLUMNS_NAME) - len(fields))
+            processed_data.append(padded_fields[:len(COLUMNS_NAME)])
+    df = pd.DataFrame(processed_data, columns=COLUMNS_NAME)
+    df = df.iloc[1:].reset_index(drop=True)
+    for col in df.columns:
+        df[col] = df[col].astype(str).str.strip()
+    return df
+
+
+def run(rows: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tgg_export_caepi.txt")
+        generate_file(path, rows)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"Arquivo sintético: {rows} linhas, {size_mb:.1f} MB")
+
+        parser = CAEPIParser(COLUMNS_NAME)
+        for name, parse in (("linha a linha", legacy_parse), ("CAEPIParser", parser.parse)):
+            start = time.perf_counter()
+            df = parse(path)
+            elapsed = time.perf_counter() - start
+            del df
+
+            tracemalloc.start()
+            df = parse(path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{name:>15}: {elapsed:6.2f}s  {len(df) / elapsed:>10,.0f} linhas/s  "
+                f"pico {peak / (1024 * 1024):,.0f} MB"
+            )
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
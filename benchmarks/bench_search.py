@@ -0,0 +1,100 @@
+"""
+Benchmark da busca textual (CertificateTextIndex).
+
+Constrói o índice sobre nomes e descrições sintéticos de EPIs, grava e
+reabre a geração mapeada em memória (como na API) e mede a latência das
+consultas: p50, p99 e máximo.
+
+Uso:
+    python -m benchmarks.bench_search [quantidade_de_linhas]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.infrastructure.indexes.text_index import CertificateTextIndex
+
+NAMES = [
+    "LUVA", "RESPIRADOR", "CAPACETE", "BOTA", "ÓCULOS", "PROTETOR AURICULAR",
+    "CINTURÃO", "MÁSCARA", "AVENTAL", "CALÇADO", "CREME PROTETOR", "MANGOTE",
+]
+QUALIFIERS = [
+    "NITRÍLICA", "PFF2", "PFF3", "DE SEGURANÇA", "DE RASPA", "DE VAQUETA",
+    "DESCARTÁVEL", "PARAQUEDISTA", "TIPO PLUG", "TIPO CONCHA", "ISOLANTE",
+    "ANTIDERRAPANTE", "DE PVC", "DE LÁTEX", "SEMIFACIAL", "FACIAL INTEIRA",
+]
+WORDS = (
+    "proteção contra agentes químicos biológicos mecânicos térmicos cortes "
+    "abrasões perfurações impactos partículas poeiras névoas fumos vapores "
+    "orgânicos ácidos respingos confeccionada material sintético algodão couro "
+    "forro punho elástico palma reforço tamanhos cores cano curto longo solado "
+    "biqueira aço composite palmilha lente policarbonato incolor fumê haste "
+    "ajustável válvula exalação filtro elemento filtrante classe concha espuma "
+    "silicone cordão tamanho único eletricista altura trabalho"
+).split()
+
+QUERIES = [
+    "luva nitrilica", "respirador PFF2", "bota de segurança", "oculos",
+    "protecao quimicos", "luvas latex", "capacete", "mascara semifacial filtro",
+    "calcado biqueira aço", "protetor auricular concha", "cinturao paraquedista",
+    "avental pvc", "luva vaqueta punho", "lente policarbonato fume",
+]
+
+
+def generate_dataframe(rows: int) -> pd.DataFrame:
+    random.seed(42)
+    names, descriptions = [], []
+    for i in range(rows):
+        names.append(f"{random.choice(NAMES)} {random.choice(QUALIFIERS)}")
+        words = random.choices(WORDS, k=random.randint(8, 40))
+        words.append(f"MOD{i % 20000}")
+        descriptions.append(" ".join(words))
+    return pd.DataFrame({
+        "RegistroCA": np.arange(1000, 1000 + rows).astype(str),
+        "NomeEquipamento": names,
+        "DescricaoEquipamento": descriptions,
+    })
+
+
+def percentile(values, q):
+    return float(np.percentile(np.asarray(values) * 1000, q))
+
+
+def run(rows: int, repetitions: int = 50):
+    df = generate_dataframe(rows)
+    print(f"Dataset sintético: {rows} linhas")
+
+    start = time.perf_counter()
+    index = CertificateTextIndex.from_dataframe(df, np.arange(rows))
+    print(f"Construção do índice: {time.perf_counter() - start:.2f}s, {len(index)} termos")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index.save(Path(tmp))
+        size_mb = sum(path.stat().st_size for path in Path(tmp).iterdir()) / (1024 * 1024)
+        print(f"Tamanho em disco: {size_mb:.1f} MB")
+
+        index = CertificateTextIndex.load(Path(tmp))
+        index.search("luva")  # carrega o vocabulário
+
+        timings = []
+        for _ in range(repetitions):
+            for query in QUERIES:
+                start = time.perf_counter()
+                docs, _ = index.search(query)
+                timings.append(time.perf_counter() - start)
+
+        print(f"{len(timings)} consultas: p50 {percentile(timings, 50):.2f} ms  "
+              f"p99 {percentile(timings, 99):.2f} ms  máx {max(timings) * 1000:.2f} ms")
+        for query in QUERIES[:4]:
+            docs, scores = index.search(query)
+            print(f"  {query!r}: {len(docs)} resultados")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
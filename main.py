@@ -1,15 +1,36 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.interface.routers.certificate_router import router as certificate_router
+from app.interface.routers.system_router import router as system_router
 from app.core.config import get_settings
+from app.core.container import ApplicationContainer
 from app.core.logging_config import setup_logging
+from app.core.middleware import RequestTimingMiddleware
 
 # Configurar logging seguindo Clean Architecture
 settings = get_settings()
 logger = setup_logging()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida da aplicação.
+
+    Cria o container de dependências uma única vez por processo e carrega o
+    dataset antes de começar a atender requisições.
+    """
+    container = ApplicationContainer()
+    app.state.container = container
+    await container.startup()
+    yield
+    await container.shutdown()
+
+
 # Criar aplicação FastAPI com configuração Swagger completa
 app = FastAPI(
+    lifespan=lifespan,
     title="API CAEPI - Certificados de Aprovação",
     description="""
     ## API para consulta de Certificados de Aprovação (CA) do CAEPI
@@ -26,7 +47,8 @@ app = FastAPI(
     
     ### Como usar
     1. Use `/certificates/get-certificate-by-ca` para buscar qualquer certificado
-    2. Use `/certificates/update-database` para atualizar a base de dados
+    2. Use `/certificates/batch` para validar vários certificados em uma chamada
+    3. Use `/certificates/update-database` para atualizar a base de dados
     """,
     version=settings.app_version,
     contact={
@@ -58,8 +80,13 @@ app.add_middleware(
     allow_headers=settings.cors_headers,
 )
 
+# Medir latência das requisições (métricas e logs com duration/endpoint/status_code)
+if settings.enable_metrics:
+    app.add_middleware(RequestTimingMiddleware)
+
 # Incluir routers
 app.include_router(certificate_router)
+app.include_router(system_router)
 
 # Health check
 @app.get(
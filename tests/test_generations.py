@@ -0,0 +1,107 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.infrastructure.cache.generations import GenerationDirectory, fcntl
+
+
+class GenerationDirectoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.generations = GenerationDirectory(Path(self._tmp.name) / "shared")
+
+    def publish(self, content: str) -> int:
+        """Publica uma geração com um único arquivo `data.txt`"""
+        generation, staging = self.generations.stage()
+        (staging / "data.txt").write_text(content)
+        self.generations.publish(generation, staging)
+        return generation
+
+    def read_current(self) -> str:
+        return (self.generations.current_link / "data.txt").read_text()
+
+    @unittest.skipIf(fcntl is None, "travas de geração exigem fcntl")
+    def test_leased_generation_survives_collect(self):
+        old = self.publish("antiga")
+        lease = self.generations.lease(old)
+        self.addCleanup(lease.release)
+        new = self.publish("nova")
+
+        self.assertEqual(self.generations.collect(), [])
+        self.assertEqual(self.generations.generations(), [old, new])
+        self.assertEqual((self.generations.path(old) / "data.txt").read_text(), "antiga")
+
+        # Liberada a trava, a próxima coleta remove a geração
+        lease.release()
+        self.assertEqual(self.generations.collect(), [old])
+        self.assertEqual(self.generations.generations(), [new])
+
+    def test_unleased_old_generation_is_removed(self):
+        old = self.publish("antiga")
+        new = self.publish("nova")
+
+        if fcntl is None:
+            # Sem travas, as gerações mais recentes são mantidas
+            self.assertEqual(self.generations.collect(), [])
+            return
+        self.assertEqual(self.generations.collect(), [old])
+        self.assertFalse(self.generations.path(old).exists())
+        self.assertEqual(self.generations.current(), new)
+        self.assertEqual(self.read_current(), "nova")
+
+    def test_current_generation_is_never_collected(self):
+        current = self.publish("vigente")
+
+        self.assertEqual(self.generations.collect(), [])
+        self.assertEqual(self.generations.current(), current)
+        self.assertEqual(self.read_current(), "vigente")
+
+    def test_staging_directory_is_never_visible_through_current(self):
+        published = self.publish("publicada")
+
+        generation, staging = self.generations.stage()
+        (staging / "data.txt").write_text("parcial")
+        self.assertGreater(generation, published)
+
+        # Gravação em andamento: nem `current` nem a lista de gerações a enxergam
+        self.assertEqual(self.generations.current(), published)
+        self.assertEqual(self.read_current(), "publicada")
+        self.assertEqual(self.generations.generations(), [published])
+        self.assertFalse(self.generations.path(generation).exists())
+
+        # A coleta não remove a gravação em andamento nem a geração vigente
+        self.generations.collect()
+        self.assertTrue(staging.exists())
+        self.assertEqual(self.read_current(), "publicada")
+
+        # Gravação interrompida: descartada sem nunca ter sido publicada
+        self.generations.discard(staging)
+        self.assertFalse(staging.exists())
+        self.assertEqual(self.generations.current(), published)
+        self.assertEqual(self.read_current(), "publicada")
+
+    def test_publish_switches_current_to_complete_generation(self):
+        self.publish("primeira")
+        generation, staging = self.generations.stage()
+        (staging / "data.txt").write_text("segunda")
+        self.assertEqual(self.read_current(), "primeira")
+
+        self.generations.publish(generation, staging)
+        self.assertEqual(self.generations.current(), generation)
+        self.assertEqual(self.read_current(), "segunda")
+        self.assertFalse(staging.exists())
+
+    @unittest.skipIf(fcntl is None, "travas de geração exigem fcntl")
+    def test_lease_on_removed_generation_fails(self):
+        old = self.publish("antiga")
+        self.publish("nova")
+        self.generations.collect()
+
+        with self.assertRaises(FileNotFoundError):
+            self.generations.lease(old)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import random
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.infrastructure.cache.shared_dataset import SharedDatasetStore
+from app.infrastructure.datasources.caepi_data_source import CAEPIDataSource
+
+COLUMNS_NAME = [
+    "RegistroCA", "DataValidade", "Situacao", "NRProcesso", "CNPJ",
+    "RazaoSocial", "Natureza", "NomeEquipamento", "DescricaoEquipamento",
+    "MarcaCA", "Referencia", "Cor", "AprovadoParaLaudo", "RestricaoLaudo",
+    "ObservacaoAnaliseLaudo", "CNPJLaboratorio", "RazaoSocialLaboratorio",
+    "NRLaudo", "Norma"
+]
+
+FILTERS = [
+    {"situacao": "Válido"},
+    {"situacao": "vencido", "cor": "azul"},
+    {"razao_social": "empresa 7"},
+    {"marca_ca": "volk", "nome_equipamento": "luva"},
+    {"natureza": "Importado", "razao_social": "nova"},
+    {"cnpj": "12.345.678/0001-07"},
+]
+
+QUERIES = ["luva", "respirador sintetico", "capacete nitrilica", "bota"]
+
+
+def certificate(registro_ca: int, rng: random.Random) -> dict:
+    """Linha no formato do arquivo do CAEPI"""
+    equipamento = rng.choice(["LUVA", "RESPIRADOR", "CAPACETE", "BOTA"])
+    return {
+        "RegistroCA": str(registro_ca),
+        "DataValidade": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2015, 2030)}",
+        "Situacao": rng.choice(["VÁLIDO", "VENCIDO", "CANCELADO"]),
+        "NRProcesso": f"46000.{registro_ca:06d}/2020-11",
+        "CNPJ": f"{rng.randint(10 ** 13, 10 ** 14 - 1)}",
+        "RazaoSocial": f"EMPRESA {registro_ca % 13} LTDA",
+        "Natureza": rng.choice(["Nacional", "Importado"]),
+        "NomeEquipamento": equipamento,
+        "DescricaoEquipamento": f"{equipamento} de proteção em material {rng.choice(['sintético', 'nitrílica', 'couro'])}",
+        "MarcaCA": rng.choice(["3M", "MSA", "VOLK"]),
+        "Referencia": f"REF-{registro_ca}",
+        "Cor": rng.choice(["Azul", "Preto", ""]),
+        "AprovadoParaLaudo": "Sim",
+        "RestricaoLaudo": "",
+        "ObservacaoAnaliseLaudo": "",
+        "CNPJLaboratorio": "00000000000100",
+        "RazaoSocialLaboratorio": "LABORATÓRIO DE ENSAIOS",
+        "NRLaudo": f"L{registro_ca}",
+        "Norma": "NBR 13712",
+    }
+
+
+def prepare(rows: list) -> pd.DataFrame:
+    """DataFrame como entregue pela fonte de dados (normalizado e ordenado)"""
+    return CAEPIDataSource._optimize_dataframe(pd.DataFrame(rows, columns=COLUMNS_NAME))
+
+
+class IncrementalPublishTest(unittest.TestCase):
+    """Uma geração publicada sobre outra deve ser igual à construída do zero"""
+
+    def setUp(self):
+        rng = random.Random(7)
+        base_rows = {registro_ca: certificate(registro_ca, rng) for registro_ca in range(1000, 1200)}
+
+        rows = dict(base_rows)
+        for registro_ca in (1003, 1050, 1051, 1120, 1199):
+            del rows[registro_ca]
+        for registro_ca in (1010, 1011, 1077, 1150):
+            rows[registro_ca] = dict(rows[registro_ca], RazaoSocial="NOVA EMPRESA SA", Situacao="CANCELADO")
+        rows[1020] = dict(rows[1020], DataValidade="31/12/2031", Cor="Azul")
+        rows[1021] = dict(rows[1021], CNPJ="12345678000107", DescricaoEquipamento="LUVA nitrílica")
+        for registro_ca in (900, 1500, 1501, 1502):
+            rows[registro_ca] = certificate(registro_ca, rng)
+
+        self.base_df = prepare(list(base_rows.values()))
+        self.df = prepare(list(rows.values()))
+
+        self._dirs = [tempfile.TemporaryDirectory() for _ in range(2)]
+        self.incremental_store = SharedDatasetStore(self._dirs[0].name)
+        self.full_store = SharedDatasetStore(self._dirs[1].name)
+
+    def tearDown(self):
+        for directory in self._dirs:
+            directory.cleanup()
+
+    def open(self, store: SharedDatasetStore, generation: int):
+        opened = store.open(generation)
+        self.addCleanup(opened.lease.release)
+        return opened
+
+    def test_incremental_generation_matches_full_build(self):
+        self.incremental_store.publish(self.base_df)
+        incremental = self.open(self.incremental_store, self.incremental_store.publish(self.df))
+        full = self.open(self.full_store, self.full_store.publish(self.df))
+
+        # A geração foi de fato publicada sobre a anterior
+        self.assertIsNotNone(incremental.changes)
+        self.assertLessEqual(incremental.changes.churn, SharedDatasetStore.MAX_INCREMENTAL_CHURN)
+        self.assertIsNone(full.changes)
+
+        self.assertEqual(incremental.table.content_hash(), full.table.content_hash())
+        self.assertEqual(incremental.manifest["version"], full.manifest["version"])
+
+        self.assertEqual(len(incremental.table), len(full.table))
+        self.assertEqual(incremental.table.column_names, full.table.column_names)
+        for position in range(len(full.table)):
+            self.assertEqual(incremental.table.row(position), full.table.row(position))
+
+        np.testing.assert_array_equal(incremental.index.keys, full.index.keys)
+        np.testing.assert_array_equal(incremental.index.rows, full.index.rows)
+        positions = np.arange(len(full.index))
+        self.assertEqual(incremental.index.records(positions), full.index.records(positions))
+        np.testing.assert_array_equal(incremental.hashes, full.hashes)
+
+        for filters in FILTERS:
+            with self.subTest(filters=filters):
+                expected = full.filters.search(filters)
+                self.assertGreater(len(expected), 0)
+                np.testing.assert_array_equal(incremental.filters.search(filters), expected)
+
+        for query in QUERIES:
+            with self.subTest(query=query):
+                docs, scores = incremental.text.search(query)
+                expected_docs, expected_scores = full.text.search(query)
+                self.assertGreater(len(expected_docs), 0)
+                np.testing.assert_array_equal(docs, expected_docs)
+                np.testing.assert_allclose(scores, expected_scores)
+
+    def test_changes_match_edited_rows(self):
+        base_generation = self.incremental_store.publish(self.base_df)
+        opened = self.open(self.incremental_store, self.incremental_store.publish(self.df))
+        changes = opened.changes
+        summary = changes.summary()
+
+        self.assertEqual(changes.base_generation, base_generation)
+        self.assertEqual(summary["added"], 4)
+        self.assertEqual(summary["removed"], 5)
+        self.assertEqual(summary["changed"], 6)
+
+
+if __name__ == "__main__":
+    unittest.main()